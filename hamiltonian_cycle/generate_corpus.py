@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hamiltonian_cycle import (
+    create_problem_file,
+    generate_random_graph,
+    plot_graph_and_solution,
+)
+
+
+def instance_seed(seed, num_vertices, edge_probability, index):
+    """Derive the seed of one instance from the corpus seed and its parameters."""
+    sequence = np.random.SeedSequence(
+        [seed, num_vertices, round(edge_probability * 10**6), index]
+    )
+    return int(sequence.generate_state(1, dtype=np.uint64)[0])
+
+
+def file_hash(path):
+    """Return the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def generate_instance(job):
+    """Generate one problem file (and optionally its plot) and return its manifest entry."""
+    output_dir, name, num_vertices, edge_probability, index, seed, plot = job
+    start = time.perf_counter()
+    graph = generate_random_graph(num_vertices, edge_probability, seed=seed)
+    problem_path = os.path.join(output_dir, f"{name}.pddl")
+    create_problem_file(problem_path, graph, num_vertices)
+    if plot:
+        plot_graph_and_solution(
+            graph, cycle=None, output_path=os.path.join(output_dir, f"{name}.png")
+        )
+    return {
+        "file": os.path.basename(problem_path),
+        "vertices": num_vertices,
+        "edge_probability": edge_probability,
+        "instance": index,
+        "seed": seed,
+        "edges": graph.number_of_edges(),
+        "sha256": file_hash(problem_path),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def corpus_jobs(args):
+    """List the instances of the parameter grid, in a reproducible order."""
+    jobs = []
+    for edge_probability in args.edge_probs:
+        for num_vertices in args.vertices:
+            for index in range(args.instances):
+                name = f"problem_v{num_vertices}_p{round(edge_probability * 100)}"
+                if args.instances > 1:
+                    name += f"_s{index}"
+                seed = instance_seed(args.seed, num_vertices, edge_probability, index)
+                jobs.append(
+                    (
+                        args.output_dir,
+                        name,
+                        num_vertices,
+                        edge_probability,
+                        index,
+                        seed,
+                        args.plot,
+                    )
+                )
+    return jobs
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate a corpus of Hamiltonian cycle problems over a parameter grid."
+    )
+
+    parser.add_argument(
+        "--vertices",
+        "-v",
+        type=int,
+        nargs="+",
+        default=[5, 12, 30],
+        help="Vertex counts of the grid (default: 5 12 30)",
+    )
+
+    parser.add_argument(
+        "--edge-probs",
+        "-p",
+        type=float,
+        nargs="+",
+        default=[0.3, 0.6, 0.9],
+        help="Edge probabilities of the grid (default: 0.3 0.6 0.9)",
+    )
+
+    parser.add_argument(
+        "--instances",
+        "-n",
+        type=int,
+        default=1,
+        help="Instances per grid point, suffixed _s0, _s1, ... when more than one (default: 1)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the corpus, from which every instance seed is derived (default: 0)",
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        type=str,
+        default=".",
+        help="Directory of the problem files and the manifest (default: .)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+
+    parser.add_argument(
+        "--plot",
+        action="store_true",
+        help="Also draw each graph to a PNG file next to its problem",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default="manifest.json",
+        help="Name of the manifest file in the output directory (default: manifest.json)",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = corpus_jobs(args)
+
+    workers = args.workers or os.cpu_count() or 1
+    # A few chunks per worker keep the pool busy without a round trip per file
+    chunksize = max(1, len(jobs) // (4 * workers))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        instances = list(executor.map(generate_instance, jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        "seed": args.seed,
+        "vertices": args.vertices,
+        "edge_probabilities": args.edge_probs,
+        "instances_per_point": args.instances,
+        "instances": instances,
+    }
+    manifest_path = os.path.join(args.output_dir, args.manifest)
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+
+    print(f"Generated {len(instances)} problems in {elapsed:.1f} s")
+    print(f"Manifest saved to {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
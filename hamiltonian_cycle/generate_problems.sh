@@ -1,10 +1,3 @@
-EDGE_PROBS=(0.3 0.6 0.9)
-VERTEX_COUNTS=(5 12 30)
-
-for edge_prob in "${EDGE_PROBS[@]}"; do
-    for vertex_count in "${VERTEX_COUNTS[@]}"; do
-        edge_prob_int=$(echo "$edge_prob * 100" | bc | awk '{print int($1+0.5)}')
-        problem_file="problem_v${vertex_count}_p${edge_prob_int}.pddl"
-        python hamiltonian_cycle.py --vertices "$vertex_count" --edge-prob "$edge_prob" --problem "$problem_file"
-    done
-done
\ No newline at end of file
+# Generate the problem corpus: every vertex count with every edge probability,
+# in parallel, with a manifest. Extra arguments (e.g. --seed 7 --plot) are passed on.
+python "$(dirname "$0")/generate_corpus.py" --vertices 5 12 30 --edge-probs 0.3 0.6 0.9 "$@"
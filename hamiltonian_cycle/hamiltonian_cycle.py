@@ -1,128 +1,314 @@
 import argparse
-import random
+import hashlib
+import itertools
+import os
 import re
-import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import networkx as nx
-
-
-def generate_random_graph(num_vertices, edge_probability=0.5):
+import numpy as np
+
+from hamiltonian_solver import (
+    NodeLimitReached,
+    cycle_to_plan,
+    palmer_cycle,
+    read_plan_file,
+    repair_cycle,
+    solve,
+    verify_plan,
+)
+
+# The planner runner, output parser, and plan cache are shared through planner/
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "planner")
+)
+from plan_cache import PlanCache
+from plan_stream import PlanStep, PlanStreamParser, ProgressEvent
+from runner import FINISHED, PlannerJob, planner_command, run_planner_job
+
+# The problem template next to this script, and the templates already loaded
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "problem-template.pddl"
+)
+_templates = {}
+
+# Number of characters buffered before each write of a problem file
+WRITE_CHUNK = 1 << 16
+
+# Largest number of vertices drawn with labels at full resolution, and the
+# resolution of the cheaper drawing of larger graphs
+PLOT_DETAIL_LIMIT = 40
+PLOT_FAST_DPI = 100
+
+# Spring layouts already computed, by graph_key
+_layouts = {}
+
+
+def _random_pairs(num_vertices, edge_probability, rng):
+    """Sample the vertex pairs of G(n, p) with geometric edge skipping, as (i, j) arrays."""
+    total = num_vertices * (num_vertices - 1) // 2
+    if total == 0 or edge_probability <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if edge_probability >= 1:
+        positions = np.arange(total, dtype=np.int64)
+    else:
+        # The gaps between consecutive edges in the list of all pairs are geometric
+        chunks = []
+        last = -1
+        expected = total * edge_probability
+        batch = int(expected + 5 * np.sqrt(expected) + 16)
+        while last < total:
+            gaps = rng.geometric(edge_probability, size=batch)
+            chunk = last + np.cumsum(gaps, dtype=np.int64)
+            last = int(chunk[-1])
+            chunks.append(chunk[chunk < total])
+            batch = max(16, batch // 4)
+        positions = np.concatenate(chunks)
+
+    # Map each position in the row-major upper triangle to its (i, j) pair
+    n = num_vertices
+    i = (2 * n - 1 - np.sqrt((2 * n - 1) ** 2 - 8 * positions.astype(float))) // 2
+    i = i.astype(np.int64)
+    # Correct the rounding errors of the floating-point inversion
+    i -= _row_start(i, n) > positions
+    i += _row_start(i + 1, n) <= positions
+    j = positions - _row_start(i, n) + i + 1
+    return i, j
+
+
+def _row_start(i, n):
+    """Return the position of pair (i, i + 1) in the row-major upper triangle."""
+    return i * (2 * n - i - 1) // 2
+
+
+def _find(parent, v):
+    """Find the root of a vertex in a union-find forest, halving the path."""
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
+
+
+def generate_random_graph(num_vertices, edge_probability=0.5, seed=None):
     """Generate a random connected graph with the given number of vertices."""
-    graph = nx.Graph()
-
-    # Add vertices
-    for i in range(1, num_vertices + 1):
-        graph.add_node(i)
-
-    # Add random edges
-    for i in range(1, num_vertices + 1):
-        for j in range(i + 1, num_vertices + 1):
-            if random.random() < edge_probability:
-                graph.add_edge(i, j)
-
-    # Ensure the graph is connected
-    while not nx.is_connected(graph):
-        components = list(nx.connected_components(graph))
-        if len(components) > 1:
-            comp1 = random.choice(list(components[0]))
-            comp2 = random.choice(list(components[1]))
-            graph.add_edge(comp1, comp2)
+    rng = np.random.default_rng(seed)
+
+    # Sample the edges of G(n, p), with vertices numbered from 1
+    i, j = _random_pairs(num_vertices, edge_probability, rng)
+    sources, targets = (i + 1).tolist(), (j + 1).tolist()
+
+    # Find the connected components with a union-find pass that stops as soon as
+    # the graph is connected, which the first rows of pairs of a dense graph do
+    parent = list(range(num_vertices + 1))
+    remaining = num_vertices
+    for u, v in zip(sources, targets):
+        if remaining == 1:
+            break
+        root_u, root_v = _find(parent, u), _find(parent, v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+            remaining -= 1
+    components = {}
+    for v in range(1, num_vertices + 1):
+        components.setdefault(_find(parent, v), []).append(v)
+
+    # Ensure the graph is connected by chaining random vertices of each component
+    members = list(components.values())
+    bridges = [
+        (int(rng.choice(first)), int(rng.choice(second)))
+        for first, second in zip(members, members[1:])
+    ]
 
+    graph = nx.Graph()
+    graph.add_nodes_from(range(1, num_vertices + 1))
+    graph.add_edges_from(zip(sources, targets))
+    graph.add_edges_from(bridges)
     return graph
 
 
-def generate_pddl_edges(graph):
-    """Generate PDDL representation of the graph edges."""
-    pddl_edges = []
-    for u, v in graph.edges():
-        pddl_edges.append(f"    (connected v{u} v{v})")
-        pddl_edges.append(f"    (connected v{v} v{u})")
-    return "\n".join(pddl_edges)
-
-
-def create_problem_file(output_path, graph, num_vertices):
-    """Create a problem file for a graph with the given number of vertices."""
-    # Generate vertex objects
-    vertex_objects = (
-        " ".join([f"v{i}" for i in range(1, num_vertices + 1)]) + " - vertex"
-    )
-
-    # Generate count objects (need n0 through nN where N = num_vertices)
-    count_objects = " ".join([f"n{i}" for i in range(num_vertices + 1)]) + " - count"
+def read_edge_diff(diff_path):
+    """Read an edge diff file, one "+ v1 v2" (added edge) or "- v1 v2" (removed edge) per line."""
+    diff = []
+    with open(diff_path, "r") as file:
+        for number, line in enumerate(file, start=1):
+            tokens = line.split("#", 1)[0].split()
+            if not tokens:
+                continue
+            if len(tokens) != 3 or tokens[0] not in ("+", "-"):
+                raise ValueError(f"{diff_path}:{number}: expected '+ u v' or '- u v'")
+            diff.append(
+                (tokens[0], int(tokens[1].lstrip("vV")), int(tokens[2].lstrip("vV")))
+            )
+    return diff
+
+
+def apply_edge_diff(graph, diff):
+    """Return a copy of the graph with the edges of a diff added or removed."""
+    changed = graph.copy()
+    for sign, u, v in diff:
+        if u not in graph or v not in graph:
+            raise ValueError(f"the edge v{u}-v{v} has a vertex not in the graph")
+        if sign == "+":
+            changed.add_edge(u, v)
+        elif changed.has_edge(u, v):
+            changed.remove_edge(u, v)
+    return changed
+
+
+def random_edge_diff(graph, changes, rng):
+    """Draw a diff of changes edges, each removed from or added to the graph with equal odds."""
+    edges = list(graph.edges())
+    vertices = list(graph.nodes())
+    diff = []
+    for _ in range(changes):
+        if rng.random() < 0.5 and edges:
+            u, v = edges.pop(int(rng.integers(len(edges))))
+            diff.append(("-", u, v))
+        else:
+            u, v = rng.choice(vertices, size=2, replace=False).tolist()
+            if not graph.has_edge(u, v):
+                diff.append(("+", u, v))
+    return diff
+
+
+def load_template(template_path=TEMPLATE_PATH):
+    """Load a problem template once, split into literal text and placeholder names."""
+    parts = _templates.get(template_path)
+    if parts is None:
+        with open(template_path, "r") as file:
+            # Even indexes hold literal text, odd indexes placeholder names
+            parts = re.split(r"\{(\w+)\}", file.read())
+        _templates[template_path] = parts
+    return parts
+
+
+def _joined(items, separator, batch=4096):
+    """Yield items with a separator between consecutive ones, joined in batches."""
+    items = iter(items)
+    first = True
+    while True:
+        chunk = separator.join(itertools.islice(items, batch))
+        if not chunk:
+            return
+        yield chunk if first else separator + chunk
+        first = False
 
-    # Generate edges
-    graph_edges = generate_pddl_edges(graph)
-
-    # Generate count sequence
-    count_sequence = "\n".join(
-        [f"    (next n{i} n{i + 1})" for i in range(num_vertices)]
-    )
 
-    # Generate visited goals
-    visited_goals = "\n      ".join(
-        [f"(visited v{i})" for i in range(1, num_vertices + 1)]
+def generate_pddl_edges(graph):
+    """Generate PDDL representation of the graph edges, in chunks."""
+    lines = (
+        f"    (connected v{u} v{v})\n    (connected v{v} v{u})"
+        for u, v in graph.edges()
     )
+    return _joined(lines, "\n")
 
-    # Total vertices
-    total_vertices = f"n{num_vertices}"
-
-    # Create the content with substitutions
-    with open("problem-template.pddl", "r") as file:
-        content = file.read()
-        content = content.replace("{VERTEX_OBJECTS}", vertex_objects)
-        content = content.replace("{COUNT_OBJECTS}", count_objects)
-        content = content.replace("{GRAPH_EDGES}", graph_edges)
-        content = content.replace("{COUNT_SEQUENCE}", count_sequence)
-        content = content.replace("{VISITED_GOALS}", visited_goals)
-        content = content.replace("{TOTAL_VERTICES}", total_vertices)
 
+def create_problem_file(output_path, graph, num_vertices, template_path=TEMPLATE_PATH):
+    """Create a problem file for a graph with the given number of vertices."""
+    vertices = range(1, num_vertices + 1)
+    sections = {
+        # Vertex objects, and count objects n0 through nN where N = num_vertices
+        "VERTEX_OBJECTS": lambda: itertools.chain(
+            _joined((f"v{i}" for i in vertices), " "), [" - vertex"]
+        ),
+        "COUNT_OBJECTS": lambda: itertools.chain(
+            _joined((f"n{i}" for i in range(num_vertices + 1)), " "), [" - count"]
+        ),
+        "GRAPH_EDGES": lambda: generate_pddl_edges(graph),
+        "COUNT_SEQUENCE": lambda: _joined(
+            (f"    (next n{i} n{i + 1})" for i in range(num_vertices)), "\n"
+        ),
+        "VISITED_GOALS": lambda: _joined(
+            (f"(visited v{i})" for i in vertices), "\n      "
+        ),
+        "TOTAL_VERTICES": lambda: [f"n{num_vertices}"],
+    }
+
+    # Stream the template with its sections, writing in chunks of WRITE_CHUNK characters
     with open(output_path, "w") as file:
-        file.write(content)
-
-
-def run_planner(domain_file, problem_file):
-    """Run the FF planner and return the output."""
-    try:
-        result = subprocess.run(
-            ["ff", domain_file, problem_file],
-            capture_output=True,
-            text=True,
-            check=True,
+        buffer, size = [], 0
+        for index, part in enumerate(load_template(template_path)):
+            if index % 2 == 0:
+                pieces = [part]
+            elif part in sections:
+                pieces = sections[part]()
+            else:
+                pieces = ["{" + part + "}"]
+            for piece in pieces:
+                buffer.append(piece)
+                size += len(piece)
+                if size >= WRITE_CHUNK:
+                    file.write("".join(buffer))
+                    buffer, size = [], 0
+        file.write("".join(buffer))
+
+
+def prescreen_graph(graph):
+    """Check cheap conditions for a Hamiltonian cycle and return (verdict, test, detail)."""
+    # The verdict is "infeasible" when a necessary condition fails, "feasible" when
+    # a sufficient one holds, and "unknown" otherwise
+    n = graph.number_of_nodes()
+    if n < 3:
+        return "infeasible", "too-few-vertices", f"{n} vertices"
+
+    # Necessary conditions
+    low = min(graph.nodes(), key=graph.degree)
+    if graph.degree(low) < 2:
+        return "infeasible", "min-degree", f"v{low} has degree {graph.degree(low)}"
+    if not nx.is_connected(graph):
+        return "infeasible", "disconnected", "the graph is not connected"
+    bridge = next(nx.bridges(graph), None)
+    if bridge is not None:
+        return "infeasible", "bridge", f"v{bridge[0]}-v{bridge[1]}"
+    cut = next(nx.articulation_points(graph), None)
+    if cut is not None:
+        return "infeasible", "articulation-point", f"v{cut}"
+    if nx.is_bipartite(graph):
+        left, right = nx.bipartite.sets(graph)
+        if len(left) != len(right):
+            return (
+                "infeasible",
+                "bipartite-imbalance",
+                f"parts of {len(left)} and {len(right)} vertices",
+            )
+
+    # Sufficient conditions
+    if 2 * graph.degree(low) >= n:
+        return "feasible", "dirac", f"min degree {graph.degree(low)} >= {n}/2"
+    degrees = dict(graph.degree())
+    if all(degrees[u] + degrees[v] >= n for u, v in nx.non_edges(graph)):
+        return "feasible", "ore", f"deg(u) + deg(v) >= {n} for all non-adjacent u, v"
+    return "unknown", "none", "no condition decided"
+
+
+def run_planner(
+    domain_file, problem_file, timeout=None, memory_limit=None, on_line=None
+):
+    """Run the FF planner within optional time (s) and memory (MB) limits and return the output, passing each line to on_line as it is produced."""
+    run = run_planner_job(
+        PlannerJob(
+            planner_command("ff", domain_file, problem_file),
+            timeout=timeout,
+            memory_limit=memory_limit,
+            on_line=on_line,
         )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Planner error: {e}")
-        print(f"Error output: {e.stderr}")
-        return e.stdout if e.stdout else ""
+    )
+    if run.status != FINISHED:
+        print(f"Planner error: {run}")
+        print(f"Error output: {run.stderr}")
+    return run.stdout
 
 
 def parse_plan(planner_output):
     """Parse the planner output to extract the plan steps."""
-    plan = []
-    in_plan_section = False
-
-    for line in planner_output.split("\n"):
-        if "found legal plan as follows" in line:
-            in_plan_section = True
-            continue
-
-        if in_plan_section:
-            # Match lines like "step    0: SELECT-START V5 N0 N1"
-            # or lines like "        1: MOVE-TO-NEXT V5 V4 N1 N2"
-            action_match = re.search(r"\d+:\s+(\w+(?:-\w+)*)\s+(.*)", line)
-            if action_match:
-                action_name = action_match.group(1)
-                action_params = action_match.group(2).strip().split()
-
-                # Skip REACH-GOAL as it's not part of the actual plan
-                if action_name != "REACH-GOAL":
-                    plan.append((action_name, action_params))
-
-            elif "time spent:" in line:
-                break
-
-    return plan
+    return [
+        (event.action, event.arguments)
+        for event in PlanStreamParser("ff").parse(planner_output.splitlines())
+        if isinstance(event, PlanStep)
+    ]
 
 
 def extract_cycle_from_plan(plan):
@@ -153,12 +339,33 @@ def extract_cycle_from_plan(plan):
     return cycle
 
 
+def graph_key(graph):
+    """Hash the vertex and edge lists of a graph, independently of their order."""
+    digest = hashlib.sha256()
+    digest.update(repr(sorted(graph.nodes())).encode())
+    digest.update(repr(sorted(tuple(sorted(edge)) for edge in graph.edges())).encode())
+    return digest.hexdigest()
+
+
+def graph_layout(graph):
+    """Return the spring layout of a graph, computed once per distinct graph."""
+    key = graph_key(graph)
+    pos = _layouts.get(key)
+    if pos is None:
+        # Fixed seed for reproducibility
+        pos = nx.spring_layout(graph, seed=42)
+        _layouts[key] = pos
+    return pos
+
+
 def plot_graph_and_solution(graph, cycle=None, output_path="graph_solution.png"):
     """Plot the graph and the Hamiltonian cycle solution."""
+    # Large graphs get a cheaper drawing: small unlabeled nodes, no edge labels
+    detailed = graph.number_of_nodes() <= PLOT_DETAIL_LIMIT
+
     plt.figure(figsize=(12, 10))
 
-    # Position nodes using spring layout with fixed seed for reproducibility
-    pos = nx.spring_layout(graph, seed=42)
+    pos = graph_layout(graph)
 
     # Draw all edges in light gray
     nx.draw_networkx_edges(graph, pos, width=1.0, alpha=0.3, edge_color="gray")
@@ -168,33 +375,46 @@ def plot_graph_and_solution(graph, cycle=None, output_path="graph_solution.png")
         cycle_edges = [(cycle[i], cycle[i + 1]) for i in range(len(cycle) - 1)]
         cycle_edges.append((cycle[-1], cycle[0]))  # Close the cycle
         nx.draw_networkx_edges(
-            graph, pos, edgelist=cycle_edges, width=3.0, alpha=1.0, edge_color="red"
+            graph,
+            pos,
+            edgelist=cycle_edges,
+            width=3.0 if detailed else 1.5,
+            alpha=1.0,
+            edge_color="red",
         )
 
-        # Add path sequence numbers to edges
-        edge_labels = {}
-        for i in range(len(cycle) - 1):
-            edge_labels[(cycle[i], cycle[i + 1])] = f"{i + 1}"
-        # The last edge connects back to the start
-        edge_labels[(cycle[-1], cycle[0])] = f"{len(cycle)}"
-        nx.draw_networkx_edge_labels(graph, pos, edge_labels=edge_labels, font_size=10)
+        if detailed:
+            # Add path sequence numbers to edges
+            edge_labels = {}
+            for i in range(len(cycle) - 1):
+                edge_labels[(cycle[i], cycle[i + 1])] = f"{i + 1}"
+            # The last edge connects back to the start
+            edge_labels[(cycle[-1], cycle[0])] = f"{len(cycle)}"
+            nx.draw_networkx_edge_labels(
+                graph, pos, edge_labels=edge_labels, font_size=10
+            )
 
         title = "Hamiltonian Cycle Solution"
     else:
         title = "Graph Structure"
 
     # Draw nodes
-    nx.draw_networkx_nodes(graph, pos, node_size=700, node_color="lightblue")
+    if detailed:
+        nx.draw_networkx_nodes(graph, pos, node_size=700, node_color="lightblue")
 
-    # Draw labels
-    labels = {i: f"v{i}" for i in graph.nodes()}
-    nx.draw_networkx_labels(graph, pos, labels, font_size=14, font_weight="bold")
+        # Draw labels
+        labels = {i: f"v{i}" for i in graph.nodes()}
+        nx.draw_networkx_labels(graph, pos, labels, font_size=14, font_weight="bold")
+    else:
+        nx.draw_networkx_nodes(graph, pos, node_size=30, node_color="lightblue")
 
     plt.axis("off")
     plt.title(title, fontsize=16)
     plt.tight_layout()
 
-    plt.savefig(output_path, dpi=300, bbox_inches="tight")
+    plt.savefig(
+        output_path, dpi=300 if detailed else PLOT_FAST_DPI, bbox_inches="tight"
+    )
     plt.close()
 
     print(f"Graph visualization saved to {output_path}")
@@ -222,6 +442,13 @@ def parse_arguments():
         help="Probability of edge creation between vertices (default: 0.5)",
     )
 
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the random graph generator, for reproducible instances (default: random)",
+    )
+
     parser.add_argument(
         "--domain",
         "-d",
@@ -252,9 +479,175 @@ def parse_arguments():
         help="Filename for the solution graph visualization (default: based on problem filename)",
     )
 
+    parser.add_argument(
+        "--no-plot",
+        action="store_true",
+        help="Do not draw the graph and the solution",
+    )
+
+    parser.add_argument(
+        "--solver",
+        type=str,
+        choices=["auto", "ff", "native"],
+        default="auto",
+        help="Solve with FF, with the native solver, or with the native solver and FF when it reaches its node limit (default: auto)",
+    )
+
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=100000,
+        help="Largest number of search nodes of the native solver in auto mode (default: 100000)",
+    )
+
+    parser.add_argument(
+        "--planner-timeout",
+        type=float,
+        default=None,
+        help="Wall-clock limit of FF in seconds (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--planner-memory-limit",
+        type=float,
+        default=None,
+        help="Address-space limit of FF in megabytes (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--plan-cache",
+        type=str,
+        default=".plan-cache",
+        help="Directory of the plan cache, where FF plans are stored and reused for identical problems (default: .plan-cache)",
+    )
+
+    parser.add_argument(
+        "--no-plan-cache",
+        action="store_true",
+        help="Always run FF, without reading or storing plans in the plan cache",
+    )
+
+    parser.add_argument(
+        "--edge-diff",
+        type=str,
+        default=None,
+        help='Apply an edge diff file to the generated graph, one "+ v1 v2" or "- v1 v2" per line',
+    )
+
+    parser.add_argument(
+        "--previous-plan",
+        type=str,
+        default=None,
+        help="Plan of the graph before the edge diff, repaired with 2-opt/3-opt moves before any solver runs",
+    )
+
+    parser.add_argument(
+        "--no-prescreen",
+        action="store_true",
+        help="Skip the graph-theoretic pre-screening and always run a solver",
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the FF result with the native solver",
+    )
+
     return parser.parse_args()
 
 
+def solve_natively(graph, node_limit=None):
+    """Run the native solver and return (plan, solved), solved being False at the node limit."""
+    try:
+        cycle = solve(graph, node_limit=node_limit)
+    except NodeLimitReached as e:
+        print(f"Native solver stopped: {e}")
+        return [], False
+    if cycle is None:
+        print("Native solver: the graph has no Hamiltonian cycle")
+        return [], True
+    return cycle_to_plan(cycle), True
+
+
+def run_ff(domain_path, problem_path, timeout=None, memory_limit=None):
+    """Run FF, save its output, and return the plan it found."""
+    print("Running FF planner...")
+    parser = PlanStreamParser("ff")
+
+    def report(line):
+        # Report the progress of FF while it runs
+        for event in parser.feed(line):
+            if isinstance(event, ProgressEvent):
+                print(f"FF goal distance: {event.value}", flush=True)
+
+    planner_output = run_planner(
+        domain_path, problem_path, timeout, memory_limit, on_line=report
+    )
+
+    # Save planner output to file
+    with open("planner_output.txt", "w") as f:
+        f.write(planner_output)
+    print("Planner output saved to planner_output.txt")
+
+    return [(step.action, step.arguments) for step in parser.steps]
+
+
+def cached_ff_plan(args, graph):
+    """Return the plan of an identical problem from the plan cache, or run FF and store its plan."""
+    plan_cache = None if args.no_plan_cache else PlanCache(args.plan_cache)
+    if plan_cache:
+        key = PlanCache.file_key(args.domain, args.problem, {"planner": "ff"})
+        plan = plan_cache.get(key, validate=lambda steps: verify_plan(graph, steps)[0])
+        if plan is not None:
+            print("Plan found in the plan cache")
+            return [(action, params) for action, params in plan]
+    plan = run_ff(
+        args.domain,
+        args.problem,
+        timeout=args.planner_timeout,
+        memory_limit=args.planner_memory_limit,
+    )
+    if plan_cache and plan and verify_plan(graph, plan)[0]:
+        plan_cache.put(key, plan)
+    return plan
+
+
+def repair_previous_plan(plan_path, previous_graph, graph):
+    """Repair the cycle of a plan of the graph before an edge diff, and return the new plan or []."""
+    previous = read_plan_file(plan_path)
+    valid, reason = verify_plan(previous_graph, previous)
+    if not valid:
+        print(f"Ignoring the previous plan: {reason}")
+        return []
+    start = time.perf_counter()
+    cycle, moves = repair_cycle(graph, extract_cycle_from_plan(previous))
+    elapsed = time.perf_counter() - start
+    if cycle is None:
+        print(f"Repair failed after {elapsed * 1000:.1f} ms, solving from scratch")
+        return []
+    if moves:
+        print(
+            f"Repaired the previous cycle with {moves.count('2-opt')} 2-opt and "
+            f"{moves.count('3-opt')} 3-opt moves in {elapsed * 1000:.1f} ms"
+        )
+    else:
+        print("The previous cycle is still valid")
+    return cycle_to_plan(cycle)
+
+
+def verify_result(graph, plan):
+    """Check a plan, or the absence of a plan, with the native solver."""
+    if plan:
+        valid, reason = verify_plan(graph, plan)
+        print(f"Verification: plan {'VALID' if valid else 'INVALID'} ({reason})")
+        return
+    cycle_plan, solved = solve_natively(graph)
+    if cycle_plan:
+        print("Verification: MISSED, the native solver found a Hamiltonian cycle")
+    elif solved:
+        print("Verification: confirmed that no Hamiltonian cycle exists")
+
+
 def main():
     # Parse arguments
     args = parse_arguments()
@@ -262,7 +655,6 @@ def main():
     # Parameters from command line
     num_vertices = args.vertices
     edge_probability = args.edge_prob
-    domain_path = args.domain
     problem_path = args.problem
 
     # Generate plot filenames based on problem filename if not specified
@@ -273,43 +665,108 @@ def main():
     solution_graph_path = args.solution_graph or f"{problem_base}_solution.png"
 
     # Generate graph
-    graph = generate_random_graph(num_vertices, edge_probability)
+    graph = generate_random_graph(num_vertices, edge_probability, seed=args.seed)
+    previous_graph = graph
+    if args.edge_diff:
+        diff = read_edge_diff(args.edge_diff)
+        graph = apply_edge_diff(graph, diff)
+        print(
+            f"Applied {args.edge_diff}: {sum(sign == '+' for sign, _, _ in diff)} edges added, "
+            f"{sum(sign == '-' for sign, _, _ in diff)} removed"
+        )
 
     # Create problem file
     create_problem_file(problem_path, graph, num_vertices)
 
-    # Create visualization of initial graph
-    plot_graph_and_solution(graph, cycle=None, output_path=original_graph_path)
+    if args.no_plot:
+        solve_and_report(args, graph, previous_graph)
+        return
+
+    # Draw in a background process while the instance is solved; a single worker
+    # computes the layout once for both drawings
+    with ProcessPoolExecutor(max_workers=1) as renderer:
+        drawings = [
+            renderer.submit(plot_graph_and_solution, graph, None, original_graph_path)
+        ]
+        cycle = solve_and_report(args, graph, previous_graph)
+        if cycle:
+            drawings.append(
+                renderer.submit(
+                    plot_graph_and_solution, graph, cycle, solution_graph_path
+                )
+            )
+        # Wait for the drawings, raising their errors
+        for drawing in drawings:
+            drawing.result()
+
+
+def solve_and_report(args, graph, previous_graph=None):
+    """Solve the generated instance, print the plan, and return the cycle found, if any."""
+    num_vertices = args.vertices
+    problem_path = args.problem
 
     print(
         f"Generated graph with {num_vertices} vertices and {len(graph.edges())} edges"
     )
     print(f"PDDL problem file saved to {problem_path}")
 
-    # Run planner
-    print("Running FF planner...")
-    planner_output = run_planner(domain_path, problem_path)
-
-    # Save planner output to file
-    with open("planner_output.txt", "w") as f:
-        f.write(planner_output)
-    print("Planner output saved to planner_output.txt")
-
-    # Parse plan
-    plan = parse_plan(planner_output)
+    # Repair the plan of the graph before the edge diff
+    plan, solved = [], False
+    # Why the graph has no Hamiltonian cycle, once a solver or test proved it
+    no_cycle = None
+    if args.previous_plan:
+        plan = repair_previous_plan(args.previous_plan, previous_graph or graph, graph)
+        solved = bool(plan)
+
+    # Decide obvious instances without a solver
+    if not solved and not args.no_prescreen:
+        verdict, test, detail = prescreen_graph(graph)
+        print(f"Pre-screening verdict: {verdict} (test: {test}, {detail})")
+        if verdict == "infeasible":
+            print("Skipping the planner: the graph has no Hamiltonian cycle")
+            solved = True
+            no_cycle = f"proved by the pre-screening (test: {test})"
+        elif verdict == "feasible":
+            cycle = palmer_cycle(graph)
+            if cycle is not None:
+                print("Skipping the planner: cycle built by Palmer's algorithm")
+                plan, solved = cycle_to_plan(cycle), True
+
+    # Solve natively first unless FF is requested, falling back to FF
+    if not solved and args.solver != "ff":
+        print("Running native solver...")
+        plan, solved = solve_natively(
+            graph, node_limit=args.node_limit if args.solver == "auto" else None
+        )
+        if solved and not plan:
+            no_cycle = "proved by the native solver"
+    if not solved:
+        plan = cached_ff_plan(args, graph)
+        if args.verify:
+            verify_result(graph, plan)
     if plan:
         print("\nExtracted plan:")
         for i, (action, params) in enumerate(plan):
             print(f"{i}: {action} {' '.join(params)}")
 
-        # Extract and visualize cycle
+        # Save the plan, the --previous-plan of the next version of the graph
+        plan_path = f"{args.problem}.plan"
+        with open(plan_path, "w") as file:
+            for action, params in plan:
+                file.write(f"( {action} {' '.join(params)} )\n")
+        print(f"Plan saved to {plan_path}")
+
+        # Extract the cycle, drawn by the caller
         cycle = extract_cycle_from_plan(plan)
         print(
             f"\nHamiltonian cycle: {' → '.join([f'v{v}' for v in cycle])} → v{cycle[0]}"
         )
-        plot_graph_and_solution(graph, cycle, output_path=solution_graph_path)
+        return cycle
+    if no_cycle is not None:
+        print(f"\nNo Hamiltonian cycle: {no_cycle}.")
     else:
         print("\nNo plan found in the planner output.")
+    return None
 
 
 if __name__ == "__main__":
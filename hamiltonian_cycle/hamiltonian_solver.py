@@ -0,0 +1,393 @@
+import argparse
+import re
+import sys
+
+import networkx as nx
+
+# Largest number of vertices solved with the O(2^n n) dynamic program
+HELD_KARP_LIMIT = 16
+
+
+class NodeLimitReached(Exception):
+    """Raised when the backtracking search exceeds its node limit."""
+
+
+def load_graph_from_problem(problem_path):
+    """Read the graph of a Hamiltonian cycle PDDL problem file."""
+    with open(problem_path, "r") as file:
+        content = file.read()
+    graph = nx.Graph()
+    objects = re.search(r"\(:objects(.*?)- vertex", content, re.S | re.I)
+    if objects:
+        for name in objects.group(1).split():
+            graph.add_node(int(name.lower().lstrip("v")))
+    for u, v in re.findall(r"\(connected\s+v(\d+)\s+v(\d+)\)", content, re.I):
+        graph.add_edge(int(u), int(v))
+    return graph
+
+
+def _adjacency(graph):
+    """Index the vertices and return (vertices, adjacency bitmasks)."""
+    vertices = sorted(graph.nodes())
+    index = {v: i for i, v in enumerate(vertices)}
+    adjacency = [0] * len(vertices)
+    for u, v in graph.edges():
+        if u != v:
+            adjacency[index[u]] |= 1 << index[v]
+            adjacency[index[v]] |= 1 << index[u]
+    return vertices, adjacency
+
+
+def _bits(mask):
+    """Yield the indexes of the set bits of a mask."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def held_karp(graph):
+    """Find a Hamiltonian cycle with the bitmask dynamic program, or None."""
+    vertices, adjacency = _adjacency(graph)
+    n = len(vertices)
+    if n < 3:
+        return None
+    full = (1 << n) - 1
+    # ends[mask]: the vertices at which a path from vertex 0 covering mask can end
+    ends = [0] * (1 << n)
+    ends[1] = 1
+    for mask in range(3, full + 1, 2):
+        reachable = 0
+        for w in _bits(mask & ~1):
+            if ends[mask ^ (1 << w)] & adjacency[w]:
+                reachable |= 1 << w
+        ends[mask] = reachable
+    last = ends[full] & adjacency[0]
+    if not last:
+        return None
+    v = (last & -last).bit_length() - 1
+    mask = full
+    path = [v]
+    while mask != 1 | (1 << v):
+        mask ^= 1 << v
+        previous = ends[mask] & adjacency[v] & ~1
+        v = (previous & -previous).bit_length() - 1
+        path.append(v)
+    path.append(0)
+    return [vertices[i] for i in reversed(path)]
+
+
+def backtracking_search(graph, node_limit=None):
+    """Find a Hamiltonian cycle by pruned depth-first search, or None if none exists."""
+    vertices, adjacency = _adjacency(graph)
+    n = len(vertices)
+    if n < 3 or any(a.bit_count() < 2 for a in adjacency):
+        return None
+    start = min(range(n), key=lambda i: adjacency[i].bit_count())
+    path = [start]
+    nodes = [0]
+
+    def extend(current, unvisited):
+        if not unvisited:
+            return adjacency[current] >> start & 1
+        nodes[0] += 1
+        if node_limit is not None and nodes[0] > node_limit:
+            raise NodeLimitReached(f"more than {node_limit} search nodes")
+        ends = (1 << current) | (1 << start)
+        candidates = adjacency[current] & unvisited
+        for u in _bits(unvisited):
+            available = adjacency[u] & (unvisited | ends)
+            degree = available.bit_count()
+            if degree < 2:
+                return False
+            if degree == 2 and available >> current & 1 and current != start:
+                # Degree-2 forcing: the edge current-u is in the cycle, so u is next
+                if available >> start & 1 and unvisited != 1 << u:
+                    return False
+                candidates &= 1 << u
+        if not candidates:
+            return False
+        # Connectivity: the unvisited vertices must be reachable from current
+        reached = 0
+        frontier = adjacency[current] & unvisited
+        while frontier:
+            reached |= frontier
+            grown = 0
+            for v in _bits(frontier):
+                grown |= adjacency[v]
+            frontier = grown & unvisited & ~reached
+        if reached != unvisited or not adjacency[start] & unvisited:
+            return False
+        # Warnsdorff: try the candidates with the fewest onward moves first
+        for v in sorted(
+            _bits(candidates),
+            key=lambda v: (adjacency[v] & unvisited).bit_count(),
+        ):
+            path.append(v)
+            if extend(v, unvisited & ~(1 << v)):
+                return True
+            path.pop()
+        return False
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, n + 100))
+    try:
+        found = extend(start, ((1 << n) - 1) & ~(1 << start))
+    finally:
+        sys.setrecursionlimit(limit)
+    return [vertices[i] for i in path] if found else None
+
+
+def palmer_cycle(graph):
+    """Build a Hamiltonian cycle of a graph satisfying Ore's condition, or None."""
+    cycle = sorted(graph.nodes())
+    n = len(cycle)
+    if n < 3:
+        return None
+    for _ in range(n + 1):
+        # Find two consecutive vertices that are not adjacent
+        gaps = [i for i in range(n) if not graph.has_edge(cycle[i], cycle[(i + 1) % n])]
+        if not gaps:
+            return cycle
+        gap = gaps[0]
+        cycle = cycle[gap:] + cycle[:gap]
+        # Palmer's step: reverse cycle[1..j] where cycle[0]-cycle[j] and
+        # cycle[1]-cycle[j + 1] are edges, which closes the gap after cycle[0]
+        for j in range(2, n - 1):
+            if graph.has_edge(cycle[0], cycle[j]) and graph.has_edge(
+                cycle[1], cycle[j + 1]
+            ):
+                cycle[1 : j + 1] = reversed(cycle[1 : j + 1])
+                break
+        else:
+            return None
+    return None
+
+
+def _gaps(adjacency, cycle):
+    """Return the positions i at which cycle[i]-cycle[i + 1] is not an edge."""
+    n = len(cycle)
+    return [i for i in range(n) if cycle[(i + 1) % n] not in adjacency[cycle[i]]]
+
+
+def _closing_moves(adjacency, path, three_opt):
+    """Yield (gaps removed, order, i, j) for the moves closing path into a cycle with new edges."""
+    # The closing edge p[n-1]-p[0] of the path is missing. A move cuts the path into
+    # A = p[0..i], B = p[i+1..j], and C = p[j+1..n-1] and joins the segments in another
+    # order, some reversed ('), adding only edges of the graph. Every order adds an
+    # edge at p[0], so the neighbors of p[0] give one of i and j.
+    n = len(path)
+    first, last = path[0], path[-1]
+    position = {v: i for i, v in enumerate(path)}
+
+    def gap(i):
+        return path[i + 1] not in adjacency[path[i]]
+
+    for v in adjacency[first]:
+        k = position[v]
+        if not three_opt:
+            # 2-opt, A + C': adds p[i]-p[n-1] and p[i+1]-p[0]
+            i = k - 1
+            if 0 <= i < n - 2 and path[i] in adjacency[last]:
+                yield 1 + gap(i), "AC'", i, None
+            continue
+        # A C B and A C' B add p[j]-p[0]
+        j = k
+        for i in range(j if j < n - 1 else 0):
+            a, b, d = path[i], path[i + 1], path[j + 1]
+            if d in adjacency[a] and b in adjacency[last]:
+                yield 1 + gap(i) + gap(j), "ACB", i, j
+            if last in adjacency[a] and b in adjacency[d]:
+                yield 1 + gap(i) + gap(j), "AC'B", i, j
+        # A C B' adds p[i+1]-p[0]
+        i = k - 1
+        if i >= 0:
+            a = path[i]
+            for j in range(i + 1, n - 1):
+                if path[j + 1] in adjacency[a] and path[j] in adjacency[last]:
+                    yield 1 + gap(i) + gap(j), "ACB'", i, j
+        # A B' C' adds p[j+1]-p[0]
+        j = k - 1
+        for i in range(j if 0 <= j < n - 1 else 0):
+            if path[j] in adjacency[path[i]] and last in adjacency[path[i + 1]]:
+                yield 1 + gap(i) + gap(j), "AB'C'", i, j
+
+
+def _splice(path, order, i, j):
+    """Join the segments A = path[:i+1], B = path[i+1:j+1], and C = path[j+1:] in an order such as "ACB'"."""
+    if order == "AC'":
+        return path[: i + 1] + path[:i:-1]
+    segments = {
+        "A": path[: i + 1],
+        "B": path[i + 1 : j + 1],
+        "C": path[j + 1 :],
+    }
+    cycle = []
+    for index, name in enumerate(order):
+        if name == "'":
+            continue
+        segment = segments[name]
+        reverse = order[index + 1 : index + 2] == "'"
+        cycle.extend(reversed(segment) if reverse else segment)
+    return cycle
+
+
+def repair_cycle(graph, cycle):
+    """Repair a Hamiltonian cycle after edges were removed from the graph, and return (cycle or None, moves)."""
+    # Each move removes a missing edge and only adds edges of the graph, so there
+    # are at most as many moves as missing edges. 2-opt moves are tried first, then
+    # 3-opt moves; the move removing the most missing edges is applied.
+    adjacency = graph.adj
+    if len(cycle) < 3 or sorted(cycle) != sorted(graph.nodes()):
+        return None, []
+    cycle = list(cycle)
+    moves = []
+    while True:
+        gaps = _gaps(adjacency, cycle)
+        if not gaps:
+            return cycle, moves
+        # Rotate the cycle so that the first missing edge closes it
+        path = cycle[gaps[0] + 1 :] + cycle[: gaps[0] + 1]
+        best = max(_closing_moves(adjacency, path, False), default=None)
+        if best is None:
+            best = max(_closing_moves(adjacency, path, True), default=None)
+        if best is None:
+            return None, moves
+        _, order, i, j = best
+        cycle = _splice(path, order, i, j)
+        moves.append("2-opt" if j is None else "3-opt")
+
+
+def solve(graph, node_limit=None):
+    """Find a Hamiltonian cycle with Held-Karp for small graphs and backtracking otherwise."""
+    if graph.number_of_nodes() <= HELD_KARP_LIMIT:
+        return held_karp(graph)
+    return backtracking_search(graph, node_limit=node_limit)
+
+
+def cycle_to_plan(cycle):
+    """Convert a cycle into the plan steps that parse_plan extracts from FF output."""
+    plan = [("SELECT-START", [f"V{cycle[0]}", "N0", "N1"])]
+    for i in range(1, len(cycle)):
+        plan.append(
+            ("MOVE-TO-NEXT", [f"V{cycle[i - 1]}", f"V{cycle[i]}", f"N{i}", f"N{i + 1}"])
+        )
+    plan.append(("COMPLETE-CYCLE", [f"V{cycle[-1]}", f"V{cycle[0]}", f"N{len(cycle)}"]))
+    return plan
+
+
+def verify_cycle(graph, cycle):
+    """Check that a vertex sequence is a Hamiltonian cycle of the graph."""
+    return (
+        len(cycle) >= 3
+        and sorted(cycle) == sorted(graph.nodes())
+        and all(
+            graph.has_edge(cycle[i], cycle[(i + 1) % len(cycle)])
+            for i in range(len(cycle))
+        )
+    )
+
+
+def _number(name):
+    """Convert an object name such as V5 or N3 to its number."""
+    return int(name.upper().lstrip("VN"))
+
+
+def verify_plan(graph, plan):
+    """Replay plan steps against the domain and return (valid, reason)."""
+    if not plan or plan[0][0] != "SELECT-START":
+        return False, "the plan does not start with SELECT-START"
+    start = _number(plan[0][1][0])
+    if start not in graph or _number(plan[0][1][1]) != 0:
+        return False, f"step 0 selects an invalid start {plan[0][1]}"
+    current, visited, length = start, {start}, 1
+    for step, (action, params) in enumerate(plan[1:-1], start=1):
+        if action != "MOVE-TO-NEXT":
+            return False, f"step {step} is {action}, expected MOVE-TO-NEXT"
+        source, target = _number(params[0]), _number(params[1])
+        if source != current:
+            return (
+                False,
+                f"step {step} moves from v{source} but the path is at v{current}",
+            )
+        if not graph.has_edge(source, target):
+            return False, f"step {step} uses the missing edge v{source}-v{target}"
+        if target in visited:
+            return False, f"step {step} revisits v{target}"
+        if (_number(params[2]), _number(params[3])) != (length, length + 1):
+            return (
+                False,
+                f"step {step} has path lengths {params[2:]} instead of N{length}",
+            )
+        current = target
+        visited.add(target)
+        length += 1
+    action, params = plan[-1]
+    if action != "COMPLETE-CYCLE" or len(plan) < 2:
+        return False, "the plan does not end with COMPLETE-CYCLE"
+    if _number(params[0]) != current or _number(params[1]) != start:
+        return False, f"COMPLETE-CYCLE {params} does not close the path at v{current}"
+    if not graph.has_edge(current, start):
+        return False, f"COMPLETE-CYCLE uses the missing edge v{current}-v{start}"
+    if visited != set(graph.nodes()):
+        return (
+            False,
+            f"{graph.number_of_nodes() - len(visited)} vertices are not visited",
+        )
+    return True, "valid Hamiltonian cycle"
+
+
+def read_plan_file(plan_path):
+    """Read a .plan file written by dfs_planner.py into plan steps."""
+    plan = []
+    with open(plan_path, "r") as file:
+        for line in file:
+            tokens = line.strip().strip("()").split()
+            if tokens:
+                plan.append((tokens[0].upper(), [t.upper() for t in tokens[1:]]))
+    return plan
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Solve a Hamiltonian cycle problem directly, or verify a plan for it."
+    )
+    parser.add_argument("problem", type=str, help="Path to the problem PDDL file")
+    parser.add_argument(
+        "--plan",
+        type=str,
+        default=None,
+        help="Verify this .plan file instead of only solving the problem",
+    )
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=None,
+        help="Largest number of backtracking search nodes (default: no limit)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    graph = load_graph_from_problem(args.problem)
+    if args.plan:
+        valid, reason = verify_plan(graph, read_plan_file(args.plan))
+        print(f"Plan {args.plan}: {'VALID' if valid else 'INVALID'} ({reason})")
+        sys.exit(0 if valid else 1)
+    try:
+        cycle = solve(graph, node_limit=args.node_limit)
+    except NodeLimitReached as e:
+        print(f"Unknown: {e}")
+        sys.exit(2)
+    if cycle is None:
+        print("No Hamiltonian cycle exists.")
+    else:
+        print(f"Hamiltonian cycle: {' → '.join(f'v{v}' for v in cycle)} → v{cycle[0]}")
+        for i, (action, params) in enumerate(cycle_to_plan(cycle)):
+            print(f"{i}: {action} {' '.join(params)}")
+
+
+if __name__ == "__main__":
+    main()
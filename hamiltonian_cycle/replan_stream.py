@@ -0,0 +1,186 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from hamiltonian_cycle import (
+    apply_edge_diff,
+    create_problem_file,
+    extract_cycle_from_plan,
+    generate_random_graph,
+    random_edge_diff,
+    run_ff,
+)
+from hamiltonian_solver import NodeLimitReached, repair_cycle, solve, verify_plan
+
+
+def full_solve(args, graph):
+    """Solve a graph from scratch with the native solver or FF, and return the cycle or None."""
+    if args.solver == "native":
+        try:
+            return solve(graph, node_limit=args.node_limit)
+        except NodeLimitReached:
+            return None
+    create_problem_file(args.problem, graph, graph.number_of_nodes())
+    plan = run_ff(args.domain, args.problem, timeout=args.planner_timeout)
+    if not plan or not verify_plan(graph, plan)[0]:
+        return None
+    return extract_cycle_from_plan(plan)
+
+
+def timed(function, *arguments):
+    """Call a function and return (its result, the elapsed seconds)."""
+    start = time.perf_counter()
+    result = function(*arguments)
+    return result, time.perf_counter() - start
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Measure incremental replanning on a stream of mutated graphs."
+    )
+
+    parser.add_argument(
+        "--vertices",
+        "-v",
+        type=int,
+        default=100,
+        help="Number of vertices in the graph (default: 100)",
+    )
+
+    parser.add_argument(
+        "--edge-prob",
+        "-p",
+        type=float,
+        default=0.1,
+        help="Probability of edge creation between vertices (default: 0.1)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the graph and of the mutations (default: 0)",
+    )
+
+    parser.add_argument(
+        "--rounds",
+        "-n",
+        type=int,
+        default=50,
+        help="Number of mutated graphs (default: 50)",
+    )
+
+    parser.add_argument(
+        "--changes",
+        "-c",
+        type=int,
+        default=4,
+        help="Edges added or removed per mutation (default: 4)",
+    )
+
+    parser.add_argument(
+        "--solver",
+        type=str,
+        choices=["native", "ff"],
+        default="native",
+        help="Solver of the full runs (default: native)",
+    )
+
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=None,
+        help="Largest number of search nodes of the native solver (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--domain",
+        "-d",
+        type=str,
+        default="domain.pddl",
+        help="Path to the domain PDDL file, for FF (default: domain.pddl)",
+    )
+
+    parser.add_argument(
+        "--problem",
+        "-o",
+        type=str,
+        default="problem-stream.pddl",
+        help="Path of the problem file written for FF (default: problem-stream.pddl)",
+    )
+
+    parser.add_argument(
+        "--planner-timeout",
+        type=float,
+        default=None,
+        help="Wall-clock limit of FF in seconds (default: no limit)",
+    )
+
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(args.seed)
+    graph = generate_random_graph(args.vertices, args.edge_prob, seed=args.seed)
+    cycle = full_solve(args, graph)
+    if cycle is None:
+        print("The initial graph has no Hamiltonian cycle found by the solver")
+        return
+
+    outcomes = {"unchanged": 0, "2-opt": 0, "3-opt": 0, "failed": 0, "no cycle": 0}
+    full_times, incremental_times = [], []
+    for round_index in range(args.rounds):
+        diff = random_edge_diff(graph, args.changes, rng)
+        mutated = apply_edge_diff(graph, diff)
+        (repaired, moves), repair_time = timed(repair_cycle, mutated, cycle)
+        # The full run is timed on every round to measure the savings
+        solved, full_time = timed(full_solve, args, mutated)
+        if repaired is not None:
+            outcome = "3-opt" if "3-opt" in moves else "2-opt" if moves else "unchanged"
+            incremental_time = repair_time
+        else:
+            outcome = "failed" if solved is not None else "no cycle"
+            incremental_time = repair_time + full_time
+        outcomes[outcome] += 1
+        full_times.append(full_time)
+        incremental_times.append(incremental_time)
+        print(
+            f"Round {round_index + 1}: {len(diff)} changes, {outcome}, "
+            f"repair {repair_time * 1000:.1f} ms, full {full_time * 1000:.1f} ms"
+        )
+        # Keep the graph and cycle of the stream, skipping graphs without a cycle
+        new_cycle = repaired if repaired is not None else solved
+        if new_cycle is not None:
+            graph, cycle = mutated, new_cycle
+
+    rounds = args.rounds
+    repaired_rounds = outcomes["unchanged"] + outcomes["2-opt"] + outcomes["3-opt"]
+    print(f"\nRounds: {rounds}, {args.changes} edge changes each")
+    print(
+        f"Repaired: {repaired_rounds}/{rounds} ({outcomes['unchanged']} unchanged, "
+        f"{outcomes['2-opt']} with 2-opt only, {outcomes['3-opt']} with 3-opt)"
+    )
+    print(
+        f"Full runs needed: {outcomes['failed']} after a failed repair, "
+        f"{outcomes['no cycle']} on graphs without a cycle found"
+    )
+    print(
+        f"Median latency: incremental {statistics.median(incremental_times) * 1000:.1f} ms, "
+        f"full {statistics.median(full_times) * 1000:.1f} ms"
+    )
+    total_incremental, total_full = sum(incremental_times), sum(full_times)
+    print(
+        f"Total latency: incremental {total_incremental:.2f} s, full {total_full:.2f} s "
+        f"({(1 - total_incremental / total_full) * 100 if total_full else 0:.0f}% saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+anytime.py
+
+This module defines the AnytimeSearch class, a restarting weighted A* (RWA*)
+over the grounded Task of task.py that finds a first plan quickly and then
+improves it until a deadline.
+
+Each iteration is a weighted A* search, f = g + w * h, that stops at the first
+goal expanded. The weight decreases from one iteration to the next (5, 3, 2,
+1.5, 1 by default) and the last weight is repeated while plans keep improving.
+Every iteration prunes the states that cannot lead to a plan shorter than the
+best one found so far: those with g + 1 >= best length, or g + h >= best length
+when the heuristic is admissible. A restart discards the open list but keeps
+the heuristic values already computed. When an iteration exhausts its open list,
+no shorter plan exists and the search stops early.
+
+The deadline is checked between iterations and every CHECK_INTERVAL expansions;
+when it passes, the search raises LimitExceeded with TIME_LIMIT, as a
+ResourceLimits time limit does, so SearchEngine.plan returns the best plan
+found with a time-limit status rather than as a solved (or, without a plan,
+unsolvable) task.
+
+Each improved plan is reported to a callback as soon as it is found, so that a
+caller (dfs_planner.py) can write it out before the deadline interrupts the
+search.
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+from heuristics import GoalCountHeuristic
+from limits import TIME_LIMIT, LimitExceeded
+from search import SearchEngine, extract_plan
+
+
+class AnytimeSearch(SearchEngine):
+    """
+    Restarting weighted A* with decreasing weights and a wall-clock deadline.
+
+    Attributes:
+        weights (tuple): The weights of the successive iterations; the last one is
+            repeated while plans improve.
+        deadline (float): The time.monotonic() value at which the search stops, or
+            None for no deadline.
+        on_plan (callable): Called with each improved plan, as (action name, binding)
+            pairs, or None.
+        best (list): The operators of the best plan found so far, or None.
+        optimal (bool): True if the search proved that no shorter plan exists.
+    """
+
+    CHECK_INTERVAL = 256
+
+    def __init__(
+        self,
+        task,
+        heuristic=None,
+        weights=(5, 3, 2, 1.5, 1),
+        deadline=None,
+        on_plan=None,
+        pruning=None,
+        limits=None,
+        logger=None,
+    ):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task.
+            heuristic (object, optional): A heuristic from heuristics.py. Defaults to
+                the goal count.
+            weights (tuple, optional): The weights of the successive iterations. Defaults to (5, 3, 2, 1.5, 1).
+            deadline (float, optional): A time.monotonic() value at which the search
+                stops with a time limit, keeping its best plan. Defaults to None (no deadline).
+            on_plan (callable, optional): Called with each improved plan. Defaults to None.
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        if not weights:
+            raise ValueError("weights must not be empty")
+        super().__init__(
+            task,
+            heuristic=heuristic or GoalCountHeuristic(task),
+            pruning=pruning,
+            limits=limits,
+            logger=logger,
+        )
+        self.weights = tuple(weights)
+        self.deadline = deadline
+        self.on_plan = on_plan
+        self.best = None
+        self.optimal = False
+        self.statistics["iterations"] = 0
+        self.statistics["improvements"] = 0
+        self._h = {}
+
+    def search(self):
+        """
+        Run weighted A* iterations until the deadline, or until no shorter plan exists.
+
+        Returns:
+            list: The operators of the best plan found, or None if none was found.
+
+        Raises:
+            LimitExceeded: If the deadline passes; the best plan stays available
+                through incumbent.
+        """
+        function_name = "search"
+        schedule = itertools.chain(
+            self.weights[:-1], itertools.repeat(self.weights[-1])
+        )
+        for weight in schedule:
+            self._check_deadline()
+            self.statistics["iterations"] += 1
+            plan = self._weighted_astar(weight)
+            if plan is not None:
+                self._improve(plan, weight)
+            else:
+                self.optimal = self.best is not None
+                self.logger.info(
+                    f"{self.__class__.__name__}.{function_name}: "
+                    + (
+                        "No shorter plan exists"
+                        if self.best is not None
+                        else "Search space exhausted, no plan exists"
+                    )
+                )
+                break
+            if self.best is not None and len(self.best) == 0:
+                self.optimal = True
+                break
+        return self.best
+
+    def incumbent(self):
+        """
+        Get the best plan found so far, so that it survives a resource limit.
+
+        Returns:
+            list: The operators of the plan, or None.
+        """
+        return self.best
+
+    def _weighted_astar(self, weight):
+        """
+        Run weighted A* until a plan shorter than the best one is found.
+
+        Args:
+            weight (float): The weight of the heuristic.
+
+        Returns:
+            list: The operators of a shorter plan, or None if the open list was exhausted.
+
+        Raises:
+            LimitExceeded: If the deadline passes.
+        """
+        task = self.task
+        admissible = getattr(self.heuristic, "admissible", False)
+        bound = len(self.best) if self.best is not None else math.inf
+        counter = itertools.count()
+        initial = task.initial_state
+        h = self._heuristic(initial)
+        if h == math.inf:
+            return None
+        parents = {initial: None}
+        distances = {initial: 0}
+        open_list = [(weight * h, h, next(counter), 0, initial)]
+        while open_list:
+            if next(counter) % self.CHECK_INTERVAL == 0:
+                self._check_deadline()
+            _, _, _, g, state = heapq.heappop(open_list)
+            if g > distances[state]:
+                continue
+            if task.is_goal(state):
+                return extract_plan(parents, state)
+            self.statistics["expansions"] += 1
+            for op, child in self.successors(state):
+                child_g = g + 1
+                if child_g >= bound:
+                    continue
+                previous = distances.get(child)
+                if previous is not None and previous <= child_g:
+                    self.statistics["duplicates"] += 1
+                    continue
+                h = self._heuristic(child, state, op)
+                if h == math.inf or (admissible and child_g + h >= bound):
+                    continue
+                distances[child] = child_g
+                parents[child] = (state, op)
+                heapq.heappush(
+                    open_list,
+                    (child_g + weight * h, h, next(counter), child_g, child),
+                )
+        return None
+
+    def _heuristic(self, state, parent=None, operator=None):
+        """
+        Evaluate a state, reusing the values computed by earlier iterations.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): The state the operator was applied to. Defaults to None.
+            operator (Operator, optional): The operator that produced the state. Defaults to None.
+
+        Returns:
+            float: The heuristic value, or math.inf for a dead end.
+        """
+        h = self._h.get(state)
+        if h is None:
+            h = self._h[state] = self.evaluate(state, parent, operator)
+        return h
+
+    def _improve(self, plan, weight):
+        """
+        Record a shorter plan and report it.
+
+        Args:
+            plan (list): The operators of the plan.
+            weight (float): The weight of the iteration that found it.
+        """
+        function_name = "_improve"
+        self.best = plan
+        self.statistics["improvements"] += 1
+        self.statistics["plan_length"] = len(plan)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Plan of length {len(plan)} found with weight {weight}"
+        )
+        if self.on_plan is not None:
+            self.on_plan([(op.name, op.binding) for op in plan])
+
+    def _check_deadline(self):
+        """
+        Stop the search if the deadline has passed.
+
+        Raises:
+            LimitExceeded: With TIME_LIMIT, if there is a deadline and it has passed.
+        """
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise LimitExceeded(TIME_LIMIT, "deadline of the anytime search reached")
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including whether the last plan is proved shortest.
+        """
+        self.statistics["optimal"] = self.optimal
+        super()._log_statistics()
@@ -0,0 +1,257 @@
+"""
+beam.py
+
+This module defines the BeamSearch class, a breadth-first beam search over the
+grounded Task of task.py.
+
+Each layer holds at most width states. All successors of a layer are generated,
+duplicates are removed (within the new layer and against every state kept in
+earlier layers), and only the width best of them by heuristic value are kept.
+Memory is therefore bounded by width times the plan length, independently of
+the size of the state space, which makes the search usable on instances far too
+large for complete search (e.g. Hamiltonian cycles on hundreds of vertices,
+together with a lazily grounded Task). The search is incomplete: it fails when
+every state of a layer is a dead end.
+
+With a Checkpoint, the layer, the layer records, and the fingerprints of the
+kept states are saved between layers, and a later run resumes from them.
+
+Optionally, ties are broken by mobility, the number of operators applicable in
+the successor, fewest first. This generalizes Warnsdorff's rule (see
+ordering.py): states with few options left are committed to early, and states
+with none are dropped as dead ends.
+"""
+
+import heapq
+import math
+
+from checkpoint import fingerprint
+from heuristics import GoalCountHeuristic
+from search import SearchEngine
+
+
+class BeamSearch(SearchEngine):
+    """
+    Beam search with per-layer duplicate detection.
+
+    Attributes:
+        width (int): The largest number of states kept per layer.
+        mobility (bool): Whether ties are broken by the number of applicable operators.
+        max_depth (int): The largest number of layers, or None for no limit.
+        depth (int): The number of layers generated.
+        checkpoint (Checkpoint): Periodic snapshots of the search, or None.
+    """
+
+    complete = False
+
+    def __init__(
+        self,
+        task,
+        heuristic=None,
+        width=100,
+        mobility=False,
+        max_depth=None,
+        pruning=None,
+        limits=None,
+        checkpoint=None,
+        logger=None,
+    ):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task.
+            heuristic (object, optional): A heuristic from heuristics.py. Defaults to
+                the goal count.
+            width (int, optional): The largest number of states kept per layer. Defaults to 100.
+            mobility (bool, optional): Break ties by the number of applicable operators. Defaults to False.
+            max_depth (int, optional): The largest number of layers. Defaults to None (no limit).
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            checkpoint (Checkpoint, optional): Periodic snapshots of the search. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        if width <= 0:
+            raise ValueError(f"width must be positive, got {width}")
+        super().__init__(
+            task,
+            heuristic=heuristic or GoalCountHeuristic(task),
+            pruning=pruning,
+            limits=limits,
+            logger=logger,
+        )
+        self.width = width
+        self.mobility = mobility
+        self.max_depth = max_depth
+        self.depth = 0
+        self.checkpoint = checkpoint
+        self.statistics["dead_ends"] = 0
+        self.statistics["discarded"] = 0
+        self.statistics["max_layer"] = 0
+
+    def search(self):
+        """
+        Run the beam search.
+
+        Returns:
+            list: The operators of a plan, or None if every state of a layer is a dead
+                end or max_depth is reached.
+        """
+        function_name = "search"
+        task = self.task
+        initial = task.initial_state
+        if task.is_goal(initial):
+            return []
+        beam = [initial]
+        kept = {initial}
+        # For each layer after the first, the (parent index, action name, arguments)
+        # of its states
+        layers = []
+        # Fingerprints of the states kept before the checkpoint resumed from
+        restored = set()
+        if self.checkpoint is not None:
+            resumed = self.checkpoint.restore(self._identity())
+            if resumed is not None:
+                (self.depth, beam, layers), statistics, restored = resumed
+                self.statistics.update(statistics)
+                beam = [task.import_state(facts) for facts in beam]
+                kept.update(beam)
+            self.checkpoint.add_closed(self._fingerprint(initial))
+        while beam and (self.max_depth is None or self.depth < self.max_depth):
+            candidates = {}
+            for index, state in enumerate(beam):
+                self.statistics["expansions"] += 1
+                for op, child in self.successors(state):
+                    if (
+                        child in kept
+                        or child in candidates
+                        or (restored and self._fingerprint(child) in restored)
+                    ):
+                        self.statistics["duplicates"] += 1
+                        continue
+                    if task.is_goal(child):
+                        return self._extract(layers, index, op)
+                    key = self._rank(child, state, op)
+                    if key is None:
+                        self.statistics["dead_ends"] += 1
+                        continue
+                    candidates[child] = (key, len(candidates), index, op)
+            self.statistics["max_layer"] = max(
+                self.statistics["max_layer"], len(candidates)
+            )
+            selected = heapq.nsmallest(
+                self.width, candidates.items(), key=lambda item: item[1]
+            )
+            self.statistics["discarded"] += len(candidates) - len(selected)
+            beam = [child for child, _ in selected]
+            kept.update(beam)
+            layers.append(
+                [(index, op.name, op.args) for _, (_, _, index, op) in selected]
+            )
+            self.depth += 1
+            if self.checkpoint is not None:
+                for state in beam:
+                    self.checkpoint.add_closed(self._fingerprint(state))
+                if self.checkpoint.due():
+                    self.checkpoint.save(
+                        self._identity(),
+                        (self.depth, [task.export_state(s) for s in beam], layers),
+                        self.statistics,
+                    )
+            if selected:
+                self.logger.debug(
+                    f"{self.__class__.__name__}.{function_name}: Layer {self.depth}: {len(candidates)} candidates, best {selected[0][1][0]}"
+                )
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Beam emptied at layer {self.depth}"
+        )
+        return None
+
+    def _rank(self, state, parent, operator):
+        """
+        Compute the ranking key of a successor.
+
+        Args:
+            state (int): The state bitset.
+            parent (int): The state the operator was applied to.
+            operator (Operator): The operator that produced the state.
+
+        Returns:
+            tuple: (heuristic value,) or (heuristic value, mobility), or None if the
+                state is a dead end.
+        """
+        h = self.evaluate(state, parent, operator)
+        if h == math.inf:
+            return None
+        if not self.mobility:
+            return (h,)
+        mobility = len(self.task.applicable(state))
+        if mobility == 0:
+            return None
+        return (h, mobility)
+
+    def _extract(self, layers, index, operator):
+        """
+        Follow the layer records back to the initial state, then replay the steps
+        to recover their operators.
+
+        Args:
+            layers (list): For each layer after the first, the (parent index, action
+                name, arguments) of its states.
+            index (int): The index of the expanded state in the last layer.
+            operator (Operator): The operator that reached the goal from it.
+
+        Returns:
+            list: The operators of the plan.
+        """
+        steps = []
+        for layer in reversed(layers):
+            index, name, args = layer[index]
+            steps.append((name, args))
+        steps.reverse()
+        plan = []
+        state = self.task.initial_state
+        for name, args in steps:
+            op = next(
+                op
+                for op in self.task.applicable(state)
+                if op.name == name and op.args == args
+            )
+            plan.append(op)
+            state = op.apply(state)
+        plan.append(operator)
+        return plan
+
+    def _identity(self):
+        """
+        Identify the search saved in checkpoints.
+
+        Returns:
+            tuple: The class, domain, and problem names, and the beam width.
+        """
+        return (
+            self.__class__.__name__,
+            str(self.task.domain.name),
+            str(self.task.problem.name),
+            self.width,
+        )
+
+    def _fingerprint(self, state):
+        """
+        Compute the process-independent fingerprint of a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            int: The 64-bit fingerprint.
+        """
+        facts = self.task.export_state(state)
+        return fingerprint("\n".join(" ".join(fact) for fact in facts).encode())
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the number of layers.
+        """
+        self.statistics["depth"] = self.depth
+        super()._log_statistics()
@@ -0,0 +1,516 @@
+"""
+cdcl.py
+
+This module defines the CDCLSolver class, a self-contained conflict-driven
+clause learning SAT solver used by the planning-as-satisfiability backend
+(satplan.py), so that no external solver has to be installed.
+
+The solver follows the design of MiniSat:
+
+- Two watched literals per clause for unit propagation.
+- First unique implication point (1UIP) conflict analysis, with learned clauses
+  minimized by removing the literals implied by the others.
+- VSIDS variable activities with phase saving for decisions.
+- Restarts following the Luby sequence.
+- Periodic deletion of half of the learned clauses, those with the highest
+  literal block distance (LBD), keeping those of LBD 2 or less.
+
+The solver is incremental: clauses can be added between calls to solve, and
+solve accepts assumptions, literals that are decided first and only hold for
+that call. Learned clauses are implied by the clauses added so far, so they are
+kept from one call to the next; a caller that wants to retract a group of
+clauses guards them with a fresh activation literal, assumes it, and later adds
+its negation as a unit clause.
+
+Literals are nonzero integers as in DIMACS: v for variable v true and -v for v
+false. Internally a literal l is stored as 2 * v for v and 2 * v + 1 for -v, so
+that its negation is l ^ 1 and arrays can be indexed by literal.
+"""
+
+import heapq
+import logging
+
+SAT = True
+UNSAT = False
+
+
+def luby(index):
+    """
+    Compute an element of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+
+    Args:
+        index (int): The zero-based position in the sequence.
+
+    Returns:
+        int: The element.
+    """
+    size, exponent = 1, 0
+    while size < index + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        exponent -= 1
+        index %= size
+    return 1 << exponent
+
+
+class CDCLSolver:
+    """
+    An incremental CDCL SAT solver.
+
+    Attributes:
+        num_vars (int): The number of variables.
+        statistics (dict): The numbers of decisions, propagations, conflicts,
+            restarts, learned and deleted clauses.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    RESTART_BASE = 100
+    VAR_DECAY = 0.95
+    REDUCE_BASE = 2000
+
+    def __init__(self, logger=None):
+        """
+        Initialize an empty solver.
+
+        Args:
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.num_vars = 0
+        self.statistics = {
+            "decisions": 0,
+            "propagations": 0,
+            "conflicts": 0,
+            "restarts": 0,
+            "learned": 0,
+            "deleted": 0,
+        }
+        self.logger = logger or logging.getLogger(__name__)
+        self._clauses = []
+        self._learned = []
+        self._lbd = {}
+        self._watches = [[], []]
+        # Per literal: 1 true, -1 false, 0 unassigned
+        self._values = [0, 0]
+        self._levels = [0]
+        self._reasons = [None]
+        self._phases = [False]
+        self._activity = [0.0]
+        self._heap = []
+        # Per variable: 1 if the heap holds an entry with its current activity
+        self._queued = bytearray(1)
+        self._increment = 1.0
+        self._trail = []
+        self._limits = []
+        self._head = 0
+        self._ok = True
+        self._max_learned = self.REDUCE_BASE
+        self._model = None
+
+    def new_var(self):
+        """
+        Create a variable.
+
+        Returns:
+            int: The variable, a positive integer.
+        """
+        self.num_vars += 1
+        self._watches += [[], []]
+        self._values += [0, 0]
+        self._levels.append(0)
+        self._reasons.append(None)
+        self._phases.append(False)
+        self._activity.append(0.0)
+        self._queued.append(1)
+        heapq.heappush(self._heap, (0.0, self.num_vars))
+        return self.num_vars
+
+    def add_clause(self, literals):
+        """
+        Add a clause; the solver must not be in the middle of a search.
+
+        Args:
+            literals (iterable): The DIMACS literals of the clause.
+
+        Returns:
+            bool: False if the clauses are now known to be unsatisfiable.
+        """
+        if not self._ok:
+            return False
+        clause = []
+        for literal in set(literals):
+            lit = 2 * literal if literal > 0 else -2 * literal + 1
+            value = self._values[lit]
+            if value == 1 or lit ^ 1 in clause:
+                return True
+            if value == 0:
+                clause.append(lit)
+        if not clause:
+            self._ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self._ok = self._propagate() is None
+        else:
+            index = len(self._clauses)
+            self._clauses.append(clause)
+            self._watches[clause[0]].append(index)
+            self._watches[clause[1]].append(index)
+        return self._ok
+
+    def solve(self, assumptions=(), check=None):
+        """
+        Decide whether the clauses are satisfiable under assumptions.
+
+        Args:
+            assumptions (iterable, optional): DIMACS literals assumed true for this call. Defaults to ().
+            check (callable, optional): Called with the number of conflicts after each
+                conflict; it may raise to interrupt the search. Defaults to None.
+
+        Returns:
+            bool: SAT or UNSAT.
+        """
+        self._model = None
+        if not self._ok:
+            return UNSAT
+        assumed = [2 * a if a > 0 else -2 * a + 1 for a in assumptions]
+        restart = 0
+        try:
+            while True:
+                budget = luby(restart) * self.RESTART_BASE
+                status = self._search(assumed, budget, check)
+                if status is not None:
+                    return status
+                restart += 1
+                self.statistics["restarts"] += 1
+        finally:
+            self._backtrack(0)
+
+    def value(self, variable):
+        """
+        Get the value of a variable in the last model found.
+
+        Args:
+            variable (int): The variable.
+
+        Returns:
+            bool: Its value, or None if the last call was not satisfiable.
+        """
+        if self._model is None:
+            return None
+        return self._model[variable]
+
+    def _search(self, assumed, budget, check):
+        """
+        Search until a model, a refutation, or budget conflicts.
+
+        Args:
+            assumed (list): The internal assumption literals.
+            budget (int): The number of conflicts before a restart.
+            check (callable): The interruption callback, or None.
+
+        Returns:
+            bool: SAT or UNSAT, or None for a restart.
+        """
+        values = self._values
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.statistics["conflicts"] += 1
+                conflicts += 1
+                if check is not None:
+                    check(self.statistics["conflicts"])
+                if not self._limits:
+                    self._ok = False
+                    return UNSAT
+                learned, level, lbd = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    index = len(self._clauses)
+                    self._clauses.append(learned)
+                    self._learned.append(index)
+                    self._lbd[index] = lbd
+                    self._watches[learned[0]].append(index)
+                    self._watches[learned[1]].append(index)
+                    self._assign(learned[0], index)
+                    self.statistics["learned"] += 1
+                self._increment /= self.VAR_DECAY
+                continue
+            if conflicts >= budget:
+                self._backtrack(0)
+                return None
+            if len(self._learned) >= self._max_learned:
+                self._reduce()
+            literal = None
+            while len(self._limits) < len(assumed):
+                # Decide the next assumption, each on its own level
+                candidate = assumed[len(self._limits)]
+                if values[candidate] == -1:
+                    return UNSAT
+                self._limits.append(len(self._trail))
+                if values[candidate] == 0:
+                    literal = candidate
+                    break
+            if literal is None:
+                literal = self._decide()
+                if literal is None:
+                    self._model = [False] + [
+                        values[2 * v] == 1 for v in range(1, self.num_vars + 1)
+                    ]
+                    return SAT
+                self._limits.append(len(self._trail))
+            self.statistics["decisions"] += 1
+            self._assign(literal, None)
+
+    def _assign(self, lit, reason):
+        """
+        Make a literal true at the current decision level.
+
+        Args:
+            lit (int): The internal literal.
+            reason (int): The index of the clause that implied it, or None.
+        """
+        variable = lit >> 1
+        self._values[lit] = 1
+        self._values[lit ^ 1] = -1
+        self._levels[variable] = len(self._limits)
+        self._reasons[variable] = reason
+        self._trail.append(lit)
+
+    def _propagate(self):
+        """
+        Propagate the assignments of the trail with the watched literals.
+
+        Returns:
+            int: The index of a conflicting clause, or None.
+        """
+        values = self._values
+        clauses = self._clauses
+        watches = self._watches
+        trail = self._trail
+        while self._head < len(trail):
+            false_lit = trail[self._head] ^ 1
+            self._head += 1
+            self.statistics["propagations"] += 1
+            watching = watches[false_lit]
+            kept = []
+            conflict = None
+            position = 0
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause is None:
+                    continue
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first] == 1:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if values[first] == -1:
+                        conflict = index
+                        break
+                    self._assign(first, index)
+            if conflict is not None:
+                kept.extend(watching[position + 1 :])
+                watches[false_lit] = kept
+                self._head = len(trail)
+                return conflict
+            watches[false_lit] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Derive the 1UIP clause of a conflict.
+
+        Args:
+            conflict (int): The index of the conflicting clause.
+
+        Returns:
+            tuple: (learned clause with the asserting literal first and a literal of the
+                backjump level second, backjump level, literal block distance).
+        """
+        levels = self._levels
+        reasons = self._reasons
+        trail = self._trail
+        level = len(self._limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        lit = None
+        position = len(trail) - 1
+        clause = self._clauses[conflict]
+        while True:
+            for other in clause if lit is None else clause[1:]:
+                variable = other >> 1
+                if variable in seen or levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self._bump(variable)
+                if levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+            while trail[position] >> 1 not in seen:
+                position -= 1
+            lit = trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self._clauses[reasons[lit >> 1]]
+            if clause[0] != lit:
+                # Keep the implied literal first, as the loop skips it
+                k = clause.index(lit)
+                clause[0], clause[k] = clause[k], clause[0]
+        learned[0] = lit ^ 1
+        learned = [learned[0]] + [
+            other for other in learned[1:] if not self._redundant(other, seen)
+        ]
+        if len(learned) == 1:
+            return learned, 0, 1
+        best = max(range(1, len(learned)), key=lambda k: levels[learned[k] >> 1])
+        learned[1], learned[best] = learned[best], learned[1]
+        lbd = len({levels[other >> 1] for other in learned})
+        return learned, levels[learned[1] >> 1], lbd
+
+    def _redundant(self, lit, seen):
+        """
+        Check whether a literal of a learned clause is implied by the others.
+
+        Args:
+            lit (int): The internal literal, false in the current assignment.
+            seen (set): The variables of the learned clause.
+
+        Returns:
+            bool: True if every other literal of its reason is in the clause or at level 0.
+        """
+        reason = self._reasons[lit >> 1]
+        if reason is None:
+            return False
+        return all(
+            other >> 1 in seen or self._levels[other >> 1] == 0
+            for other in self._clauses[reason]
+            if other != lit ^ 1
+        )
+
+    def _backtrack(self, level):
+        """
+        Undo the assignments above a decision level.
+
+        Args:
+            level (int): The level to return to.
+        """
+        if len(self._limits) <= level:
+            return
+        values = self._values
+        phases = self._phases
+        queued = self._queued
+        activity = self._activity
+        heap = self._heap
+        start = self._limits[level]
+        for lit in self._trail[start:]:
+            variable = lit >> 1
+            values[lit] = 0
+            values[lit ^ 1] = 0
+            phases[variable] = not lit & 1
+            if not queued[variable]:
+                queued[variable] = 1
+                heapq.heappush(heap, (-activity[variable], variable))
+        del self._trail[start:]
+        del self._limits[level:]
+        self._head = len(self._trail)
+
+    def _decide(self):
+        """
+        Pick the unassigned variable with the highest activity.
+
+        Returns:
+            int: The internal literal to decide, with the saved phase, or None if every
+                variable is assigned.
+        """
+        heap = self._heap
+        values = self._values
+        while heap:
+            activity, variable = heapq.heappop(heap)
+            if -activity != self._activity[variable]:
+                # A later entry holds the current activity
+                continue
+            self._queued[variable] = 0
+            if values[2 * variable] == 0:
+                return 2 * variable + (0 if self._phases[variable] else 1)
+        return None
+
+    def _bump(self, variable):
+        """
+        Increase the activity of a variable involved in a conflict.
+
+        Args:
+            variable (int): The variable.
+        """
+        self._activity[variable] += self._increment
+        if self._activity[variable] > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._increment *= 1e-100
+            self._queued = bytearray(
+                int(self._values[2 * v] == 0) for v in range(self.num_vars + 1)
+            )
+            self._queued[0] = 0
+            self._heap = [
+                (-self._activity[v], v)
+                for v in range(1, self.num_vars + 1)
+                if self._queued[v]
+            ]
+            heapq.heapify(self._heap)
+        elif self._values[2 * variable] == 0:
+            self._queued[variable] = 1
+            heapq.heappush(self._heap, (-self._activity[variable], variable))
+        else:
+            # The entries are stale; let the backtrack queue it again
+            self._queued[variable] = 0
+
+    def _locked(self, index):
+        """
+        Check whether a clause is the reason of a current assignment.
+
+        Args:
+            index (int): The index of the clause.
+
+        Returns:
+            bool: True if the clause implied its first literal, which is still true.
+        """
+        lit = self._clauses[index][0]
+        return self._values[lit] == 1 and self._reasons[lit >> 1] == index
+
+    def _reduce(self):
+        """
+        Delete the half of the learned clauses with the highest LBD, except those
+        of LBD 2 or less and the reasons of current assignments.
+        """
+        function_name = "_reduce"
+        self._learned.sort(key=lambda index: self._lbd[index])
+        keep = len(self._learned) // 2
+        removed = [
+            index
+            for index in self._learned[keep:]
+            if self._lbd[index] > 2 and not self._locked(index)
+        ]
+        for index in removed:
+            self._clauses[index] = None
+            del self._lbd[index]
+        removed = set(removed)
+        self._learned = [index for index in self._learned if index not in removed]
+        self._max_learned += self.REDUCE_BASE // 2
+        self.statistics["deleted"] += len(removed)
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Deleted {len(removed)} learned clauses, kept {len(self._learned)}"
+        )
@@ -0,0 +1,204 @@
+"""
+checkpoint.py
+
+This module defines the Checkpoint class, which periodically saves the progress
+of a long search to disk so that a later run can resume it, and the fingerprint
+function used to store closed states compactly.
+
+A checkpoint is two files. The closed list is kept as 64-bit fingerprints of
+the closed states in an append-only file, <path>.closed: each save appends only
+the fingerprints added since the previous save, so its cost does not grow with
+the size of the search. The rest (the frontier, the statistics, and the number
+of valid fingerprints) is small; it is pickled to a temporary file that is then
+renamed over <path>, so a crash during a save leaves the previous checkpoint
+usable, and fingerprints appended after the last complete save are ignored.
+
+Fingerprints are the first 8 bytes of a BLAKE2b digest, which, unlike Python's
+hash of strings, is the same in every process. Two distinct states sharing a
+fingerprint would make a resumed search skip one of them; with 64 bits this is
+negligible for the number of states a search can close.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import time
+from array import array
+
+MAGIC = b"CKP1"
+
+
+def fingerprint(data):
+    """
+    Compute the 64-bit fingerprint of a state encoding.
+
+    Args:
+        data (bytes): A canonical encoding of the state.
+
+    Returns:
+        int: The fingerprint.
+    """
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class Checkpoint:
+    """
+    Periodic on-disk snapshots of a search.
+
+    Attributes:
+        path (str): The path of the checkpoint file; the fingerprints of the closed
+            states are stored next to it, in path + ".closed".
+        interval (float): The minimum number of seconds between two saves.
+        resume (bool): Whether the search resumes from the existing checkpoint.
+        saves (int): The number of saves so far.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, path, interval=60.0, resume=False, logger=None):
+        """
+        Initialize the checkpoint.
+
+        Args:
+            path (str): The path of the checkpoint file.
+            interval (float, optional): The minimum number of seconds between two saves. Defaults to 60.
+            resume (bool, optional): Resume from the existing checkpoint instead of
+                starting a new one. Defaults to False.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.path = path
+        self.interval = interval
+        self.resume = resume
+        self.saves = 0
+        self.logger = logger or logging.getLogger(__name__)
+        self._closed_path = path + ".closed"
+        self._pending = array("Q")
+        self._closed_count = 0
+        self._last_save = time.monotonic()
+
+    def restore(self, identity):
+        """
+        Load the checkpoint when resuming, or discard an existing one otherwise.
+
+        Args:
+            identity (tuple): Identifies the engine and problem; it must equal the one
+                the checkpoint was saved with.
+
+        Returns:
+            tuple: (frontier, statistics, set of closed fingerprints), or None when not
+                resuming.
+
+        Raises:
+            FileNotFoundError: If resuming and there is no checkpoint.
+            ValueError: If the file is not a checkpoint or belongs to another search,
+                or, when not resuming, if a file that is not part of a checkpoint
+                would be overwritten.
+        """
+        function_name = "restore"
+        self._last_save = time.monotonic()
+        if not self.resume:
+            self._discard()
+            return None
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a checkpoint")
+            payload = pickle.load(f)
+        if payload["identity"] != identity:
+            raise ValueError(
+                f"{self.path} was saved by {payload['identity']}, not {identity}"
+            )
+        self._closed_count = payload["closed"]
+        closed = array("Q")
+        if self._closed_count:
+            with open(self._closed_path, "rb") as f:
+                closed.fromfile(f, self._closed_count)
+        # Drop the fingerprints appended after the last complete save
+        with open(self._closed_path, "ab") as f:
+            f.truncate(self._closed_count * closed.itemsize)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Resuming from {self.path} with {self._closed_count} closed states"
+        )
+        return payload["frontier"], payload["statistics"], set(closed)
+
+    def _discard(self):
+        """
+        Remove an existing checkpoint and its closed fingerprints, refusing to remove
+        any other file.
+
+        Raises:
+            ValueError: If the checkpoint path holds a file that is not a checkpoint, or
+                the closed fingerprints exist without their checkpoint.
+        """
+        function_name = "_discard"
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(
+                        f"{self.path} exists and is not a checkpoint; remove it or choose another --checkpoint path"
+                    )
+        elif os.path.exists(self._closed_path):
+            raise ValueError(
+                f"{self._closed_path} exists without the checkpoint {self.path}; remove it or choose another --checkpoint path"
+            )
+        else:
+            return
+        for path in (self.path, self._closed_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Discarded the checkpoint {self.path}"
+        )
+
+    def add_closed(self, value):
+        """
+        Record the fingerprint of a closed state, to be written by the next save.
+
+        Args:
+            value (int): The fingerprint.
+        """
+        self._pending.append(value)
+
+    def due(self):
+        """
+        Check whether the interval since the last save has elapsed.
+
+        Returns:
+            bool: True if the search should save a checkpoint now.
+        """
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, identity, frontier, statistics):
+        """
+        Append the new closed fingerprints and replace the checkpoint file.
+
+        Args:
+            identity (tuple): Identifies the engine and problem.
+            frontier (object): The picklable engine-specific frontier.
+            statistics (dict): The search statistics.
+        """
+        function_name = "save"
+        start = time.monotonic()
+        with open(self._closed_path, "ab") as f:
+            self._pending.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._closed_count += len(self._pending)
+        self._pending = array("Q")
+        payload = {
+            "identity": identity,
+            "frontier": frontier,
+            "statistics": dict(statistics),
+            "closed": self._closed_count,
+        }
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        self.saves += 1
+        self._last_save = time.monotonic()
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Saved {self._closed_count} closed states in {self._last_save - start:.3f} s"
+        )
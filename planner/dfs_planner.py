@@ -1,9 +1,26 @@
 import argparse as ap
+import json
 import logging
+import time
 
 from pddl import parse_domain, parse_problem
 
+from anytime import AnytimeSearch
+from beam import BeamSearch
+from checkpoint import Checkpoint
+from heuristics import HEURISTICS
+from iterative_deepening import IterativeDeepeningSearch, TranspositionTable
+from limits import SOLVED, ResourceLimits, SearchResult
+from ordering import ORDERINGS
+from pattern_database import PatternDatabaseHeuristic
+from plan_cache import PlanCache
 from planner import Planner
+from regression import BidirectionalSearch, RegressionSearch
+from satplan import SatPlanner
+from stubborn import StubbornSetPruning
+from symmetry import SymmetryGroup
+from task import Task
+from width import BestFirstWidthSearch, IteratedWidthSearch
 
 # Set up logging
 logging.basicConfig(
@@ -14,6 +31,167 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Options left out of the plan cache key: they do not change the plan found, or,
+# for the resource limits, plans found by searches stopped at a limit are not cached
+NON_PLAN_OPTIONS = {
+    "domain",
+    "problem",
+    "pdb_cache",
+    "time_limit",
+    "max_expansions",
+    "memory_limit",
+    "memory_tracking",
+    "result_json",
+    "checkpoint",
+    "checkpoint_interval",
+    "resume",
+    "plan_cache",
+    "no_plan_cache",
+    "verbose",
+}
+
+
+def write_plan(plan, plan_file):
+    """
+    Write a plan to a .plan file, one action per line.
+
+    Args:
+        plan (list): A sequence of (action name, binding) pairs.
+        plan_file (str): The path of the file to write.
+    """
+    with open(plan_file, "w") as f:
+        for step in plan:
+            f.write(f"( {step[0]} {' '.join(step[1].values())} )\n")
+
+
+def build_planner(args, domain, problem, plan_file):
+    """
+    Build the search engine selected by the command-line arguments.
+
+    Args:
+        args (Namespace): The command-line arguments.
+        domain (Domain): The PDDL domain.
+        problem (Problem): The PDDL problem.
+        plan_file (str): The path of the .plan file, rewritten by anytime search at
+            each improvement.
+
+    Returns:
+        object: The planner, whose plan method runs the search.
+    """
+    checkpoint = None
+    if args.checkpoint is not None:
+        checkpoint = Checkpoint(
+            args.checkpoint, interval=args.checkpoint_interval, resume=args.resume
+        )
+    limits = None
+    if (
+        args.time_limit is not None
+        or args.max_expansions is not None
+        or args.memory_limit is not None
+    ):
+        limits = ResourceLimits(
+            time_limit=args.time_limit,
+            max_expansions=args.max_expansions,
+            memory_limit=args.memory_limit,
+            memory_tracking=args.memory_tracking,
+        )
+
+    if args.search == "dfs":
+        planner = Planner(
+            domain,
+            problem,
+            nogood_cache_size=args.nogood_cache,
+            ordering=ORDERINGS[args.ordering](),
+            symmetries=SymmetryGroup(domain, problem) if args.symmetry else None,
+            pruning=(
+                StubbornSetPruning(Task(domain, problem))
+                if args.stubborn_sets
+                else None
+            ),
+            limits=limits,
+            checkpoint=checkpoint,
+        )
+    else:
+        task = Task(domain, problem, lazy=args.lazy_grounding)
+        if args.heuristic == "pdb":
+            heuristic = PatternDatabaseHeuristic(
+                task, max_size=args.pdb_max_size, cache_dir=args.pdb_cache
+            )
+        elif args.heuristic:
+            heuristic = HEURISTICS[args.heuristic](task)
+        else:
+            heuristic = None
+        pruning = StubbornSetPruning(task) if args.stubborn_sets else None
+        if args.search == "ida":
+            planner = IterativeDeepeningSearch(
+                task,
+                heuristic=heuristic,
+                pruning=pruning,
+                transposition_size=args.transposition_size,
+                replacement=args.replacement,
+                limits=limits,
+            )
+        elif args.search == "iw":
+            planner = IteratedWidthSearch(
+                task, max_width=args.width, pruning=pruning, limits=limits
+            )
+        elif args.search == "beam":
+            planner = BeamSearch(
+                task,
+                heuristic=heuristic,
+                width=args.beam_width,
+                mobility=args.beam_mobility,
+                pruning=pruning,
+                limits=limits,
+                checkpoint=checkpoint,
+            )
+        elif args.search == "regression":
+            planner = RegressionSearch(task, limits=limits)
+        elif args.search == "bidir":
+            planner = BidirectionalSearch(task, pruning=pruning, limits=limits)
+        elif args.search == "sat":
+            planner = SatPlanner(task, max_horizon=args.max_horizon, limits=limits)
+        elif args.search == "anytime":
+            planner = AnytimeSearch(
+                task,
+                heuristic=heuristic,
+                weights=args.weights,
+                deadline=(
+                    time.monotonic() + args.time_limit
+                    if args.time_limit is not None
+                    else None
+                ),
+                on_plan=lambda plan: write_plan(plan, plan_file),
+                pruning=pruning,
+                limits=limits,
+            )
+        else:
+            planner = BestFirstWidthSearch(
+                task,
+                heuristic=heuristic,
+                width=args.width,
+                pruning=pruning,
+                limits=limits,
+            )
+    return planner
+
+
+def plan_configuration(args):
+    """
+    Get the options that determine the plans found, as the plan cache key part.
+
+    Args:
+        args (Namespace): The command-line arguments.
+
+    Returns:
+        dict: The options, without the paths, limits, and logging and cache options.
+    """
+    return {"planner": "dfs_planner"} | {
+        name: value
+        for name, value in vars(args).items()
+        if name not in NON_PLAN_OPTIONS
+    }
+
 
 if __name__ == "__main__":
     apr = ap.ArgumentParser(
@@ -32,6 +210,173 @@ if __name__ == "__main__":
         type=str,
         help="Path to the problem file",
     )
+    apr.add_argument(
+        "--search",
+        type=str,
+        choices=[
+            "dfs",
+            "ida",
+            "iw",
+            "bfws",
+            "beam",
+            "anytime",
+            "regression",
+            "bidir",
+            "sat",
+        ],
+        default="dfs",
+        help="Search engine: lifted depth-first search, or IDDFS/IDA*, iterated width, best-first width search, beam search, anytime restarting weighted A*, regression, bidirectional search, or planning as satisfiability on the grounded task",
+    )
+    apr.add_argument(
+        "--heuristic",
+        type=str,
+        choices=sorted(HEURISTICS),
+        default=None,
+        help="Heuristic guiding the grounded search engines (IDA* needs an admissible one for shortest plans)",
+    )
+    apr.add_argument(
+        "--pdb-cache",
+        type=str,
+        default=".pdb-cache",
+        help="Directory where pattern databases are stored and reused by later runs",
+    )
+    apr.add_argument(
+        "--plan-cache",
+        type=str,
+        default=".plan-cache",
+        help="Directory where plans are stored and reused for the same domain, problem, and options",
+    )
+    apr.add_argument(
+        "--no-plan-cache",
+        action="store_true",
+        help="Always search, without reading or storing plans in the plan cache",
+    )
+    apr.add_argument(
+        "--pdb-max-size",
+        type=int,
+        default=50000,
+        help="Maximum number of abstract states of a pattern database",
+    )
+    apr.add_argument(
+        "--transposition-size",
+        type=int,
+        default=1 << 16,
+        help="Number of transposition table slots used by IDDFS/IDA*",
+    )
+    apr.add_argument(
+        "--replacement",
+        type=str,
+        choices=TranspositionTable.REPLACEMENTS,
+        default="depth",
+        help="Transposition table replacement policy",
+    )
+    apr.add_argument(
+        "--width",
+        type=int,
+        choices=[1, 2],
+        default=2,
+        help="Largest novelty width used by IW and BFWS",
+    )
+    apr.add_argument(
+        "--beam-width",
+        type=int,
+        default=100,
+        help="Number of states kept per layer by beam search",
+    )
+    apr.add_argument(
+        "--beam-mobility",
+        action="store_true",
+        help="Break beam search ties by the number of applicable operators (Warnsdorff's rule)",
+    )
+    apr.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="Wall-clock seconds after which the search stops (anytime search then returns its best plan)",
+    )
+    apr.add_argument(
+        "--max-expansions",
+        type=int,
+        default=None,
+        help="Number of expansions after which the search stops",
+    )
+    apr.add_argument(
+        "--memory-limit",
+        type=float,
+        default=None,
+        help="Memory in megabytes above which the search stops",
+    )
+    apr.add_argument(
+        "--memory-tracking",
+        type=str,
+        choices=ResourceLimits.MEMORY_TRACKING,
+        default="resource",
+        help="Measure memory as the peak resident set size (resource) or the memory allocated by Python objects (tracemalloc)",
+    )
+    apr.add_argument(
+        "--result-json",
+        type=str,
+        default=None,
+        help="Write the termination status, plan, and statistics to this JSON file",
+    )
+    apr.add_argument(
+        "--weights",
+        type=float,
+        nargs="+",
+        default=[5, 3, 2, 1.5, 1],
+        help="Decreasing heuristic weights of the anytime search iterations",
+    )
+    apr.add_argument(
+        "--max-horizon",
+        type=int,
+        default=None,
+        help="Largest number of parallel steps tried by the SAT planner (default: no limit)",
+    )
+    apr.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Periodically save the search progress to this file (lifted DFS and beam search); without --resume, an existing checkpoint there is discarded, and any other file is left untouched with an error",
+    )
+    apr.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between two checkpoint saves",
+    )
+    apr.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the search saved in the --checkpoint file",
+    )
+    apr.add_argument(
+        "--lazy-grounding",
+        action="store_true",
+        help="Instantiate operators per state instead of grounding the whole task (IDDFS, beam, and anytime search with the blind or goal-count heuristic)",
+    )
+    apr.add_argument(
+        "--nogood-cache",
+        type=int,
+        default=None,
+        help="Keep only the current path for duplicate detection and remember up to this many dead-end states",
+    )
+    apr.add_argument(
+        "--ordering",
+        type=str,
+        choices=sorted(ORDERINGS),
+        default="declaration",
+        help="Policy used to order the successors of each state",
+    )
+    apr.add_argument(
+        "--symmetry",
+        action="store_true",
+        help="Detect object symmetries and prune states symmetric to visited ones",
+    )
+    apr.add_argument(
+        "--stubborn-sets",
+        action="store_true",
+        help="Ground the task and prune successors outside a strong stubborn set",
+    )
     apr.add_argument(
         "-v",
         "--verbose",
@@ -39,6 +384,14 @@ if __name__ == "__main__":
         help="Enable verbose logging",
     )
     args = apr.parse_args()
+    if args.lazy_grounding and (
+        args.search not in ("ida", "beam", "anytime")
+        or args.stubborn_sets
+        or args.heuristic not in (None, "blind", "goal-count")
+    ):
+        apr.error(
+            "--lazy-grounding requires --search ida, beam, or anytime, no stubborn sets, and the blind or goal-count heuristic"
+        )
     if args.verbose:
         logger.setLevel(logging.DEBUG)
         logger.info("Verbose logging enabled")
@@ -46,6 +399,13 @@ if __name__ == "__main__":
         logger.setLevel(logging.INFO)
         logger.info("Verbose logging disabled")
 
+    if args.resume and args.checkpoint is None:
+        apr.error("--resume requires --checkpoint")
+    if args.checkpoint is not None and (
+        args.search not in ("dfs", "beam") or args.nogood_cache
+    ):
+        apr.error("--checkpoint requires --search dfs or beam, without --nogood-cache")
+
     domain_file = args.domain
     problem_file = args.problem
 
@@ -58,19 +418,44 @@ if __name__ == "__main__":
 
     logger.info(f"Domain parsed: {domain.name}")
     logger.info(f"Problem parsed: {problem.name}")
-
-    planner = Planner(domain, problem)
-    logger.info("Starting planning")
-    plan = planner.plan()
+    plan_file = f"{problem.name}.pddl.plan"
+    plan_cache, cache_key, plan = None, None, None
+    if not args.no_plan_cache:
+        plan_cache = PlanCache(args.plan_cache, logger=logger)
+        cache_key = PlanCache.file_key(
+            domain_file, problem_file, plan_configuration(args)
+        )
+        plan = plan_cache.get(
+            cache_key,
+            validate=lambda steps: Planner(domain, problem).validate(steps),
+        )
+    if plan is not None:
+        logger.info("Plan found in the plan cache")
+        plan = [(name, binding) for name, binding in plan]
+        result = SearchResult(SOLVED, plan, {"plan_cache_hit": True}, 0.0, 0.0)
+    else:
+        planner = build_planner(args, domain, problem, plan_file)
+        logger.info("Starting planning")
+        plan = planner.plan()
+        result = planner.result
+        # A search stopped at a limit, including the anytime search deadline, may
+        # return a worse plan than the configuration finds without it, so only
+        # plans of searches that ran to completion are cached
+        if plan and plan_cache is not None and result.status == SOLVED:
+            plan_cache.put(cache_key, [[name, binding] for name, binding in plan])
     if plan:
         logger.info("Plan found!")
-        plan_file = f"{problem.name}.pddl.plan"
-        with open(plan_file, "w") as f:
-            for i, step in enumerate(plan):
-                logger.info(f"Step {i + 1}: {step}")
-                print(step)
-                f.write(f"( {step[0]} {' '.join(step[1].values())} )\n")
+        for i, step in enumerate(plan):
+            logger.info(f"Step {i + 1}: {step}")
+            print(step)
+        write_plan(plan, plan_file)
         logger.info(f"Plan written to {plan_file}")
     else:
         logger.warning("No plan found.")
         print("No plan found.")
+    if result.limit_hit:
+        print(f"Search stopped: {result}")
+    if args.result_json:
+        with open(args.result_json, "w") as f:
+            json.dump(result.to_dict(), f, indent=2)
+        logger.info(f"Result written to {args.result_json}")
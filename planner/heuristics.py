@@ -0,0 +1,176 @@
+"""
+heuristics.py
+
+This module defines goal-distance heuristics for the search engines that work
+on the grounded Task of task.py. A heuristic has an evaluate method taking a
+state bitset, and optionally the parent state and the operator that produced
+it (so that heuristics can update per-state information incrementally), and
+returning an estimate of the number of steps to the goal, or None when the
+state is recognized as a dead end.
+"""
+
+import logging
+
+from landmarks import LandmarkCountHeuristic
+from pattern_database import PatternDatabaseHeuristic
+
+
+class BlindHeuristic:
+    """
+    The blind heuristic: 0 for goal states and 1 otherwise.
+
+    Attributes:
+        task (Task): The grounded task.
+        admissible (bool): True, the heuristic never overestimates.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    admissible = True
+
+    def __init__(self, task, logger=None):
+        """
+        Initialize the heuristic.
+
+        Args:
+            task (Task): The grounded task.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.logger = logger or logging.getLogger(__name__)
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate a state.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): Unused. Defaults to None.
+            operator (Operator, optional): Unused. Defaults to None.
+
+        Returns:
+            int: 0 if the state is a goal state, 1 otherwise.
+        """
+        return 0 if self.task.is_goal(state) else 1
+
+
+class GoalCountHeuristic:
+    """
+    The number of goal literals that do not hold.
+
+    Attributes:
+        task (Task): The grounded task.
+        admissible (bool): False, one operator may achieve several goal facts.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    admissible = False
+
+    def __init__(self, task, logger=None):
+        """
+        Initialize the heuristic.
+
+        Args:
+            task (Task): The grounded task.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.logger = logger or logging.getLogger(__name__)
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate a state.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): Unused. Defaults to None.
+            operator (Operator, optional): Unused. Defaults to None.
+
+        Returns:
+            int: The number of unsatisfied goal literals.
+        """
+        missing = self.task.goal & ~state
+        violated = self.task.goal_neg & state
+        return missing.bit_count() + violated.bit_count()
+
+
+class HMaxHeuristic:
+    """
+    The h^max heuristic: the number of layers of the relaxed planning graph
+    (delete effects and negative preconditions ignored) needed to reach the goal.
+
+    Attributes:
+        task (Task): The grounded task.
+        admissible (bool): True, the heuristic never overestimates with unit costs.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    admissible = True
+
+    def __init__(self, task, logger=None):
+        """
+        Initialize the heuristic.
+
+        Args:
+            task (Task): The grounded task.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.logger = logger or logging.getLogger(__name__)
+        self._operators = [(op.pre, op.add) for op in task.operators]
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate a state.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): Unused. Defaults to None.
+            operator (Operator, optional): Unused. Defaults to None.
+
+        Returns:
+            int: The number of relaxed layers to the goal, or None if the goal is
+                relaxed-unreachable.
+        """
+        layers = self._layers(state, self.task.goal)
+        if layers is not None and state & self.task.goal_neg:
+            # Deleting a negative goal fact takes at least one step
+            return max(layers, 1)
+        return layers
+
+    def _layers(self, state, goal):
+        """
+        Count the relaxed planning graph layers needed to reach a set of facts.
+
+        Args:
+            state (int): The state bitset.
+            goal (int): The bitset of the facts to reach.
+
+        Returns:
+            int: The number of layers, or None if the facts are unreachable.
+        """
+        reached = state
+        remaining = self._operators
+        layers = 0
+        while reached & goal != goal:
+            new = reached
+            pending = []
+            for pre, add in remaining:
+                if reached & pre == pre:
+                    new |= add
+                else:
+                    pending.append((pre, add))
+            if new == reached:
+                return None
+            reached = new
+            remaining = pending
+            layers += 1
+        return layers
+
+
+HEURISTICS = {
+    "blind": BlindHeuristic,
+    "goal-count": GoalCountHeuristic,
+    "hmax": HMaxHeuristic,
+    "lmcount": LandmarkCountHeuristic,
+    "pdb": PatternDatabaseHeuristic,
+}
@@ -0,0 +1,264 @@
+"""
+iterative_deepening.py
+
+This module defines the IterativeDeepeningSearch class, which implements
+iterative deepening depth-first search (IDDFS) and IDA* over the grounded Task
+of task.py, and the TranspositionTable class it uses for duplicate detection.
+
+Each iteration is a depth-first search bounded by f = g + h; the next bound is
+the smallest f value that exceeded the current one. Without a heuristic this is
+IDDFS. With unit costs and an admissible heuristic the first plan found is a
+shortest one.
+
+Instead of an unbounded set of visited states, the search keeps a fixed-size
+transposition table indexed by a hash of the state. An entry records the
+shallowest depth at which a state was expanded in the current iteration (so
+reaching it again at the same depth or deeper is pruned) and caches its
+heuristic value across iterations. When two states hash to the same slot, the
+replacement policy decides which one is kept; losing an entry only costs
+re-expansions, never completeness. Memory therefore stays constant regardless
+of the size of the search, apart from the current path.
+"""
+
+import math
+
+from search import SearchEngine
+
+
+class TranspositionTable:
+    """
+    A fixed-size hash table of search states.
+
+    Attributes:
+        size (int): The number of slots.
+        replacement (str): "depth" keeps the shallower of two colliding entries of
+            the current iteration, "age" always keeps the newest one.
+        statistics (dict): Counters for hits, stores, replacements, and rejections.
+    """
+
+    REPLACEMENTS = ("depth", "age")
+
+    def __init__(self, size, replacement="depth"):
+        """
+        Initialize an empty table.
+
+        Args:
+            size (int): The number of slots.
+            replacement (str, optional): The replacement policy, "depth" or "age". Defaults to "depth".
+        """
+        if size <= 0:
+            raise ValueError(f"size must be positive, got {size}")
+        if replacement not in self.REPLACEMENTS:
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        self.size = size
+        self.replacement = replacement
+        self.statistics = {"hits": 0, "stores": 0, "replacements": 0, "rejections": 0}
+        self._states = [None] * size
+        self._depths = [0] * size
+        self._heuristics = [0] * size
+        self._iterations = [-1] * size
+
+    def lookup(self, state):
+        """
+        Look up a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            tuple: (depth, heuristic value, iteration) of the entry, or None if the
+                state is not in the table.
+        """
+        slot = self._slot(state)
+        if self._states[slot] != state:
+            return None
+        self.statistics["hits"] += 1
+        return (self._depths[slot], self._heuristics[slot], self._iterations[slot])
+
+    def store(self, state, depth, heuristic, iteration):
+        """
+        Store a state, subject to the replacement policy.
+
+        Args:
+            state (int): The state bitset.
+            depth (int): The depth at which the state is expanded.
+            heuristic (float): The heuristic value of the state.
+            iteration (int): The current iteration.
+
+        Returns:
+            bool: True if the state was stored, False if the policy kept the old entry.
+        """
+        slot = self._slot(state)
+        occupant = self._states[slot]
+        if occupant is not None and occupant != state:
+            if (
+                self.replacement == "depth"
+                and self._iterations[slot] == iteration
+                and self._depths[slot] < depth
+            ):
+                self.statistics["rejections"] += 1
+                return False
+            self.statistics["replacements"] += 1
+        self._states[slot] = state
+        self._depths[slot] = depth
+        self._heuristics[slot] = heuristic
+        self._iterations[slot] = iteration
+        self.statistics["stores"] += 1
+        return True
+
+    def _slot(self, state):
+        """
+        Get the slot of a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            int: The slot index.
+        """
+        # Bitsets hash to their own value modulo 2**61 - 1, so mix all the bits of
+        # the hash into the high half of a 64-bit product (Fibonacci hashing)
+        mixed = (hash(state) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return (mixed >> 32) % self.size
+
+
+class IterativeDeepeningSearch(SearchEngine):
+    """
+    IDDFS, or IDA* when a heuristic is given, with a bounded transposition table.
+
+    Attributes:
+        table (TranspositionTable): The transposition table.
+        bound (float): The f bound of the last iteration.
+    """
+
+    def __init__(
+        self,
+        task,
+        heuristic=None,
+        pruning=None,
+        transposition_size=1 << 16,
+        replacement="depth",
+        limits=None,
+        logger=None,
+    ):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task.
+            heuristic (object, optional): A heuristic from heuristics.py; it must be
+                admissible for the plans to be shortest. Defaults to None (IDDFS).
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            transposition_size (int, optional): The number of transposition table slots. Defaults to 65536.
+            replacement (str, optional): The replacement policy, "depth" or "age". Defaults to "depth".
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(
+            task, heuristic=heuristic, pruning=pruning, limits=limits, logger=logger
+        )
+        self.table = TranspositionTable(transposition_size, replacement)
+        self.bound = 0
+        self.statistics["iterations"] = 0
+
+    def search(self):
+        """
+        Run bounded depth-first searches with increasing bounds.
+
+        Returns:
+            list: The operators of a plan, or None if no solution exists.
+        """
+        function_name = "search"
+        initial = self.task.initial_state
+        self.bound = self.evaluate(initial)
+        iteration = 0
+        while self.bound < math.inf:
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: Iteration {iteration} with bound {self.bound}"
+            )
+            self.statistics["iterations"] = iteration + 1
+            plan, next_bound = self._bounded_search(self.bound, iteration)
+            if plan is not None:
+                return plan
+            self.bound = next_bound
+            iteration += 1
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Search space exhausted, no plan exists"
+        )
+        return None
+
+    def _bounded_search(self, bound, iteration):
+        """
+        Run one depth-first search in which states with f > bound are cut off.
+
+        The search uses an explicit stack, so plan length is not limited by the
+        recursion limit.
+
+        Args:
+            bound (float): The f bound.
+            iteration (int): The iteration number, used to age transposition entries.
+
+        Returns:
+            tuple: (operators of a plan or None, the smallest f value that exceeded the bound).
+        """
+        initial = self.task.initial_state
+        if self.task.is_goal(initial):
+            return [], bound
+        next_bound = math.inf
+        path = []
+        on_path = {initial}
+        self._expand(initial, 0, self.evaluate(initial), iteration)
+        stack = [(initial, 0, iter(self.successors(initial)))]
+        while stack:
+            state, depth, children = stack[-1]
+            child_op, child = next(children, (None, None))
+            if child_op is None:
+                stack.pop()
+                on_path.discard(state)
+                if path:
+                    path.pop()
+                continue
+            child_depth = depth + 1
+            entry = self.table.lookup(child)
+            if entry is None:
+                h = self.evaluate(child, state, child_op)
+            else:
+                h = entry[1]
+            f = child_depth + h
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if child in on_path or (
+                entry is not None and entry[2] == iteration and entry[0] <= child_depth
+            ):
+                self.statistics["duplicates"] += 1
+                continue
+            path.append(child_op)
+            if self.task.is_goal(child):
+                return path, next_bound
+            self._expand(child, child_depth, h, iteration)
+            on_path.add(child)
+            stack.append((child, child_depth, iter(self.successors(child))))
+        return None, next_bound
+
+    def _expand(self, state, depth, h, iteration):
+        """
+        Count an expansion and record the state in the transposition table.
+
+        Args:
+            state (int): The state bitset.
+            depth (int): The depth of the state.
+            h (float): The heuristic value of the state.
+            iteration (int): The current iteration.
+        """
+        self.statistics["expansions"] += 1
+        self.table.store(state, depth, h, iteration)
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the transposition table counters.
+        """
+        self.statistics["bound"] = self.bound
+        for key, value in self.table.statistics.items():
+            self.statistics[f"transposition_{key}"] = value
+        super()._log_statistics()
@@ -0,0 +1,285 @@
+"""
+landmarks.py
+
+This module defines the LandmarkGraph class, which extracts fact landmarks and
+their orderings from the relaxed planning graph of a grounded Task, and the
+LandmarkCountHeuristic class built on it.
+
+A landmark is a fact that is true at some point of every plan. Landmarks are
+found by back-chaining from the goal facts: the first achievers of a landmark p
+are the operators adding p that are applicable in the relaxed problem where p
+is never reached. Every precondition shared by all first achievers is a
+landmark that must be reached before p (a greedy-necessary ordering), and every
+other fact added by all of them is a landmark reached together with p. In the
+Hamiltonian cycle domain, for example, each (visited ?v) goal, the whole
+(path-length ?n) chain, and (start-selected) are landmarks.
+
+The landmark-count heuristic counts the landmarks not yet accepted on the way
+to a state, plus the accepted ones that must be reached again. The set of
+accepted landmarks of a state is computed from the one of its parent and the
+facts added by the operator, rather than from scratch. These sets are kept for
+at most MAX_ACCEPTED_STATES states, so that the heuristic does not undo the
+constant memory of iterative deepening; the least recently evaluated states are
+forgotten first, and a state whose parent was forgotten starts again from the
+landmarks that are true in it.
+"""
+
+import logging
+
+# Largest number of states whose accepted landmarks are kept
+MAX_ACCEPTED_STATES = 1 << 18
+
+
+class LandmarkGraph:
+    """
+    The fact landmarks of a grounded task and their greedy-necessary orderings.
+
+    Attributes:
+        task (Task): The grounded task.
+        landmarks (list): The fact ids of the landmarks, indexed by landmark id.
+        index (dict): Maps fact ids to landmark ids.
+        predecessors (list): For each landmark, the bitset of landmark ids that must be
+            reached before it.
+        successors (list): For each landmark, the bitset of landmark ids it must precede.
+        solvable (bool): False if a landmark has no first achiever, which proves the
+            task unsolvable.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, task, logger=None):
+        """
+        Extract the landmarks of a task.
+
+        Args:
+            task (Task): The grounded task.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        function_name = "__init__"
+        self.task = task
+        self.logger = logger or logging.getLogger(__name__)
+        self.landmarks = []
+        self.index = {}
+        self.predecessors = []
+        self.successors = []
+        self.solvable = True
+        self._pre_users = [[] for _ in task.facts]
+        for op in task.operators:
+            for fact in op.pre_facts:
+                self._pre_users[fact].append(op)
+        self._extract()
+        orderings = sum(mask.bit_count() for mask in self.predecessors)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Found {len(self.landmarks)} landmarks and {orderings} orderings"
+        )
+
+    def fact_names(self):
+        """
+        Get the PDDL representation of the landmarks, for logging.
+
+        Returns:
+            list: Strings such as "(visited v1)", in landmark id order.
+        """
+        return [self.task.fact_name(fact) for fact in self.landmarks]
+
+    def _extract(self):
+        """
+        Back-chain from the goal facts through the shared preconditions and effects
+        of first achievers.
+        """
+        initial = self.task.initial_state
+        pending = []
+        for fact in self.task.goal_facts:
+            self._add(fact, pending)
+        while pending:
+            fact = pending.pop()
+            if initial >> fact & 1:
+                continue
+            reachable = self._reachable_without(fact)
+            first_achievers = [
+                op for op in self.task.achievers[fact] if reachable & op.pre == op.pre
+            ]
+            if not first_achievers:
+                self.solvable = False
+                continue
+            shared_pre = set(first_achievers[0].pre_facts)
+            shared_add = set(first_achievers[0].add_facts)
+            for op in first_achievers[1:]:
+                shared_pre.intersection_update(op.pre_facts)
+                shared_add.intersection_update(op.add_facts)
+            landmark = self.index[fact]
+            for other in sorted(shared_pre):
+                self._add(other, pending)
+                self.predecessors[landmark] |= 1 << self.index[other]
+                self.successors[self.index[other]] |= 1 << landmark
+            for other in sorted(shared_add - {fact}):
+                self._add(other, pending)
+
+    def _add(self, fact, pending):
+        """
+        Register a fact as a landmark if it is not one already.
+
+        Args:
+            fact (int): The fact id.
+            pending (list): The landmarks whose achievers remain to be analysed.
+        """
+        if fact in self.index:
+            return
+        self.index[fact] = len(self.landmarks)
+        self.landmarks.append(fact)
+        self.predecessors.append(0)
+        self.successors.append(0)
+        pending.append(fact)
+
+    def _reachable_without(self, excluded):
+        """
+        Compute the relaxed-reachable facts when no operator adding a fact may be used.
+
+        Args:
+            excluded (int): The fact id whose achievers are left out.
+
+        Returns:
+            int: The bitset of the relaxed-reachable facts.
+        """
+        task = self.task
+        reached = task.initial_state
+        missing = {}
+        queue = task.state_facts(reached)
+        for op in task.operators:
+            if not op.pre_facts and not op.add >> excluded & 1:
+                new = op.add & ~reached
+                reached |= new
+                queue.extend(task.state_facts(new))
+        while queue:
+            fact = queue.pop()
+            for op in self._pre_users[fact]:
+                count = missing.get(op.id, len(op.pre_facts)) - 1
+                missing[op.id] = count
+                if count == 0 and not op.add >> excluded & 1:
+                    new = op.add & ~reached
+                    if new:
+                        reached |= new
+                        queue.extend(task.state_facts(new))
+        return reached
+
+
+class LandmarkCountHeuristic:
+    """
+    The landmark-count heuristic, with per-state bookkeeping updated from the parent.
+
+    A landmark is accepted in a state when it is true there, or was accepted in the
+    parent, and it only becomes accepted once all its predecessors were accepted.
+    The heuristic value is the number of landmarks not accepted plus the number of
+    accepted landmarks that are false but required again: goal facts, and
+    predecessors of landmarks not accepted yet. When a state is reached along
+    several paths, its accepted set is the intersection of those paths' sets.
+
+    Attributes:
+        task (Task): The grounded task.
+        graph (LandmarkGraph): The landmarks and orderings.
+        max_states (int): The largest number of states whose accepted landmarks are kept.
+        admissible (bool): False, one operator may achieve several landmarks.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    admissible = False
+
+    def __init__(self, task, logger=None, max_states=MAX_ACCEPTED_STATES):
+        """
+        Extract the landmarks of a task and prepare the heuristic.
+
+        Args:
+            task (Task): The grounded task.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+            max_states (int, optional): The largest number of states whose accepted
+                landmarks are kept. Defaults to MAX_ACCEPTED_STATES.
+        """
+        if max_states <= 0:
+            raise ValueError(f"max_states must be positive, got {max_states}")
+        self.task = task
+        self.max_states = max_states
+        self.logger = logger or logging.getLogger(__name__)
+        self.graph = LandmarkGraph(task, logger=self.logger)
+        self._all = (1 << len(self.graph.landmarks)) - 1
+        self._goal_landmarks = 0
+        for fact in task.goal_facts:
+            self._goal_landmarks |= 1 << self.graph.index[fact]
+        self._accepted = {}
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate a state, updating its accepted landmarks from its parent's.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): The state the operator was applied to. Defaults to None.
+            operator (Operator, optional): The operator that produced the state. Defaults to None.
+
+        Returns:
+            int: The number of landmarks still to be reached, or None if a landmark is
+                unreachable.
+        """
+        if not self.graph.solvable:
+            return None
+        parent_accepted = self._accepted.get(parent) if operator is not None else None
+        if parent_accepted is None:
+            accepted = self._true_landmarks(state)
+        else:
+            accepted = parent_accepted
+            predecessors = self.graph.predecessors
+            for fact in operator.add_facts:
+                landmark = self.graph.index.get(fact)
+                if landmark is None or accepted >> landmark & 1:
+                    continue
+                if parent_accepted & predecessors[landmark] == predecessors[landmark]:
+                    accepted |= 1 << landmark
+        # Reinsert the state last, dicts keeping their insertion order
+        previous = self._accepted.pop(state, None)
+        if previous is not None:
+            accepted &= previous
+        elif len(self._accepted) >= self.max_states:
+            # Forget the least recently evaluated state
+            del self._accepted[next(iter(self._accepted))]
+        self._accepted[state] = accepted
+        return self._count(state, accepted)
+
+    def _true_landmarks(self, state):
+        """
+        Get the landmarks that hold in a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            int: The bitset of landmark ids whose fact is true.
+        """
+        accepted = 0
+        for landmark, fact in enumerate(self.graph.landmarks):
+            if state >> fact & 1:
+                accepted |= 1 << landmark
+        return accepted
+
+    def _count(self, state, accepted):
+        """
+        Count the landmarks that still have to be reached.
+
+        Args:
+            state (int): The state bitset.
+            accepted (int): The bitset of accepted landmark ids.
+
+        Returns:
+            int: The number of landmarks not accepted or required again.
+        """
+        not_accepted = self._all & ~accepted
+        required_again = 0
+        landmarks = self.graph.landmarks
+        successors = self.graph.successors
+        remaining = accepted
+        while remaining:
+            low = remaining & -remaining
+            remaining ^= low
+            landmark = low.bit_length() - 1
+            if state >> landmarks[landmark] & 1:
+                continue
+            if low & self._goal_landmarks or successors[landmark] & not_accepted:
+                required_again += 1
+        return not_accepted.bit_count() + required_again
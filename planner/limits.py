@@ -0,0 +1,281 @@
+"""
+limits.py
+
+This module defines the ResourceLimits class, which bounds the wall-clock time,
+the number of expansions, and the memory of a search, and the SearchResult
+class, which describes how a search terminated.
+
+The search engines call ResourceLimits.check once per expansion. The expansion
+count and the monotonic clock are compared on every call, as both are cheap to
+read whatever the cost of an expansion (microseconds for the grounded engines,
+tens of milliseconds for the lifted DFS); the memory, which costs a system
+call, is only measured every memory_interval seconds. When a limit is exceeded,
+check raises LimitExceeded, which unwinds the search; the planner then reports a
+SearchResult with the limit that was hit and the statistics gathered so far,
+instead of being killed by the operating system.
+
+Memory is measured either as the peak resident set size of the process
+(resource.getrusage, the default, which counts the parsed PDDL and everything
+else in the process) or as the memory currently allocated by Python objects
+(tracemalloc, more precise but slowing allocations down noticeably).
+"""
+
+import logging
+import math
+import resource
+import sys
+import time
+import tracemalloc
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+FAILED = "failed"
+TIME_LIMIT = "time-limit"
+EXPANSION_LIMIT = "expansion-limit"
+MEMORY_LIMIT = "memory-limit"
+
+
+def peak_memory():
+    """
+    Measure the peak resident set size of the process.
+
+    Returns:
+        float: The peak memory in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+class LimitExceeded(Exception):
+    """
+    Raised by ResourceLimits.check when a limit is exceeded.
+
+    Attributes:
+        limit (str): TIME_LIMIT, EXPANSION_LIMIT, or MEMORY_LIMIT.
+    """
+
+    def __init__(self, limit, message):
+        """
+        Initialize the exception.
+
+        Args:
+            limit (str): The limit that was exceeded.
+            message (str): A description of the measured value and the limit.
+        """
+        super().__init__(message)
+        self.limit = limit
+
+
+class ResourceLimits:
+    """
+    Limits on the time, expansions, and memory of a search.
+
+    Attributes:
+        time_limit (float): The wall-clock limit in seconds, or None.
+        max_expansions (int): The largest number of expansions, or None.
+        memory_limit (float): The memory limit in megabytes, or None.
+        memory_tracking (str): "resource" (peak resident set size) or "tracemalloc"
+            (memory allocated by Python objects).
+        memory_interval (float): The number of seconds between two memory measurements.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    MEMORY_TRACKING = ("resource", "tracemalloc")
+
+    def __init__(
+        self,
+        time_limit=None,
+        max_expansions=None,
+        memory_limit=None,
+        memory_tracking="resource",
+        memory_interval=0.1,
+        logger=None,
+    ):
+        """
+        Initialize the limits.
+
+        Args:
+            time_limit (float, optional): The wall-clock limit in seconds. Defaults to None.
+            max_expansions (int, optional): The largest number of expansions. Defaults to None.
+            memory_limit (float, optional): The memory limit in megabytes. Defaults to None.
+            memory_tracking (str, optional): "resource" or "tracemalloc". Defaults to "resource".
+            memory_interval (float, optional): The number of seconds between two memory
+                measurements. Defaults to 0.1.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        if memory_tracking not in self.MEMORY_TRACKING:
+            raise ValueError(f"Unknown memory tracking: {memory_tracking}")
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        self.memory_limit = memory_limit
+        self.memory_tracking = memory_tracking
+        self.memory_interval = memory_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._start = None
+        self._next_memory_check = 0.0
+        self._started_tracemalloc = False
+
+    def start(self):
+        """
+        Start the clock, and tracemalloc if it is used and not running yet.
+        """
+        self._start = time.monotonic()
+        self._next_memory_check = self._start
+        if (
+            self.memory_tracking == "tracemalloc"
+            and self.memory_limit is not None
+            and not tracemalloc.is_tracing()
+        ):
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        """
+        Stop tracemalloc if start started it.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def check(self, expansions):
+        """
+        Check the limits.
+
+        Args:
+            expansions (int): The number of expansions so far.
+
+        Raises:
+            LimitExceeded: If a limit is exceeded.
+        """
+        if self.max_expansions is not None and expansions > self.max_expansions:
+            raise LimitExceeded(
+                EXPANSION_LIMIT,
+                f"{expansions} expansions exceed the limit of {self.max_expansions}",
+            )
+        now = time.monotonic()
+        if self.time_limit is not None and now - self._start > self.time_limit:
+            raise LimitExceeded(
+                TIME_LIMIT,
+                f"{now - self._start:.1f} s exceed the limit of {self.time_limit} s",
+            )
+        if self.memory_limit is not None and now >= self._next_memory_check:
+            self._next_memory_check = now + self.memory_interval
+            memory = self.memory()
+            if memory > self.memory_limit:
+                raise LimitExceeded(
+                    MEMORY_LIMIT,
+                    f"{memory:.1f} MB exceed the limit of {self.memory_limit} MB",
+                )
+
+    def elapsed(self):
+        """
+        Get the time elapsed since start.
+
+        Returns:
+            float: The elapsed wall-clock time in seconds, 0 before start.
+        """
+        if self._start is None:
+            return 0.0
+        return time.monotonic() - self._start
+
+    def memory(self):
+        """
+        Measure the memory used, as configured by memory_tracking.
+
+        Returns:
+            float: The memory in megabytes.
+        """
+        if self.memory_tracking == "tracemalloc" and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0] / (1 << 20)
+        return peak_memory()
+
+
+class SearchResult:
+    """
+    How a search terminated, with the statistics gathered until then.
+
+    Attributes:
+        status (str): SOLVED, UNSOLVABLE (the search space was exhausted), FAILED (an
+            incomplete search ended without a plan), or the limit that was hit
+            (TIME_LIMIT, EXPANSION_LIMIT, or MEMORY_LIMIT).
+        plan (list): The plan, as (action name, binding) pairs, or None. When a limit
+            stopped an anytime search, this is the best plan found before.
+        statistics (dict): The search statistics.
+        elapsed (float): The wall-clock time of the search in seconds.
+        memory (float): The memory used in megabytes, as measured by the limits, or
+            the peak resident set size without limits.
+    """
+
+    def __init__(self, status, plan, statistics, elapsed, memory):
+        """
+        Initialize the result.
+
+        Args:
+            status (str): The termination status.
+            plan (list): The plan, or None.
+            statistics (dict): The search statistics.
+            elapsed (float): The wall-clock time of the search in seconds.
+            memory (float): The memory used in megabytes.
+        """
+        self.status = status
+        self.plan = plan
+        self.statistics = statistics
+        self.elapsed = elapsed
+        self.memory = memory
+
+    @property
+    def limit_hit(self):
+        """
+        Get the limit that stopped the search.
+
+        Returns:
+            str: TIME_LIMIT, EXPANSION_LIMIT, or MEMORY_LIMIT, or None if the search
+                terminated on its own.
+        """
+        if self.status in (TIME_LIMIT, EXPANSION_LIMIT, MEMORY_LIMIT):
+            return self.status
+        return None
+
+    def to_dict(self):
+        """
+        Convert the result to a JSON-serializable dictionary.
+
+        Returns:
+            dict: The status, plan length, plan steps, elapsed time, memory, and statistics.
+        """
+        return {
+            "status": self.status,
+            "plan_length": len(self.plan) if self.plan is not None else None,
+            "plan": (
+                [
+                    f"( {name} {' '.join(binding.values())} )"
+                    for name, binding in self.plan
+                ]
+                if self.plan is not None
+                else None
+            ),
+            "elapsed": self.elapsed,
+            "memory": self.memory,
+            "statistics": {
+                key: (
+                    value
+                    if isinstance(value, (bool, int, str))
+                    or (isinstance(value, float) and math.isfinite(value))
+                    else str(value)
+                )
+                for key, value in self.statistics.items()
+            },
+        }
+
+    def __str__(self):
+        """
+        Return a one-line summary of the result.
+
+        Returns:
+            str: A string such as "solved after 1.2 s, 31 steps, 2017 expansions".
+        """
+        summary = f"{self.status} after {self.elapsed:.1f} s"
+        if self.plan is not None:
+            summary += f", {len(self.plan)} steps"
+        return f"{summary}, {self.statistics.get('expansions', 0)} expansions"
@@ -0,0 +1,137 @@
+"""
+nogood.py
+
+This module defines the NogoodCache class, a bounded store of states that the
+depth-first search has proven to be dead ends. States are recorded through a
+compact projection that drops the static atoms of the problem (atoms whose
+predicate never appears in an action effect), so that two states reached via
+different prefixes share a single entry.
+"""
+
+import logging
+from collections import OrderedDict
+
+import pddl
+
+
+def static_predicates(domain):
+    """
+    Collect the names of the predicates that no action effect mentions.
+
+    Args:
+        domain (Domain): The PDDL domain.
+
+    Returns:
+        set: The names of the static predicates.
+    """
+    changed = set()
+    pending = [action.effect for action in domain.actions]
+    while pending:
+        effect = pending.pop()
+        if isinstance(effect, pddl.logic.Predicate):
+            changed.add(effect.name)
+        elif isinstance(effect, pddl.logic.base.And):
+            pending.extend(effect.operands)
+        elif isinstance(effect, pddl.logic.base.Not):
+            pending.append(effect.argument)
+        elif isinstance(effect, pddl.logic.effects.When):
+            pending.append(effect.effect)
+    return {predicate.name for predicate in domain.predicates} - changed
+
+
+class NogoodCache:
+    """
+    A bounded least-recently-used cache of dead-end states.
+
+    Attributes:
+        max_size (int): The maximum number of nogoods kept in the cache.
+        static_predicates (set): Names of predicates that no action can change.
+        hits (int): Number of states pruned because they matched a nogood.
+        expansions_saved (int): Number of expansions the pruned subtrees cost when
+            they were first proven to be dead ends.
+        evictions (int): Number of nogoods dropped to respect max_size.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, domain, max_size, logger=None):
+        """
+        Initialize an empty cache for the given domain.
+
+        Args:
+            domain (Domain): The PDDL domain, used to find the static predicates.
+            max_size (int): The maximum number of nogoods kept in the cache.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        self.max_size = max_size
+        self.static_predicates = static_predicates(domain)
+        self.hits = 0
+        self.expansions_saved = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self.logger = logger or logging.getLogger(__name__)
+
+    def project(self, state):
+        """
+        Project a state onto its dynamic atoms.
+
+        Args:
+            state (State): The state to project.
+
+        Returns:
+            frozenset: The atoms of the state whose predicate is not static.
+        """
+        return frozenset(
+            atom
+            for atom in state.atoms
+            if isinstance(atom, pddl.logic.Predicate)
+            and atom.name not in self.static_predicates
+        )
+
+    def add(self, state, subtree_size):
+        """
+        Record a state as a proven dead end.
+
+        Args:
+            state (State): The dead-end state.
+            subtree_size (int): Number of expansions spent proving it is a dead end.
+        """
+        function_name = "add"
+        key = self.project(state)
+        self._entries[key] = subtree_size
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Recorded nogood with {len(key)} atoms (subtree size {subtree_size})"
+        )
+
+    def prunes(self, state):
+        """
+        Check whether a state matches a recorded nogood.
+
+        Args:
+            state (State): The state to check.
+
+        Returns:
+            bool: True if the state is a known dead end, False otherwise.
+        """
+        key = self.project(state)
+        subtree_size = self._entries.get(key)
+        if subtree_size is None:
+            return False
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.expansions_saved += subtree_size
+        return True
+
+    def __len__(self):
+        """
+        Return the number of nogoods currently stored.
+
+        Returns:
+            int: The number of entries in the cache.
+        """
+        return len(self._entries)
@@ -0,0 +1,222 @@
+"""
+ordering.py
+
+This module defines child-ordering policies for the depth-first search of the
+Planner class. A policy receives the successors of a state as a list of
+(action, binding, new_state) tuples and returns them in the order the search
+should explore them. Python's sort is stable, so successors that a policy
+considers equivalent keep their generation order.
+"""
+
+import logging
+
+import pddl
+
+
+class DeclarationOrdering:
+    """
+    Explore successors in generation order (action order, then object order).
+
+    Attributes:
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, logger=None):
+        """
+        Initialize the policy.
+
+        Args:
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+
+    def order(self, planner, state, successors):
+        """
+        Return the successors unchanged.
+
+        Args:
+            planner (Planner): The planner running the search.
+            state (State): The state being expanded.
+            successors (list): A list of (action, binding, new_state) tuples.
+
+        Returns:
+            list: The successors in generation order.
+        """
+        return successors
+
+
+class HeuristicOrdering:
+    """
+    Explore helpful successors first, then prefer successors closer to the goal.
+
+    A successor is helpful when its action achieves a goal atom that does not hold
+    in the parent state. Among helpful and non-helpful successors, the ones with
+    fewer unsatisfied goal atoms (the goal-count heuristic) come first.
+
+    Attributes:
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, logger=None):
+        """
+        Initialize the policy.
+
+        Args:
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+
+    def order(self, planner, state, successors):
+        """
+        Sort the successors by helpfulness, then by goal count.
+
+        Args:
+            planner (Planner): The planner running the search.
+            state (State): The state being expanded.
+            successors (list): A list of (action, binding, new_state) tuples.
+
+        Returns:
+            list: The sorted successors.
+        """
+        function_name = "order"
+        goal_atoms = self._goal_atoms(planner.goal)
+        open_goals = [atom for atom in goal_atoms if atom not in state.atoms]
+
+        def key(successor):
+            new_state = successor[2]
+            unsatisfied = sum(atom not in new_state.atoms for atom in goal_atoms)
+            helpful = any(atom in new_state.atoms for atom in open_goals)
+            return (not helpful, unsatisfied)
+
+        ordered = sorted(successors, key=key)
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Ordered {len(ordered)} successors, {len(open_goals)} open goals"
+        )
+        return ordered
+
+    @staticmethod
+    def _goal_atoms(goal):
+        """
+        Collect the positive atoms of a goal.
+
+        Args:
+            goal (Condition): The goal condition.
+
+        Returns:
+            list: The positive predicates of the goal.
+        """
+        if isinstance(goal, pddl.logic.base.And):
+            return [op for op in goal.operands if isinstance(op, pddl.logic.Predicate)]
+        if isinstance(goal, pddl.logic.Predicate):
+            return [goal]
+        return []
+
+
+class WarnsdorffOrdering:
+    """
+    Warnsdorff's rule for path-building domains such as the Hamiltonian cycle.
+
+    For every action listed in vertex_parameters, successors are sorted by the
+    number of unvisited neighbors of the vertex they move to, fewest first.
+    Successors of other actions come after them in generation order.
+
+    Attributes:
+        vertex_parameters (dict): Maps action names to the parameter holding the
+            vertex the action moves to.
+        edge_predicate (str): The predicate relating neighboring vertices.
+        visited_predicate (str): The predicate marking visited vertices.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(
+        self,
+        vertex_parameters=None,
+        edge_predicate="connected",
+        visited_predicate="visited",
+        logger=None,
+    ):
+        """
+        Initialize the policy for a path-building domain.
+
+        Args:
+            vertex_parameters (dict, optional): Maps action names to the parameter holding
+                the target vertex. Defaults to the Hamiltonian cycle domain actions.
+            edge_predicate (str, optional): The predicate relating neighboring vertices. Defaults to "connected".
+            visited_predicate (str, optional): The predicate marking visited vertices. Defaults to "visited".
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.vertex_parameters = vertex_parameters or {
+            "select-start": "v",
+            "move-to-next": "to",
+        }
+        self.edge_predicate = edge_predicate
+        self.visited_predicate = visited_predicate
+        self.logger = logger or logging.getLogger(__name__)
+        self._neighbors = None
+
+    def order(self, planner, state, successors):
+        """
+        Sort the successors by the onward degree of their target vertex.
+
+        Args:
+            planner (Planner): The planner running the search.
+            state (State): The state being expanded.
+            successors (list): A list of (action, binding, new_state) tuples.
+
+        Returns:
+            list: The sorted successors.
+        """
+        function_name = "order"
+        if self._neighbors is None:
+            self._neighbors = self._build_neighbors(planner.initial_state)
+        visited = {
+            atom.terms[0].name
+            for atom in state.atoms
+            if isinstance(atom, pddl.logic.Predicate)
+            and atom.name == self.visited_predicate
+        }
+
+        def key(successor):
+            action, binding, _ = successor
+            parameter = self.vertex_parameters.get(action.name)
+            if parameter is None:
+                return (1, 0)
+            vertex = binding[parameter]
+            onward = sum(
+                neighbor not in visited and neighbor != vertex
+                for neighbor in self._neighbors.get(vertex, ())
+            )
+            return (0, onward)
+
+        ordered = sorted(successors, key=key)
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Ordered {len(ordered)} successors, {len(visited)} vertices visited"
+        )
+        return ordered
+
+    def _build_neighbors(self, state):
+        """
+        Build the adjacency lists from the edge atoms of a state.
+
+        Args:
+            state (State): The state holding the (static) edge atoms.
+
+        Returns:
+            dict: A dictionary mapping vertex names to sets of neighbor names.
+        """
+        neighbors = {}
+        for atom in state.atoms:
+            if (
+                isinstance(atom, pddl.logic.Predicate)
+                and atom.name == self.edge_predicate
+            ):
+                source, target = (term.name for term in atom.terms)
+                neighbors.setdefault(source, set()).add(target)
+        return neighbors
+
+
+ORDERINGS = {
+    "declaration": DeclarationOrdering,
+    "heuristic": HeuristicOrdering,
+    "warnsdorff": WarnsdorffOrdering,
+}
@@ -0,0 +1,576 @@
+"""
+pattern_database.py
+
+This module defines pattern database (PDB) heuristics over the grounded Task
+of task.py.
+
+The facts of the task are first grouped into finite-domain variables: a group
+of facts of one predicate is a variable when at most one of them is true
+initially and every operator that adds one of them deletes another one it
+requires (e.g. (on ?disk ?x) for each disk in the Tower of Hanoi). Facts left
+over become binary variables. Every variable has an extra "none" value when
+none of its facts may hold.
+
+A pattern is a set of variables. Projecting the task onto a pattern gives an
+abstract state space small enough to enumerate; the abstract goal distances,
+computed by a backward breadth-first search from the abstract goal states, are
+an admissible heuristic. Patterns that no operator affects together are added
+up, otherwise the maximum is taken.
+
+Building a PDB is the expensive part, so each table is stored in a file named
+after a hash of the projected task, and later runs (on the same problem, or on
+any problem with the same projection) map the file into memory with mmap
+instead of rebuilding it. Lookups read the mapped table directly, without
+copying it.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+from array import array
+from collections import deque
+
+UNREACHABLE = 0xFFFF
+MAGIC = b"PDB1"
+
+
+class FiniteDomainVariables:
+    """
+    A partition of the facts of a task into finite-domain variables.
+
+    Attributes:
+        task (Task): The grounded task.
+        variables (list): For each variable, the fact ids of its values. A variable
+            with a "none" value has one more value than facts.
+        has_none (list): For each variable, whether it has a "none" value.
+        fact_variable (dict): Maps fact ids to (variable, value) pairs.
+    """
+
+    def __init__(self, task):
+        """
+        Group the facts of a task into variables.
+
+        Args:
+            task (Task): The grounded task.
+        """
+        self.task = task
+        self.variables = []
+        self.has_none = []
+        self.fact_variable = {}
+        covered = set()
+        for group in sorted(self._candidate_groups(), key=len, reverse=True):
+            if covered.isdisjoint(group) and self._is_mutex(group):
+                self._add_variable(group)
+                covered.update(group)
+        for fact in range(len(task.facts)):
+            if fact not in covered:
+                self._add_variable([fact])
+
+    def domain_size(self, variable):
+        """
+        Get the number of values of a variable.
+
+        Args:
+            variable (int): The variable.
+
+        Returns:
+            int: The number of values, including "none" if the variable has it.
+        """
+        return len(self.variables[variable]) + self.has_none[variable]
+
+    def value(self, state, variable):
+        """
+        Get the value of a variable in a state.
+
+        Args:
+            state (int): The state bitset.
+            variable (int): The variable.
+
+        Returns:
+            int: The index of the fact of the variable that holds, or the "none" value.
+        """
+        facts = self.variables[variable]
+        for value, fact in enumerate(facts):
+            if state >> fact & 1:
+                return value
+        return len(facts)
+
+    def _add_variable(self, group):
+        """
+        Register a group of facts as a variable.
+
+        Args:
+            group (list): The fact ids of the variable.
+        """
+        task = self.task
+        facts = sorted(group)
+        members = set(facts)
+        variable = len(self.variables)
+        has_none = len(facts) == 1 or not any(
+            task.initial_state >> fact & 1 for fact in facts
+        )
+        for op in task.operators:
+            if any(fact in members for fact in op.del_facts) and not any(
+                fact in members for fact in op.add_facts
+            ):
+                has_none = True
+        self.variables.append(facts)
+        self.has_none.append(has_none)
+        for value, fact in enumerate(facts):
+            self.fact_variable[fact] = (variable, value)
+
+    def _candidate_groups(self):
+        """
+        Enumerate groups of facts of one predicate that agree on all arguments but one.
+
+        Returns:
+            list: Lists of fact ids with at least two facts.
+        """
+        groups = {}
+        for fact, (predicate, *args) in enumerate(self.task.facts):
+            for position in range(len(args)):
+                key = (
+                    predicate,
+                    position,
+                    tuple(args[:position] + args[position + 1 :]),
+                )
+                groups.setdefault(key, []).append(fact)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def _is_mutex(self, group):
+        """
+        Check that at most one fact of a group can ever hold.
+
+        Args:
+            group (list): The fact ids.
+
+        Returns:
+            bool: True if at most one fact holds initially and every operator adding
+                one of them deletes one it requires.
+        """
+        members = set(group)
+        initial = self.task.initial_state
+        if sum(initial >> fact & 1 for fact in group) > 1:
+            return False
+        for op in self.task.operators:
+            added = [
+                fact
+                for fact in op.add_facts
+                if fact in members and fact not in op.pre_facts
+            ]
+            if not added:
+                continue
+            if len(added) > 1:
+                return False
+            if not any(
+                fact in members and fact in op.pre_facts for fact in op.del_facts
+            ):
+                return False
+        return True
+
+
+class PatternDatabase:
+    """
+    The abstract goal distances of the projection of a task onto a pattern.
+
+    Attributes:
+        pattern (list): The variables of the pattern.
+        size (int): The number of abstract states.
+        digest (str): The hash of the projected task, used as the file name.
+        loaded (bool): True if the table was mapped from an existing file.
+    """
+
+    def __init__(self, variables, pattern, cache_dir=None, logger=None):
+        """
+        Build the PDB of a pattern, or map it from the cache directory.
+
+        Args:
+            variables (FiniteDomainVariables): The variables of the task.
+            pattern (list): The variables of the pattern.
+            cache_dir (str, optional): Directory holding the stored tables. Defaults to
+                None (tables are kept in memory only).
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        function_name = "__init__"
+        self.logger = logger or logging.getLogger(__name__)
+        self.pattern = list(pattern)
+        self._variables = variables
+        self._sizes = [variables.domain_size(variable) for variable in self.pattern]
+        self._multipliers = []
+        self.size = 1
+        for size in self._sizes:
+            self._multipliers.append(self.size)
+            self.size *= size
+        self._operators = self._project_operators()
+        self._goal = self._project_goal()
+        self.digest = self._digest()
+        self.loaded = False
+        path = os.path.join(cache_dir, f"{self.digest}.pdb") if cache_dir else None
+        if path and os.path.exists(path):
+            self._distances = self._load(path)
+            self.loaded = True
+        else:
+            self._distances = self._build()
+            if path:
+                self._store(path, self._distances)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Pattern of {len(self.pattern)} variables, {self.size} abstract states, "
+            + ("loaded" if self.loaded else "built")
+        )
+
+    def distance(self, state):
+        """
+        Look up the abstract goal distance of a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            int: The abstract goal distance, or None if the abstract goal is unreachable.
+        """
+        index = 0
+        for variable, multiplier in zip(self.pattern, self._multipliers):
+            index += self._variables.value(state, variable) * multiplier
+        distance = self._distances[index]
+        return None if distance == UNREACHABLE else distance
+
+    def _project_operators(self):
+        """
+        Project the operators onto the pattern.
+
+        Returns:
+            list: Distinct (preconditions, effects) pairs of sorted (position, value)
+                tuples, where position indexes the pattern; operators without effect on
+                the pattern are dropped.
+        """
+        variables = self._variables
+        position = {variable: i for i, variable in enumerate(self.pattern)}
+        projected = set()
+        for op in variables.task.operators:
+            pre = {}
+            effects = {}
+            for fact in op.pre_facts:
+                variable, value = variables.fact_variable[fact]
+                if variable in position:
+                    pre[position[variable]] = value
+            for fact in op.neg_facts:
+                variable, _ = variables.fact_variable[fact]
+                if variable in position and len(variables.variables[variable]) == 1:
+                    pre[position[variable]] = 1
+            for fact in op.add_facts:
+                variable, value = variables.fact_variable[fact]
+                if variable in position:
+                    effects[position[variable]] = value
+            for fact in op.del_facts:
+                variable, _ = variables.fact_variable[fact]
+                if variable in position and position[variable] not in effects:
+                    effects[position[variable]] = len(variables.variables[variable])
+            if any(pre.get(i) != value for i, value in effects.items()):
+                projected.add(
+                    (tuple(sorted(pre.items())), tuple(sorted(effects.items())))
+                )
+        return sorted(projected)
+
+    def _project_goal(self):
+        """
+        Project the goal onto the pattern.
+
+        Returns:
+            tuple: Sorted (position, value) pairs fixed by the goal.
+        """
+        variables = self._variables
+        position = {variable: i for i, variable in enumerate(self.pattern)}
+        goal = {}
+        for fact in variables.task.goal_facts:
+            variable, value = variables.fact_variable[fact]
+            if variable in position:
+                goal[position[variable]] = value
+        for fact in variables.task.state_facts(variables.task.goal_neg):
+            variable, _ = variables.fact_variable[fact]
+            if variable in position and len(variables.variables[variable]) == 1:
+                goal[position[variable]] = 1
+        return tuple(sorted(goal.items()))
+
+    def _digest(self):
+        """
+        Hash the projected task.
+
+        Returns:
+            str: A hexadecimal SHA-256 digest.
+        """
+        task = self._variables.task
+        domains = [
+            [task.fact_name(fact) for fact in self._variables.variables[variable]]
+            + (["<none>"] if self._variables.has_none[variable] else [])
+            for variable in self.pattern
+        ]
+        description = repr((domains, self._operators, self._goal))
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def _build(self):
+        """
+        Compute the abstract goal distances with a backward breadth-first search.
+
+        Returns:
+            array: The distances, indexed by abstract state.
+        """
+        sizes = self._sizes
+        multipliers = self._multipliers
+        distances = array("H", [UNREACHABLE]) * self.size
+        by_effect = {}
+        for pre, effects in self._operators:
+            position, value = effects[0]
+            prevail = tuple((i, v) for i, v in pre if i not in dict(effects))
+            free = [i for i, _ in effects if i not in dict(pre)]
+            before = tuple((i, v) for i, v in pre if i in dict(effects))
+            by_effect.setdefault((position, value), []).append(
+                (effects, prevail, before, free)
+            )
+        queue = deque()
+        for index in self._states_matching(self._goal):
+            distances[index] = 0
+            queue.append(index)
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            values = [index // multipliers[i] % sizes[i] for i in range(len(sizes))]
+            for position, value in enumerate(values):
+                for effects, prevail, before, free in by_effect.get(
+                    (position, value), ()
+                ):
+                    if any(values[i] != v for i, v in effects) or any(
+                        values[i] != v for i, v in prevail
+                    ):
+                        continue
+                    base = index
+                    for i, v in effects:
+                        base -= values[i] * multipliers[i]
+                    for i, v in before:
+                        base += v * multipliers[i]
+                    for predecessor in self._expand_free(base, free):
+                        if distances[predecessor] == UNREACHABLE:
+                            distances[predecessor] = distance
+                            queue.append(predecessor)
+        return distances
+
+    def _expand_free(self, base, free):
+        """
+        Enumerate the abstract states obtained by giving every value to free positions.
+
+        Args:
+            base (int): An abstract state index with the free positions set to 0.
+            free (list): Pattern positions whose value is unconstrained.
+
+        Returns:
+            list: The abstract state indexes.
+        """
+        indexes = [base]
+        for i in free:
+            indexes = [
+                index + value * self._multipliers[i]
+                for index in indexes
+                for value in range(self._sizes[i])
+            ]
+        return indexes
+
+    def _states_matching(self, constraints):
+        """
+        Enumerate the abstract states satisfying (position, value) constraints.
+
+        Args:
+            constraints (tuple): The (position, value) pairs.
+
+        Returns:
+            list: The abstract state indexes.
+        """
+        fixed = dict(constraints)
+        base = sum(value * self._multipliers[i] for i, value in fixed.items())
+        free = [i for i in range(len(self._sizes)) if i not in fixed]
+        return self._expand_free(base, free)
+
+    def _store(self, path, distances):
+        """
+        Write a table to disk atomically.
+
+        Args:
+            path (str): The file path.
+            distances (array): The distances.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(self.size.to_bytes(8, "little"))
+            distances.tofile(f)
+        os.replace(temporary, path)
+
+    def _load(self, path):
+        """
+        Map a stored table into memory.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            memoryview: The distances, viewed in place as unsigned 16-bit integers.
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = len(MAGIC) + 8
+        if (
+            self._mmap[: len(MAGIC)] != MAGIC
+            or int.from_bytes(self._mmap[len(MAGIC) : header], "little") != self.size
+        ):
+            raise ValueError(f"Corrupt pattern database file: {path}")
+        return memoryview(self._mmap)[header:].cast("H")
+
+
+class PatternDatabaseHeuristic:
+    """
+    A heuristic combining pattern databases over goal variables.
+
+    Attributes:
+        task (Task): The grounded task.
+        variables (FiniteDomainVariables): The variables of the task.
+        databases (list): The pattern databases.
+        additive (bool): True if no operator affects two patterns, so the distances
+            are added up; otherwise their maximum is used.
+        admissible (bool): True, abstract distances never overestimate.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    admissible = True
+
+    def __init__(
+        self, task, patterns=None, max_size=50000, cache_dir=".pdb-cache", logger=None
+    ):
+        """
+        Build or load the pattern databases of a task.
+
+        Args:
+            task (Task): The grounded task.
+            patterns (list, optional): Lists of variable indexes. Defaults to patterns
+                built greedily from the goal variables.
+            max_size (int, optional): Maximum number of abstract states of a greedy
+                pattern. Defaults to 50000.
+            cache_dir (str, optional): Directory where tables are stored and reused, or
+                None to keep them in memory only. Defaults to ".pdb-cache".
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.logger = logger or logging.getLogger(__name__)
+        self.variables = FiniteDomainVariables(task)
+        if patterns is None:
+            patterns = self._greedy_patterns(max_size)
+        self.databases = [
+            PatternDatabase(self.variables, pattern, cache_dir, logger=self.logger)
+            for pattern in patterns
+        ]
+        self.additive = self._is_additive(patterns)
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate a state.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): Unused. Defaults to None.
+            operator (Operator, optional): Unused. Defaults to None.
+
+        Returns:
+            int: The sum or maximum of the abstract distances, or None if one of them
+                proves the state a dead end.
+        """
+        total = 0
+        for database in self.databases:
+            distance = database.distance(state)
+            if distance is None:
+                return None
+            total = total + distance if self.additive else max(total, distance)
+        return total
+
+    def _greedy_patterns(self, max_size):
+        """
+        Pack the goal variables into patterns, then extend each pattern with the
+        variables its operators depend on while the size limit allows.
+
+        Args:
+            max_size (int): Maximum number of abstract states of a pattern.
+
+        Returns:
+            list: Lists of variable indexes.
+        """
+        variables = self.variables
+        goal_variables = []
+        for fact in self.task.goal_facts:
+            variable = variables.fact_variable[fact][0]
+            if variable not in goal_variables:
+                goal_variables.append(variable)
+        patterns = []
+        for variable in goal_variables:
+            size = variables.domain_size(variable)
+            for pattern in patterns:
+                if pattern[1] * size <= max_size:
+                    pattern[0].append(variable)
+                    pattern[1] *= size
+                    break
+            else:
+                patterns.append([[variable], size])
+        for pattern in patterns:
+            for variable in self._relevant_variables(pattern[0]):
+                size = variables.domain_size(variable)
+                if variable not in pattern[0] and pattern[1] * size <= max_size:
+                    pattern[0].append(variable)
+                    pattern[1] *= size
+        return [sorted(pattern) for pattern, _ in patterns]
+
+    def _relevant_variables(self, pattern):
+        """
+        List the variables in the preconditions of operators affecting a pattern.
+
+        Args:
+            pattern (list): Variable indexes.
+
+        Returns:
+            list: Variable indexes, most frequent first.
+        """
+        members = set(pattern)
+        counts = {}
+        fact_variable = self.variables.fact_variable
+        for op in self.task.operators:
+            if any(
+                fact_variable[fact][0] in members
+                for fact in op.add_facts + op.del_facts
+            ):
+                for fact in op.pre_facts:
+                    variable = fact_variable[fact][0]
+                    counts[variable] = counts.get(variable, 0) + 1
+        return sorted(counts, key=lambda variable: (-counts[variable], variable))
+
+    def _is_additive(self, patterns):
+        """
+        Check that no operator affects variables of two different patterns.
+
+        Args:
+            patterns (list): Lists of variable indexes.
+
+        Returns:
+            bool: True if the pattern distances can be added up.
+        """
+        owner = {}
+        for i, pattern in enumerate(patterns):
+            for variable in pattern:
+                if variable in owner:
+                    return False
+                owner[variable] = i
+        fact_variable = self.variables.fact_variable
+        for op in self.task.operators:
+            touched = {
+                owner.get(fact_variable[fact][0])
+                for fact in op.add_facts + op.del_facts
+            }
+            touched.discard(None)
+            if len(touched) > 1:
+                return False
+        return True
@@ -0,0 +1,246 @@
+"""
+plan_cache.py
+
+This module defines the PlanCache class, an on-disk store of the plans found
+for domain/problem pairs, so that solving the same pair again with the same
+planner configuration returns the stored plan instead of searching.
+
+Entries are content-addressed: the key is the SHA-256 hash of the normalized
+domain text, the normalized problem text, and the planner configuration. The
+normalization drops comments and case and collapses whitespace, so files that
+only differ in layout share an entry. Each plan is stored as a JSON file named
+after its key, written to a temporary file and renamed so that concurrent
+writers never leave a partial entry.
+
+The cache is bounded by the total size of its files: after each insertion the
+least recently used entries are deleted until the total fits. The last use of
+an entry is the modification time of its file, which each hit refreshes.
+
+A plan read from the cache is only returned if the validation function given by
+the caller accepts it (typically a replay of the plan, much cheaper than a
+search); otherwise the entry is deleted and the lookup is a miss.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+
+COMMENT = re.compile(r";[^\n]*")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_pddl(text):
+    """
+    Normalize PDDL text for hashing.
+
+    Args:
+        text (str): The PDDL text.
+
+    Returns:
+        str: The text without comments, in lower case, with each run of whitespace
+            replaced by a single space and no space inside parentheses.
+    """
+    text = WHITESPACE.sub(" ", COMMENT.sub("", text).lower()).strip()
+    return text.replace("( ", "(").replace(" )", ")")
+
+
+class PlanCache:
+    """
+    A size-bounded least-recently-used cache of plans, stored in a directory.
+
+    Attributes:
+        cache_dir (str): The directory of the entries.
+        max_bytes (int): The largest total size of the entries.
+        statistics (dict): The numbers of hits, misses, stores, invalid entries,
+            and evictions.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, cache_dir=".plan-cache", max_bytes=64 << 20, logger=None):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            cache_dir (str, optional): The directory of the entries. Defaults to ".plan-cache".
+            max_bytes (int, optional): The largest total size of the entries. Defaults to 64 MB.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self.statistics = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalid": 0,
+            "evictions": 0,
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(domain_text, problem_text, configuration):
+        """
+        Compute the key of a domain/problem pair solved with a planner configuration.
+
+        Args:
+            domain_text (str): The text of the domain file.
+            problem_text (str): The text of the problem file.
+            configuration (dict): The planner and the options that affect its plans;
+                it must be JSON-serializable.
+
+        Returns:
+            str: The hexadecimal SHA-256 key.
+        """
+        digest = hashlib.sha256()
+        for part in (
+            normalize_pddl(domain_text),
+            normalize_pddl(problem_text),
+            json.dumps(configuration, sort_keys=True),
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_key(domain_file, problem_file, configuration):
+        """
+        Compute the key of a domain/problem pair given by file paths.
+
+        Args:
+            domain_file (str): The path of the domain file.
+            problem_file (str): The path of the problem file.
+            configuration (dict): The planner and the options that affect its plans.
+
+        Returns:
+            str: The hexadecimal SHA-256 key.
+        """
+        with open(domain_file, "r") as f:
+            domain_text = f.read()
+        with open(problem_file, "r") as f:
+            problem_text = f.read()
+        return PlanCache.key(domain_text, problem_text, configuration)
+
+    def get(self, key, validate=None):
+        """
+        Look up a plan and check it before returning it.
+
+        Args:
+            key (str): The key of the plan.
+            validate (callable, optional): A function returning True if the plan it is
+                given is valid. Defaults to None (plans are returned unchecked).
+
+        Returns:
+            object: The plan as it was stored, or None on a miss or if the stored
+                plan is unreadable or invalid.
+        """
+        function_name = "get"
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                plan = json.load(f)
+        except FileNotFoundError:
+            self.statistics["misses"] += 1
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(
+                f"{self.__class__.__name__}.{function_name}: Unreadable entry {key}: {e}"
+            )
+            plan = None
+        if plan is None or (validate is not None and not validate(plan)):
+            self.logger.warning(
+                f"{self.__class__.__name__}.{function_name}: Dropping invalid entry {key}"
+            )
+            self.statistics["invalid"] += 1
+            self.statistics["misses"] += 1
+            self._remove(path)
+            return None
+        try:
+            # Mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        self.statistics["hits"] += 1
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Hit {key} ({len(plan)} steps)"
+        )
+        return plan
+
+    def put(self, key, plan):
+        """
+        Store a plan, then evict the least recently used entries beyond max_bytes.
+
+        Args:
+            key (str): The key of the plan.
+            plan (list): The plan; it must be JSON-serializable.
+        """
+        function_name = "put"
+        handle, temporary = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w") as f:
+                json.dump(plan, f)
+            # mkstemp creates the file readable by its owner only
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            self._remove(temporary)
+            raise
+        self.statistics["stores"] += 1
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Stored {key} ({len(plan)} steps)"
+        )
+        self._evict()
+
+    def _evict(self):
+        """
+        Delete the least recently used entries until their total size fits max_bytes.
+        """
+        function_name = "_evict"
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.statistics["evictions"] += 1
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: Evicted {os.path.basename(path)}"
+            )
+
+    def _path(self, key):
+        """
+        Get the path of the file of an entry.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _remove(path):
+        """
+        Delete a file if it still exists.
+
+        Args:
+            path (str): The path of the file.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
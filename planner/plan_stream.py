@@ -0,0 +1,235 @@
+"""
+plan_stream.py
+
+This module defines the PlanStreamParser class, which parses the standard
+output of FF, Fast Downward, or LPG-td one line at a time, as the planner
+produces it, and the PlanStep and ProgressEvent classes of the events it
+reports.
+
+Plan steps are reported as soon as their line is read, so a consumer can start
+using the plan (e.g. simulating the tape of a Turing machine) before the planner
+has printed all of it. Progress lines are reported as ProgressEvent objects:
+
+- FF: the goal distance of each state on which enforced hill-climbing improves
+  ("heuristic").
+- Fast Downward: each new best heuristic value ("heuristic") and the number of
+  expanded states ("expansions").
+
+The regular expressions are compiled once, when the module is imported.
+"""
+
+import re
+
+PLANNERS = ("ff", "fast-downward", "lpg-td")
+
+# FF: "ff: found legal plan as follows", then "step    0: SELECT-START V1 N0 N1"
+# and "        1: MOVE-TO-NEXT V1 V2 N1 N2", up to "time spent:"
+FF_PLAN_START = re.compile(r"found legal plan as follows")
+FF_STEP = re.compile(r"^\s*(?:step\s+)?\d+:\s+(\S+)(.*)$", re.I)
+FF_PLAN_END = re.compile(r"time spent:")
+# FF: "Cueing down from goal distance:   24 into depth [1]", then "   22   [1]";
+# best-first search reports "advancing to distance:   20"
+FF_DISTANCE = re.compile(r"(?:goal distance|advancing to distance):\s+(\d+)")
+FF_IMPROVEMENT = re.compile(r"^\s+(\d+)(?:\s+\[\d+\])?\s*$")
+# Fast Downward: "Solution found!", then "select-start v1 n0 n1 (1)", up to
+# "Plan length:"; lines may start with "[t=0.01s, 9600 KB]"
+FD_PLAN_START = re.compile(r"Solution found!")
+FD_STEP = re.compile(r"^(?:\[t=[^\]]*\]\s*)?(\S+)((?:\s+[^\s(]+)*)\s+\(\d+\)\s*$")
+FD_PLAN_END = re.compile(r"Plan length:")
+FD_HEURISTIC = re.compile(r"New best heuristic value for \S+: (\d+)")
+FD_EXPANSIONS = re.compile(r"(?:Expanded (\d+) state|(\d+) expanded)")
+# LPG-td: "Plan computed:", then " 0.0003: (SELECT-START V1 N0 N1) [1]"
+LPG_PLAN_START = re.compile(r"Plan computed:")
+LPG_STEP = re.compile(r"^\s*\d+(?:\.\d+)?:\s+\((\S+?)((?:\s+[^\s)]+)*)\)")
+
+# Steps added by FF to compile complex goals, not part of the plan
+HIDDEN_ACTIONS = ("REACH-GOAL",)
+
+
+class PlanStep:
+    """
+    A step of a plan.
+
+    Attributes:
+        index (int): The position of the step in the plan, from 0.
+        action (str): The action name, in upper case.
+        arguments (list): The arguments, in upper case.
+    """
+
+    def __init__(self, index, action, arguments):
+        """
+        Initialize the step.
+
+        Args:
+            index (int): The position of the step in the plan.
+            action (str): The action name.
+            arguments (list): The arguments.
+        """
+        self.index = index
+        self.action = action
+        self.arguments = arguments
+
+    def __str__(self):
+        return f"{self.index}: {self.action} {' '.join(self.arguments)}"
+
+
+class ProgressEvent:
+    """
+    A progress report of the planner.
+
+    Attributes:
+        name (str): "heuristic" or "expansions".
+        value (int): The value reported.
+        line (str): The line of the report.
+    """
+
+    def __init__(self, name, value, line):
+        """
+        Initialize the event.
+
+        Args:
+            name (str): The quantity reported.
+            value (int): The value reported.
+            line (str): The line of the report.
+        """
+        self.name = name
+        self.value = value
+        self.line = line
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class PlanStreamParser:
+    """
+    Incremental parser of the output of a planner.
+
+    Attributes:
+        planner (str): One of PLANNERS.
+        steps (list): The PlanStep objects read so far.
+        in_plan (bool): Whether the lines read are in the plan section.
+        finished (bool): Whether the end of the plan section was read.
+    """
+
+    def __init__(self, planner="ff"):
+        """
+        Initialize the parser.
+
+        Args:
+            planner (str, optional): The planner whose output is parsed. Defaults to "ff".
+        """
+        if planner not in PLANNERS:
+            raise ValueError(f"Unknown planner: {planner}")
+        self.planner = planner
+        self.steps = []
+        self.in_plan = False
+        self.finished = False
+        self._descending = False
+
+    def feed(self, line):
+        """
+        Parse a line of output.
+
+        Args:
+            line (str): The line, with or without its line break.
+
+        Returns:
+            list: The PlanStep and ProgressEvent objects reported by the line.
+        """
+        if self.finished:
+            return []
+        if self.planner == "ff":
+            return self._feed_ff(line)
+        if self.planner == "fast-downward":
+            return self._feed_fast_downward(line)
+        return self._feed_lpg(line)
+
+    def parse(self, lines):
+        """
+        Parse lines of output as they are read.
+
+        Args:
+            lines (iterable): The lines, e.g. a pipe opened in text mode.
+
+        Yields:
+            PlanStep or ProgressEvent: The events, in the order of the lines.
+        """
+        for line in lines:
+            yield from self.feed(line)
+
+    def _step(self, action, arguments):
+        """
+        Record a plan step.
+
+        Args:
+            action (str): The action name.
+            arguments (str): The arguments, separated by whitespace.
+
+        Returns:
+            list: The PlanStep, or nothing for a hidden action.
+        """
+        action = action.upper()
+        if action in HIDDEN_ACTIONS:
+            return []
+        step = PlanStep(len(self.steps), action, arguments.upper().split())
+        self.steps.append(step)
+        return [step]
+
+    def _feed_ff(self, line):
+        """
+        Parse a line of FF output.
+        """
+        if self.in_plan:
+            if FF_PLAN_END.search(line) or (self.steps and not line.strip()):
+                self.finished = True
+                return []
+            match = FF_STEP.match(line)
+            return self._step(match.group(1), match.group(2)) if match else []
+        if FF_PLAN_START.search(line):
+            self.in_plan = True
+            return []
+        match = FF_DISTANCE.search(line)
+        if match:
+            self._descending = True
+        elif self._descending:
+            match = FF_IMPROVEMENT.match(line)
+        if match:
+            return [ProgressEvent("heuristic", int(match.group(1)), line)]
+        return []
+
+    def _feed_fast_downward(self, line):
+        """
+        Parse a line of Fast Downward output.
+        """
+        if self.in_plan:
+            if FD_PLAN_END.search(line):
+                self.finished = True
+                return []
+            match = FD_STEP.match(line)
+            return self._step(match.group(1), match.group(2)) if match else []
+        if FD_PLAN_START.search(line):
+            self.in_plan = True
+            return []
+        match = FD_HEURISTIC.search(line)
+        if match:
+            return [ProgressEvent("heuristic", int(match.group(1)), line)]
+        match = FD_EXPANSIONS.search(line)
+        if match:
+            value = match.group(1) or match.group(2)
+            return [ProgressEvent("expansions", int(value), line)]
+        return []
+
+    def _feed_lpg(self, line):
+        """
+        Parse a line of LPG-td output.
+        """
+        if self.in_plan:
+            match = LPG_STEP.match(line)
+            if match:
+                return self._step(match.group(1), match.group(2))
+            if self.steps and not line.strip():
+                self.finished = True
+            return []
+        if LPG_PLAN_START.search(line):
+            self.in_plan = True
+        return []
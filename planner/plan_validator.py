@@ -0,0 +1,404 @@
+"""
+plan_validator.py
+
+This module defines the PlanValidator class, which checks plans against their
+domain and problem by simulating them on the grounded representation of task.py
+(interned facts, bitset states), and the ValidationResult class of its reports.
+
+A plan is valid if every step is an action of the domain whose arguments have
+the right types and whose preconditions hold in the state reached by the
+previous steps, and if the goal holds after the last step. For the first step
+that fails, the result gives the unmet preconditions; for a plan that ends
+outside the goal, the unmet goal facts.
+
+The validator is meant to check many plans in one run, e.g. every plan of a
+benchmark: the task is compiled lazily, without grounding all the operators,
+only the operators of the plan steps are instantiated, and both the parsed
+domains and the tasks with their instantiated operators are reused across the
+plans of the same domain and problem.
+
+Plans are read from files with one step per line, such as "( move-to-next v1 v2
+n1 n2 )" (this planner and FF), "(move-to-next v1 v2 n1 n2)" (Fast Downward) or
+"0: (MOVE-TO-NEXT V1 V2 N1 N2) [1]" (LPG-td); lines starting with ";" are
+comments. Given directories, the command line checks every "*.plan" file in
+them, each against the problem it is named after and the domain.pddl file next
+to it:
+
+    python plan_validator.py ../hamiltonian_cycle ../turing_machine
+    python plan_validator.py -d domain.pddl -p problem.pddl --plan sas_plan
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+from pddl import parse_domain, parse_problem
+from task import Task
+
+# "( select-start v5 n0 n1 )", "(select-start v5 n0 n1)", or "0: (SELECT-START V5 N0 N1) [1]"
+PLAN_STEP = re.compile(r"^\s*(?:\d+(?:\.\d+)?:\s*)?\(\s*([^\s()]+)([^()]*)\)")
+
+
+def read_plan(plan_file):
+    """
+    Read a plan file.
+
+    Args:
+        plan_file (str): The path of the plan file.
+
+    Returns:
+        list: The steps, as (action, arguments) pairs in lower case.
+
+    Raises:
+        ValueError: If a line is neither a step, a comment, nor blank.
+    """
+    plan = []
+    with open(plan_file, "r") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip() or line.lstrip().startswith(";"):
+                continue
+            match = PLAN_STEP.match(line)
+            if not match:
+                raise ValueError(
+                    f"{plan_file}:{number}: not a plan step: {line.strip()}"
+                )
+            plan.append((match.group(1).lower(), tuple(match.group(2).lower().split())))
+    return plan
+
+
+class ValidationResult:
+    """
+    The outcome of checking a plan.
+
+    Attributes:
+        plan_file (str): The path of the plan file, or None for a plan given as a list.
+        valid (bool): Whether the plan is valid.
+        length (int): The number of steps of the plan.
+        failed_step (int): The index of the first step that cannot be applied, the
+            length of the plan if the goal does not hold at the end, or None.
+        step (str): The failed step, e.g. "(move-to-next v1 v2 n1 n2)", or None.
+        reason (str): Why the plan is invalid, or "valid".
+        unmet (list): The preconditions or goal facts that do not hold, as PDDL strings.
+        elapsed (float): The time spent checking the plan, in seconds.
+    """
+
+    def __init__(
+        self,
+        plan_file,
+        valid,
+        length,
+        failed_step=None,
+        step=None,
+        reason="valid",
+        unmet=None,
+        elapsed=0.0,
+    ):
+        """
+        Initialize the result.
+
+        Args:
+            plan_file (str): The path of the plan file, or None.
+            valid (bool): Whether the plan is valid.
+            length (int): The number of steps of the plan.
+            failed_step (int, optional): The index of the failed step. Defaults to None.
+            step (str, optional): The failed step. Defaults to None.
+            reason (str, optional): Why the plan is invalid. Defaults to "valid".
+            unmet (list, optional): The unmet preconditions or goal facts. Defaults to None.
+            elapsed (float, optional): The time spent, in seconds. Defaults to 0.0.
+        """
+        self.plan_file = plan_file
+        self.valid = valid
+        self.length = length
+        self.failed_step = failed_step
+        self.step = step
+        self.reason = reason
+        self.unmet = unmet or []
+        self.elapsed = elapsed
+
+    def __str__(self):
+        name = self.plan_file or "plan"
+        if self.valid:
+            return f"{name}: VALID ({self.length} steps)"
+        text = f"{name}: INVALID"
+        if self.failed_step is not None:
+            text += f" at step {self.failed_step}"
+            if self.step:
+                text += f" {self.step}"
+        text += f": {self.reason}"
+        if self.unmet:
+            text += f"; unmet: {' '.join(self.unmet)}"
+        return text
+
+
+class PlanValidator:
+    """
+    Checker of plans, reusing the parsed domains and the compiled tasks across plans.
+
+    Attributes:
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, logger=None):
+        """
+        Initialize the validator.
+
+        Args:
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self._domains = {}
+        self._tasks = {}
+
+    def task(self, domain_file, problem_file):
+        """
+        Get the lazy task of a domain and problem, compiling it on first use.
+
+        Args:
+            domain_file (str): The path of the domain file.
+            problem_file (str): The path of the problem file.
+
+        Returns:
+            tuple: (the Task, a dictionary of its instantiated steps).
+        """
+        function_name = "task"
+        key = (os.path.abspath(domain_file), os.path.abspath(problem_file))
+        if key not in self._tasks:
+            domain = self._domains.get(key[0])
+            if domain is None:
+                domain = self._domains[key[0]] = parse_domain(domain_file)
+            task = Task(domain, parse_problem(problem_file), lazy=True)
+            self._tasks[key] = (task, {})
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: Compiled {problem_file}"
+            )
+        return self._tasks[key]
+
+    def validate(self, domain_file, problem_file, plan, plan_file=None):
+        """
+        Check a plan by simulating it from the initial state.
+
+        Args:
+            domain_file (str): The path of the domain file.
+            problem_file (str): The path of the problem file.
+            plan (list): The steps, as (action, arguments) pairs.
+            plan_file (str, optional): The path of the plan file, for the report. Defaults to None.
+
+        Returns:
+            ValidationResult: The outcome.
+        """
+        start = time.perf_counter()
+        task, steps = self.task(domain_file, problem_file)
+        state = task.initial_state
+        for index, (action, args) in enumerate(plan):
+            key = (action.lower(), tuple(arg.lower() for arg in args))
+            candidates = steps.get(key)
+            if candidates is None:
+                candidates = steps[key] = task.instantiate(*key)
+            op, unmet = self._applicable(task, candidates, state)
+            if op is None:
+                reason = (
+                    "precondition not satisfied"
+                    if candidates
+                    else "no action with this name and number of arguments"
+                )
+                return ValidationResult(
+                    plan_file,
+                    False,
+                    len(plan),
+                    index,
+                    f"({' '.join(key[:1] + key[1])})",
+                    reason,
+                    unmet,
+                    time.perf_counter() - start,
+                )
+            state = op.apply(state)
+        if not task.solvable or not task.is_goal(state):
+            unmet = [
+                task.fact_name(fact)
+                for fact in task.goal_facts
+                if not state >> fact & 1
+            ]
+            unmet.extend(
+                f"(not {task.fact_name(fact)})"
+                for fact in task.state_facts(state & task.goal_neg)
+            )
+            return ValidationResult(
+                plan_file,
+                False,
+                len(plan),
+                len(plan),
+                None,
+                "goal not satisfied",
+                unmet,
+                time.perf_counter() - start,
+            )
+        return ValidationResult(
+            plan_file, True, len(plan), elapsed=time.perf_counter() - start
+        )
+
+    def validate_file(self, domain_file, problem_file, plan_file):
+        """
+        Check a plan file, reporting unreadable files as invalid plans.
+
+        Args:
+            domain_file (str): The path of the domain file.
+            problem_file (str): The path of the problem file.
+            plan_file (str): The path of the plan file.
+
+        Returns:
+            ValidationResult: The outcome.
+        """
+        function_name = "validate_file"
+        try:
+            plan = read_plan(plan_file)
+            return self.validate(domain_file, problem_file, plan, plan_file)
+        except Exception as e:
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: {plan_file}: {e}"
+            )
+            return ValidationResult(plan_file, False, 0, reason=f"error: {e}")
+
+    def validate_all(self, jobs):
+        """
+        Check plan files, grouped by domain and problem so that each task is used
+        for all its plans before the next one is compiled.
+
+        Args:
+            jobs (iterable): (domain_file, problem_file, plan_file) triples.
+
+        Returns:
+            list: The ValidationResult objects, in the order of the jobs.
+        """
+        jobs = list(jobs)
+        results = [None] * len(jobs)
+        order = sorted(range(len(jobs)), key=lambda i: jobs[i][:2])
+        previous = None
+        for i in order:
+            domain_file, problem_file, plan_file = jobs[i]
+            if previous is not None and previous != (domain_file, problem_file):
+                # The task of the previous problem is not needed anymore
+                self._tasks.pop(tuple(map(os.path.abspath, previous)), None)
+            previous = (domain_file, problem_file)
+            results[i] = self.validate_file(domain_file, problem_file, plan_file)
+        return results
+
+    @staticmethod
+    def _applicable(task, candidates, state):
+        """
+        Find an operator of a step applicable in a state.
+
+        Args:
+            task (Task): The task.
+            candidates (list): The (operator, failures) pairs of the step, see Task.instantiate.
+            state (int): The state bitset.
+
+        Returns:
+            tuple: (the applicable operator, []) or (None, the unmet preconditions of
+                the disjunct with the fewest of them).
+        """
+        best = None
+        for op, failures in candidates:
+            if op is None:
+                unmet = failures + ["(contradictory precondition)"]
+            else:
+                if not failures and op.applicable(state):
+                    return op, []
+                unmet = failures + [
+                    task.fact_name(fact)
+                    for fact in op.pre_facts
+                    if not state >> fact & 1
+                ]
+                unmet.extend(
+                    f"(not {task.fact_name(fact)})"
+                    for fact in task.state_facts(state & op.neg)
+                )
+            if best is None or len(unmet) < len(best):
+                best = unmet
+        return None, best or []
+
+
+def plan_jobs(paths, domain_file=None, problem_file=None):
+    """
+    List the plan files to check and their domain and problem files.
+
+    Args:
+        paths (list): Plan files, or directories searched recursively for "*.plan" files.
+        domain_file (str, optional): The domain of every plan. Defaults to the
+            domain.pddl file in the directory of each plan.
+        problem_file (str, optional): The problem of every plan. Defaults to the plan
+            path without its ".plan" extension.
+
+    Returns:
+        list: (domain_file, problem_file, plan_file) triples.
+    """
+    plan_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                plan_files.extend(
+                    os.path.join(root, name)
+                    for name in sorted(files)
+                    if name.endswith(".plan")
+                )
+        else:
+            plan_files.append(path)
+    return [
+        (
+            domain_file
+            or os.path.join(os.path.dirname(plan_file) or ".", "domain.pddl"),
+            problem_file or plan_file[: -len(".plan")],
+            plan_file,
+        )
+        for plan_file in plan_files
+    ]
+
+
+if __name__ == "__main__":
+    apr = argparse.ArgumentParser(
+        description="Check plans by simulating them on their domain and problem",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    apr.add_argument(
+        "plans",
+        type=str,
+        nargs="*",
+        help="Plan files, or directories searched recursively for *.plan files",
+    )
+    apr.add_argument(
+        "-d",
+        "--domain",
+        type=str,
+        default=None,
+        help="Domain of every plan (default: domain.pddl next to each plan)",
+    )
+    apr.add_argument(
+        "-p",
+        "--problem",
+        type=str,
+        default=None,
+        help="Problem of every plan (default: the plan path without .plan)",
+    )
+    apr.add_argument(
+        "--plan", type=str, nargs="+", default=[], help="More plan files to check"
+    )
+    apr.add_argument(
+        "-v", "--verbose", action="store_true", help="Also print the valid plans"
+    )
+    args = apr.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    start = time.perf_counter()
+    results = PlanValidator().validate_all(
+        plan_jobs(args.plans + args.plan, args.domain, args.problem)
+    )
+    elapsed = time.perf_counter() - start
+    for result in results:
+        if args.verbose or not result.valid:
+            print(result)
+    valid = sum(result.valid for result in results)
+    print(f"{valid}/{len(results)} plans valid, checked in {elapsed:.2f} s")
+    sys.exit(0 if valid == len(results) else 1)
@@ -8,8 +8,12 @@ to find a sequence of actions that transitions the initial state to the goal sta
 """
 
 import logging
+import time
 
 import pddl
+from checkpoint import fingerprint
+from limits import SOLVED, UNSOLVABLE, LimitExceeded, SearchResult, peak_memory
+from nogood import NogoodCache
 from state import State
 
 
@@ -26,11 +30,34 @@ class Planner:
         goal (Condition): The goal condition to be satisfied.
         actions (list): A list of actions defined in the domain.
         visited_states (set): A set of states that have already been visited.
+        nogoods (NogoodCache): A bounded cache of proven dead ends, or None when
+            the planner keeps every visited state instead.
+        ordering (object): A child-ordering policy (see ordering.py), or None to
+            expand successors in generation order.
+        symmetries (SymmetryGroup): Object symmetries used to detect duplicates up
+            to symmetry, or None to compare states exactly.
+        pruning (StubbornSetPruning): A partial-order reduction applied to the
+            successors of each state, or None to explore them all.
+        limits (ResourceLimits): Limits on time, expansions, and memory, or None.
+        checkpoint (Checkpoint): Periodic snapshots of the search, or None.
+        statistics (dict): Counters describing the search effort.
         solution (list): The sequence of actions that solves the problem, if found.
+        result (SearchResult): How the last call to plan terminated.
         logger (Logger): A logger for debugging and informational messages.
     """
 
-    def __init__(self, domain, problem, logger=None):
+    def __init__(
+        self,
+        domain,
+        problem,
+        logger=None,
+        nogood_cache_size=None,
+        ordering=None,
+        symmetries=None,
+        pruning=None,
+        limits=None,
+        checkpoint=None,
+    ):
         """
         Initialize the Planner with a domain, problem, and optional logger.
 
@@ -38,22 +65,59 @@ class Planner:
             domain (Domain): The PDDL domain containing actions and predicates.
             problem (Problem): The PDDL problem containing the initial state, goal, and objects.
             logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+            nogood_cache_size (int, optional): When set, only the states on the current
+                DFS path are kept for duplicate detection, and up to this many proven
+                dead ends are remembered in a NogoodCache. Defaults to None.
+            ordering (object, optional): A child-ordering policy whose order method
+                sorts the successors of a state before they are explored. Defaults to None.
+            symmetries (SymmetryGroup, optional): When set, visited and on-path states are
+                stored by their canonical representative, so states symmetric to one
+                already seen are pruned. Defaults to None.
+            pruning (StubbornSetPruning, optional): When set, only the successors in a
+                strong stubborn set of each state are explored. Defaults to None.
+            limits (ResourceLimits, optional): When set, the search stops as soon as a
+                limit is exceeded. Defaults to None.
+            checkpoint (Checkpoint, optional): When set, the current path and the
+                fingerprints of the visited states are saved periodically, and the
+                search resumes from them if the checkpoint says so. It requires the
+                visited set, so it cannot be combined with a nogood cache. Defaults to None.
         """
+        if checkpoint is not None and nogood_cache_size:
+            raise ValueError(
+                "Checkpointing requires the visited set, not a nogood cache"
+            )
         self.domain = domain
         self.problem = problem
         self.initial_state = State(problem.init)
         self.goal = problem.goal
         self.actions = domain.actions
         self.visited_states = set()
-        self.solution = None
         self.logger = logger or logging.getLogger(__name__)
+        self.nogoods = (
+            NogoodCache(domain, nogood_cache_size, logger=self.logger)
+            if nogood_cache_size
+            else None
+        )
+        self.ordering = ordering
+        self.symmetries = symmetries
+        self.pruning = pruning
+        self.limits = limits
+        self.checkpoint = checkpoint
+        self.statistics = {"expansions": 0, "duplicates": 0}
+        self.solution = None
+        self.result = None
+        self._path_depths = {}
+        self._lowlink = 0
+        self._restored = set()
+        self._replay = []
 
     def plan(self):
         """
         Perform the planning process using depth-first search (DFS).
 
         Logs the planning process and attempts to find a solution that transitions
-        the initial state to the goal state.
+        the initial state to the goal state. How the search terminated is recorded
+        in result, also when a limit stopped it.
 
         Returns:
             list: A sequence of actions that solves the problem, or None if no solution is found.
@@ -86,16 +150,54 @@ class Planner:
         self.logger.info(f"{self.__class__.__name__}.{function_name}: Starting DFS")
         self.logger.info("=====================================")
         self.logger.info("=====================================")
-        if self.dfs(self.initial_state):
-            return self.solution
-        return None
+        if self.checkpoint is not None:
+            self._restore()
+        start = time.monotonic()
+        if self.limits is not None:
+            self.limits.start()
+        try:
+            status = SOLVED if self.dfs(self.initial_state) else UNSOLVABLE
+        except LimitExceeded as error:
+            status = error.limit
+            self.logger.warning(
+                f"{self.__class__.__name__}.{function_name}: Search stopped: {error}"
+            )
+        # The time and memory are reported with or without limits
+        elapsed = time.monotonic() - start
+        if self.limits is not None:
+            memory = self.limits.memory()
+            self.limits.stop()
+        else:
+            memory = peak_memory()
+        self._log_statistics()
+        self.result = SearchResult(
+            status,
+            self.solution if status == SOLVED else None,
+            self.statistics,
+            elapsed,
+            memory,
+        )
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Result: {self.result}"
+        )
+        return self.result.plan
 
-    def dfs(self, state: State):
+    def dfs(self, state: State, depth=0):
         """
         Perform a depth-first search (DFS) from the given state.
 
+        Without a nogood cache every expanded state is kept in visited_states. With
+        one, only the states on the current path are kept, and a state is recorded
+        as a nogood when its subtree failed without relying on an ancestor that was
+        still open (the ancestor depths are tracked like Tarjan's lowlinks).
+
+        When resuming from a checkpoint, the saved path is followed first, and the
+        states whose fingerprints were saved count as visited, so the subtrees
+        finished before the checkpoint are not explored again.
+
         Args:
             state (State): The current state to explore.
+            depth (int, optional): The depth of the state in the search. Defaults to 0.
 
         Returns:
             bool: True if a solution is found, False otherwise.
@@ -113,34 +215,203 @@ class Planner:
                 f"{self.__class__.__name__}.{function_name}: Goal state reached! Solution found."
             )
             return True
-        self.visited_states.add(state)
+        self.statistics["expansions"] += 1
+        if self.limits is not None:
+            self.limits.check(self.statistics["expansions"])
+        expansions_before = self.statistics["expansions"]
+        lowlink = depth
+        if self.nogoods is None:
+            key = self._state_key(state)
+            self.visited_states.add(key)
+            if self.checkpoint is not None:
+                self.checkpoint.add_closed(self._fingerprint(key))
+                if self.checkpoint.due():
+                    self.checkpoint.save(
+                        self._identity(),
+                        [
+                            (str(name), {str(k): str(v) for k, v in step.items()})
+                            for name, step in state.plan
+                        ],
+                        self.statistics,
+                    )
+        else:
+            self._path_depths[self._state_key(state)] = depth
         self.logger.debug(
             f"{self.__class__.__name__}.{function_name}: Exploring state with {len(state.atoms)} atoms, visited states: {len(self.visited_states)}"
         )
-        for action in self.actions:
-            self.logger.debug("=====================================")
-            self.logger.debug(
-                f"{self.__class__.__name__}.{function_name}: Considering action: {action.name}"
+        successors = self.successors(state)
+        if self.pruning is not None:
+            successors = self.pruning.prune_successors(state, successors)
+        if self.ordering is not None:
+            successors = self.ordering.order(self, state, successors)
+        replayed = None
+        if depth < len(self._replay):
+            # Resuming: descend along the saved path first
+            replayed = self._replay_successor(successors, self._replay[depth])
+            successors.remove(replayed)
+            successors.insert(0, replayed)
+        elif self._replay:
+            self._replay = []
+        for successor in successors:
+            action, binding, new_state = successor
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: Applying action {action.name} with binding {binding}"
             )
-            for binding in self.get_applicable_bindings(action, state):
-                self.logger.info(
-                    f"{self.__class__.__name__}.{function_name}: Applying action {action.name} with binding {binding}"
+            key = self._state_key(new_state)
+            if successor is not replayed and (
+                key in self.visited_states
+                or (self._restored and self._fingerprint(key) in self._restored)
+            ):
+                self.statistics["duplicates"] += 1
+                self.logger.debug(
+                    f"{self.__class__.__name__}.{function_name}: State already visited, skipping"
                 )
-                new_state = self.apply_action(state, action, binding)
-                if new_state in self.visited_states:
+                continue
+            if self.nogoods is not None:
+                if key in self._path_depths:
+                    self.statistics["duplicates"] += 1
+                    lowlink = min(lowlink, self._path_depths[key])
+                    continue
+                if self.nogoods.prunes(new_state):
                     self.logger.debug(
-                        f"{self.__class__.__name__}.{function_name}: State already visited, skipping"
+                        f"{self.__class__.__name__}.{function_name}: State is a known dead end, skipping"
                     )
                     continue
-                new_state.plan.append((action.name, binding))
-                if self.dfs(new_state):
-                    return True
+            new_state.plan.append((action.name, binding))
+            if self.dfs(new_state, depth + 1):
+                return True
+            lowlink = min(lowlink, self._lowlink)
+        if self.nogoods is not None:
+            del self._path_depths[self._state_key(state)]
+            if lowlink >= depth:
+                self.nogoods.add(
+                    state, self.statistics["expansions"] - expansions_before + 1
+                )
+        self._lowlink = lowlink
         self.logger.debug(
             f"{self.__class__.__name__}.{function_name}: No solution found from this state, backtracking"
         )
         self.logger.debug("-------------------------------------")
         return False
 
+    def _restore(self):
+        """
+        Restore the statistics, visited fingerprints, and path of a checkpoint, if
+        the checkpoint resumes a previous run.
+        """
+        restored = self.checkpoint.restore(self._identity())
+        if restored is None:
+            return
+        path, statistics, self._restored = restored
+        self.statistics.update(statistics)
+        self._replay = path
+
+    def _replay_successor(self, successors, step):
+        """
+        Find the successor reached by a step of a saved path.
+
+        Args:
+            successors (list): The (action, binding, new_state) successors of the state.
+            step (tuple): The (action name, binding) of the step.
+
+        Returns:
+            tuple: The matching successor.
+
+        Raises:
+            ValueError: If no successor matches, i.e. the checkpoint belongs to
+                another version of the problem.
+        """
+        name, binding = step
+        for successor in successors:
+            if (
+                str(successor[0].name) == name
+                and {str(param): str(value) for param, value in successor[1].items()}
+                == binding
+            ):
+                return successor
+        raise ValueError(f"Checkpoint step {name} {binding} is not applicable")
+
+    def _identity(self):
+        """
+        Identify the search saved in checkpoints.
+
+        Returns:
+            tuple: The class, domain, and problem names.
+        """
+        return (self.__class__.__name__, str(self.domain.name), str(self.problem.name))
+
+    def _fingerprint(self, key):
+        """
+        Compute the process-independent fingerprint of a visited-state key.
+
+        Args:
+            key (object): The state, or its canonical representative (a tuple of atoms).
+
+        Returns:
+            int: The 64-bit fingerprint.
+        """
+        atoms = key.atoms if isinstance(key, State) else key
+        return fingerprint("\n".join(sorted(map(str, atoms))).encode())
+
+    def _state_key(self, state):
+        """
+        Get the key under which a state is stored for duplicate detection.
+
+        Args:
+            state (State): The state.
+
+        Returns:
+            object: The state itself, or its canonical representative when symmetries are used.
+        """
+        if self.symmetries is None:
+            return state
+        return self.symmetries.canonical(state)
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the nogood cache counters if enabled.
+        """
+        function_name = "_log_statistics"
+        if self.nogoods is not None:
+            self.statistics["nogoods_stored"] = len(self.nogoods)
+            self.statistics["nogood_hits"] = self.nogoods.hits
+            self.statistics["nogood_evictions"] = self.nogoods.evictions
+            self.statistics["expansions_saved"] = self.nogoods.expansions_saved
+        if self.symmetries is not None:
+            self.statistics["symmetry_group_order"] = self.symmetries.order
+            self.statistics["symmetry_generators"] = len(self.symmetries.generators)
+        if self.pruning is not None:
+            self.statistics["stubborn_generated"] = self.pruning.statistics["generated"]
+            self.statistics["stubborn_pruned"] = self.pruning.statistics["pruned"]
+            self.statistics["stubborn_enabled"] = self.pruning.enabled
+        for key, value in self.statistics.items():
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: {key}: {value}"
+            )
+
+    def successors(self, state):
+        """
+        Generate the successors of a state in action and binding order.
+
+        Args:
+            state (State): The state to expand.
+
+        Returns:
+            list: A list of (action, binding, new_state) tuples.
+        """
+        function_name = "successors"
+        successors = []
+        for action in self.actions:
+            self.logger.debug("=====================================")
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: Considering action: {action.name}"
+            )
+            for binding in self.get_applicable_bindings(action, state):
+                successors.append(
+                    (action, binding, self.apply_action(state, action, binding))
+                )
+        return successors
+
     def get_applicable_bindings(self, action, state):
         """
         Get all valid bindings for an action's parameters in the given state.
@@ -181,8 +452,21 @@ class Planner:
             f"{self.__class__.__name__}.{function_name}: Objects in the problem: {objects}"
         )
 
-        # Generate all possible bindings
-        all_bindings = self._generate_bindings(action.parameters, objects)
+        # Generate candidate bindings by matching the positive precondition atoms
+        # against the state, then enumerate the parameters they leave unbound
+        param_values = self._parameter_values(action.parameters, objects)
+        all_bindings = []
+        for partial in self._match_atoms(
+            self._positive_atoms(action.precondition),
+            self._index_atoms(state),
+            param_values,
+            {},
+        ):
+            remaining = [name for name in param_values if name not in partial]
+            for binding in self._generate_binding_combinations(
+                partial, param_values, remaining
+            ):
+                all_bindings.append({name: binding[name] for name in param_values})
         self.logger.debug(
             f"{self.__class__.__name__}.{function_name}: Generated {len(all_bindings)} possible bindings"
         )
@@ -204,11 +488,110 @@ class Planner:
                 )
                 valid_bindings.append(binding)
 
+        # Keep the order of a full enumeration over the problem objects
+        positions = {
+            name: {value: i for i, value in enumerate(values)}
+            for name, values in param_values.items()
+        }
+        valid_bindings.sort(
+            key=lambda binding: tuple(
+                positions[name][value] for name, value in binding.items()
+            )
+        )
         self.logger.debug(
             f"{self.__class__.__name__}.{function_name}: Found {len(valid_bindings)} valid bindings"
         )
         return valid_bindings
 
+    def _positive_atoms(self, precondition):
+        """
+        Collect the predicates that appear positively at the top level of a precondition.
+
+        Args:
+            precondition (Formula): The precondition of an action.
+
+        Returns:
+            list: The positive predicates of the top-level conjunction.
+        """
+        if isinstance(precondition, pddl.logic.Predicate):
+            return [precondition]
+        if isinstance(precondition, pddl.logic.base.And):
+            return [
+                op
+                for op in precondition.operands
+                if isinstance(op, pddl.logic.Predicate)
+            ]
+        return []
+
+    def _index_atoms(self, state):
+        """
+        Index the atoms of a state by predicate name.
+
+        Args:
+            state (State): The state to index.
+
+        Returns:
+            dict: A dictionary mapping predicate names to lists of argument-name tuples.
+        """
+        index = {}
+        for atom in state.atoms:
+            if isinstance(atom, pddl.logic.Predicate):
+                index.setdefault(atom.name, []).append(
+                    tuple(term.name for term in atom.terms)
+                )
+        return index
+
+    def _match_atoms(self, literals, index, param_values, binding):
+        """
+        Recursively join precondition predicates with the state atoms.
+
+        The predicate with the most bound arguments is matched first, so each join
+        step only considers the atoms consistent with the binding built so far.
+
+        Args:
+            literals (list): The predicates still to be matched.
+            index (dict): The state atoms indexed by predicate name.
+            param_values (dict): A dictionary mapping parameters to their possible values.
+            binding (dict): The current partial binding.
+
+        Returns:
+            list: A list of partial bindings (dictionaries) satisfying every literal.
+        """
+        if not literals:
+            return [binding]
+
+        def bound_terms(literal):
+            return sum(
+                not isinstance(term, pddl.logic.terms.Variable) or term.name in binding
+                for term in literal.terms
+            )
+
+        literal = max(literals, key=bound_terms)
+        rest = [other for other in literals if other is not literal]
+        bindings = []
+        for args in index.get(literal.name, []):
+            if len(args) != len(literal.terms):
+                continue
+            new_binding = binding
+            for term, value in zip(literal.terms, args):
+                if not isinstance(term, pddl.logic.terms.Variable):
+                    if term.name != value:
+                        break
+                elif term.name in new_binding:
+                    if new_binding[term.name] != value:
+                        break
+                elif term.name in param_values:
+                    if value not in param_values[term.name]:
+                        break
+                    if new_binding is binding:
+                        new_binding = binding.copy()
+                    new_binding[term.name] = value
+            else:
+                bindings.extend(
+                    self._match_atoms(rest, index, param_values, new_binding)
+                )
+        return bindings
+
     def _generate_bindings(self, parameters, objects):
         """
         Generate all possible bindings for the given parameters using the available objects.
@@ -220,12 +603,28 @@ class Planner:
         Returns:
             list: A list of all possible bindings (dictionaries).
         """
-        function_name = "_generate_bindings"
         """Generate all possible bindings for parameters"""
         if not parameters:
             return [{}]
 
-        # Get possible values for each parameter based on its type
+        # Generate all combinations
+        param_values = self._parameter_values(parameters, objects)
+        return self._generate_binding_combinations(
+            {}, param_values, list(param_values.keys())
+        )
+
+    def _parameter_values(self, parameters, objects):
+        """
+        Get the objects each parameter may be bound to, based on its type.
+
+        Args:
+            parameters (list): A list of parameters to bind.
+            objects (list): A list of objects available in the problem.
+
+        Returns:
+            dict: A dictionary mapping parameter names to lists of object names.
+        """
+        function_name = "_parameter_values"
         param_values = {}
         for param in parameters:
             self.logger.debug(
@@ -235,11 +634,7 @@ class Planner:
             param_values[param.name] = [
                 obj.name for obj in objects if obj.type_tags == param_type
             ]
-
-        # Generate all combinations
-        return self._generate_binding_combinations(
-            {}, param_values, list(param_values.keys())
-        )
+        return param_values
 
     def _generate_binding_combinations(
         self, current_binding, param_values, remaining_params
@@ -289,6 +684,10 @@ class Planner:
             return pddl.logic.base.And(
                 *[self._substitute(op, binding) for op in formula.operands]
             )
+        elif isinstance(formula, pddl.logic.base.Or):
+            return pddl.logic.base.Or(
+                *[self._substitute(op, binding) for op in formula.operands]
+            )
         elif isinstance(formula, pddl.logic.base.Not):
             return pddl.logic.base.Not(self._substitute(formula.argument, binding))
         elif isinstance(formula, pddl.logic.Predicate):
@@ -327,6 +726,12 @@ class Planner:
                 f"{self.__class__.__name__}.{function_name}: AND formula evaluated to {result}"
             )
             return result
+        elif isinstance(formula, pddl.logic.base.Or):
+            result = any(self.holds(op, state) for op in formula.operands)
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: OR formula evaluated to {result}"
+            )
+            return result
         elif isinstance(formula, pddl.logic.base.Not):
             result = not self.holds(formula.argument, state)
             self.logger.debug(
@@ -334,6 +739,10 @@ class Planner:
             )
             return result
 
+        # Fully grounded predicates can be looked up directly
+        if all(isinstance(arg, pddl.logic.terms.Constant) for arg in formula.terms):
+            return formula in state.atoms
+
         for atom in state.atoms:
             if isinstance(atom, pddl.logic.Predicate) and atom.name == formula.name:
                 # Check if all arguments match
@@ -349,6 +758,32 @@ class Planner:
                     return True
         return False
 
+    def validate(self, plan):
+        """
+        Replay a plan from the initial state.
+
+        Args:
+            plan (list): A sequence of (action name, binding) pairs.
+
+        Returns:
+            bool: True if each action is applicable in turn and the final state
+                satisfies the goal, False otherwise.
+        """
+        function_name = "validate"
+        actions = {action.name: action for action in self.actions}
+        state = self.initial_state
+        for i, (name, binding) in enumerate(plan):
+            action = actions.get(name)
+            if action is None or not self.holds(
+                self._substitute(action.precondition, binding), state
+            ):
+                self.logger.info(
+                    f"{self.__class__.__name__}.{function_name}: Step {i + 1} ({name} {binding}) is not applicable"
+                )
+                return False
+            state = self.apply_action(state, action, binding)
+        return state.satisfies(self.goal)
+
     def apply_action(self, state, action, binding):
         """
         Apply an action with a given binding to a state, producing a new state.
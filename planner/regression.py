@@ -0,0 +1,398 @@
+"""
+regression.py
+
+This module defines backward search engines over the grounded Task of task.py:
+RegressionSearch, which searches from the goal towards the initial state over
+partial states, and BidirectionalSearch, which grows a forward and a backward
+frontier until they meet.
+
+A partial state is a pair of bitsets (pos, neg): the facts that must be true and
+the facts that must be false, with every other fact left open. The goal is the
+partial state (goal, goal_neg). Regressing a partial state through an operator
+that achieves part of it and does not undo any of it gives the partial state
+that must hold before the operator:
+
+    pos' = (pos - add) | pre        neg' = (neg - delete) | neg(op)
+
+Regression ignores which combinations of facts are reachable, so it may create
+partial states no real state satisfies, e.g. (current v1) and (current v2)
+together. Those are pruned with the mutex groups found by FiniteDomainVariables
+(see pattern_database.py): a partial state requiring two values of the same
+variable is inconsistent.
+
+A full state s satisfies (pos, neg) when s & (pos | neg) == pos. The
+bidirectional search joins its frontiers on this test with hash tables: the
+backward partial states are grouped by the facts they mention, m = pos | neg,
+and indexed by pos; a forward state s is looked up in each group under the key
+s & m, its fingerprint projected on the group's facts.
+"""
+
+import heapq
+import itertools
+from collections import deque
+
+from pattern_database import FiniteDomainVariables
+from search import SearchEngine, extract_plan
+
+
+class Regression:
+    """
+    Regression of partial states through the operators of a grounded task.
+
+    Attributes:
+        task (Task): The grounded task.
+        goal (tuple): The goal as a (pos, neg) partial state.
+        statistics (dict): Counters for the inconsistent partial states pruned.
+    """
+
+    def __init__(self, task):
+        """
+        Index the operators of a task by the facts they add and delete.
+
+        Args:
+            task (Task): The grounded task.
+        """
+        self.task = task
+        self.goal = (task.goal, task.goal_neg)
+        self.statistics = {"mutex_pruned": 0}
+        self._deleters = [[] for _ in task.facts]
+        for op in task.operators:
+            for fact in op.del_facts:
+                self._deleters[fact].append(op)
+        variables = FiniteDomainVariables(task)
+        self._mutexes = [
+            sum(1 << fact for fact in facts)
+            for facts in variables.variables
+            if len(facts) > 1
+        ]
+
+    def relevant(self, partial):
+        """
+        Get the operators that achieve part of a partial state.
+
+        Args:
+            partial (tuple): The (pos, neg) partial state.
+
+        Returns:
+            list: The operators adding a fact of pos or deleting a fact of neg, in
+                operator order.
+        """
+        pos, neg = partial
+        operators = {}
+        for fact in self.task.state_facts(pos):
+            for op in self.task.achievers[fact]:
+                operators[op.id] = op
+        for fact in self.task.state_facts(neg):
+            for op in self._deleters[fact]:
+                operators[op.id] = op
+        return [operators[key] for key in sorted(operators)]
+
+    def regress(self, partial, op):
+        """
+        Regress a partial state through an operator.
+
+        Args:
+            partial (tuple): The (pos, neg) partial state.
+            op (Operator): An operator relevant to the partial state.
+
+        Returns:
+            tuple: The (pos, neg) partial state before the operator, or None if the
+                operator undoes part of the partial state or the result is inconsistent.
+        """
+        pos, neg = partial
+        if op.delete & pos or op.add & neg:
+            return None
+        new_pos = (pos & ~op.add) | op.pre
+        new_neg = (neg & ~op.delete) | op.neg
+        if new_pos & new_neg:
+            return None
+        for mutex in self._mutexes:
+            if (new_pos & mutex).bit_count() > 1:
+                self.statistics["mutex_pruned"] += 1
+                return None
+        return new_pos, new_neg
+
+    def satisfies(self, state, partial):
+        """
+        Check whether a full state satisfies a partial state.
+
+        Args:
+            state (int): The state bitset.
+            partial (tuple): The (pos, neg) partial state.
+
+        Returns:
+            bool: True if every fact of pos holds and no fact of neg holds.
+        """
+        pos, neg = partial
+        return state & (pos | neg) == pos
+
+    def distance(self, partial):
+        """
+        Count the literals of a partial state the initial state does not satisfy.
+
+        Args:
+            partial (tuple): The (pos, neg) partial state.
+
+        Returns:
+            int: The number of facts of pos false and of neg true initially.
+        """
+        pos, neg = partial
+        initial = self.task.initial_state
+        return (pos & ~initial).bit_count() + (neg & initial).bit_count()
+
+
+def extract_backward_plan(children, partial):
+    """
+    Follow child pointers from a partial state to the goal.
+
+    Args:
+        children (dict): Maps partial states to (successor partial state, operator),
+            or None for the goal.
+        partial (tuple): The partial state to start from.
+
+    Returns:
+        list: The operators leading from the partial state to the goal.
+    """
+    plan = []
+    while children[partial] is not None:
+        partial, op = children[partial]
+        plan.append(op)
+    return plan
+
+
+class RegressionSearch(SearchEngine):
+    """
+    Greedy best-first search backwards from the goal over partial states.
+
+    Partial states are ordered by the number of their literals the initial state
+    does not satisfy, then by their distance from the goal.
+
+    Attributes:
+        regression (Regression): The regression operator.
+    """
+
+    def __init__(self, task, limits=None, logger=None):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task; it must not be lazy.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(task, limits=limits, logger=logger)
+        self.regression = Regression(task)
+
+    def search(self):
+        """
+        Run the backward search.
+
+        Returns:
+            list: The operators of a plan, or None if no solution exists.
+        """
+        regression = self.regression
+        goal = regression.goal
+        counter = itertools.count()
+        children = {goal: None}
+        open_list = [(regression.distance(goal), 0, next(counter), goal)]
+        while open_list:
+            _, g, _, partial = heapq.heappop(open_list)
+            if regression.satisfies(self.task.initial_state, partial):
+                return extract_backward_plan(children, partial)
+            for op, parent in self.regressions(partial):
+                if parent in children:
+                    self.statistics["duplicates"] += 1
+                    continue
+                children[parent] = (partial, op)
+                heapq.heappush(
+                    open_list,
+                    (regression.distance(parent), g + 1, next(counter), parent),
+                )
+        return None
+
+    def regressions(self, partial):
+        """
+        Expand a partial state backwards.
+
+        Args:
+            partial (tuple): The (pos, neg) partial state.
+
+        Returns:
+            list: A list of (operator, regressed partial state) tuples, in operator order.
+
+        Raises:
+            LimitExceeded: If a resource limit is exceeded.
+        """
+        self.statistics["expansions"] += 1
+        self._check_limits()
+        result = []
+        for op in self.regression.relevant(partial):
+            parent = self.regression.regress(partial, op)
+            if parent is not None:
+                result.append((op, parent))
+        self.statistics["generated"] += len(result)
+        return result
+
+    def _check_limits(self):
+        """
+        Check the resource limits, if any.
+
+        Raises:
+            LimitExceeded: If a resource limit is exceeded.
+        """
+        if self.limits is not None:
+            self.limits.check(self.statistics["expansions"])
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the inconsistent partial states pruned.
+        """
+        self.statistics.update(self.regression.statistics)
+        super()._log_statistics()
+
+
+class BidirectionalSearch(RegressionSearch):
+    """
+    Breadth-first search from both ends, joining the frontiers on state fingerprints.
+
+    Each step expands a whole layer of the smaller frontier. Every new forward
+    state is probed against the backward partial states, and every new layer of
+    partial states is probed with the forward states already reached, so the two
+    searches stop as soon as a forward state satisfies a backward partial state.
+
+    Attributes:
+        regression (Regression): The regression operator.
+    """
+
+    def __init__(self, task, pruning=None, limits=None, logger=None):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task; it must not be lazy.
+            pruning (StubbornSetPruning, optional): A pruning of the forward successors. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(task, limits=limits, logger=logger)
+        self.pruning = pruning
+        self.statistics["forward_expansions"] = 0
+        self.statistics["backward_expansions"] = 0
+
+    def search(self):
+        """
+        Run the bidirectional search.
+
+        Returns:
+            list: The operators of a plan, or None if no solution exists.
+        """
+        initial = self.task.initial_state
+        goal = self.regression.goal
+        parents = {initial: None}
+        children = {goal: None}
+        # Backward partial states grouped by mentioned facts, then indexed by pos
+        index = {}
+        self._index(index, goal)
+        forward = deque([initial])
+        backward = deque([goal])
+        meeting = self._probe(index, initial)
+        while meeting is None and forward and backward:
+            if len(forward) <= len(backward):
+                meeting = self._forward_layer(forward, parents, index)
+            else:
+                meeting = self._backward_layer(backward, children, index, parents)
+        if meeting is None:
+            return None
+        state, partial = meeting
+        return extract_plan(parents, state) + extract_backward_plan(children, partial)
+
+    def _forward_layer(self, frontier, parents, index):
+        """
+        Expand every state of the forward frontier.
+
+        Args:
+            frontier (deque): The forward frontier, replaced by the next layer.
+            parents (dict): The forward parent pointers.
+            index (dict): The backward partial states, see _index.
+
+        Returns:
+            tuple: A (forward state, backward partial state) meeting pair, or None.
+        """
+        for _ in range(len(frontier)):
+            state = frontier.popleft()
+            self.statistics["expansions"] += 1
+            self.statistics["forward_expansions"] += 1
+            for op, child in self.successors(state):
+                if child in parents:
+                    self.statistics["duplicates"] += 1
+                    continue
+                parents[child] = (state, op)
+                partial = self._probe(index, child)
+                if partial is not None:
+                    return partial
+                frontier.append(child)
+        return None
+
+    def _backward_layer(self, frontier, children, index, parents):
+        """
+        Expand every partial state of the backward frontier.
+
+        Args:
+            frontier (deque): The backward frontier, replaced by the next layer.
+            children (dict): The backward child pointers.
+            index (dict): The backward partial states, see _index.
+            parents (dict): The forward parent pointers, whose keys are the forward
+                states reached.
+
+        Returns:
+            tuple: A (forward state, backward partial state) meeting pair, or None.
+        """
+        layer = {}
+        for _ in range(len(frontier)):
+            partial = frontier.popleft()
+            self.statistics["backward_expansions"] += 1
+            for op, parent in self.regressions(partial):
+                if parent in children:
+                    self.statistics["duplicates"] += 1
+                    continue
+                children[parent] = (partial, op)
+                self._index(layer, parent)
+                frontier.append(parent)
+        for mask, group in layer.items():
+            self._check_limits()
+            for state in parents:
+                partial = group.get(state & mask)
+                if partial is not None:
+                    return state, partial
+        for mask, group in layer.items():
+            index.setdefault(mask, {}).update(group)
+        return None
+
+    def _index(self, index, partial):
+        """
+        Add a partial state to a join index.
+
+        Args:
+            index (dict): Maps masks of mentioned facts to dictionaries mapping pos
+                bitsets to partial states.
+            partial (tuple): The (pos, neg) partial state.
+        """
+        pos, neg = partial
+        index.setdefault(pos | neg, {}).setdefault(pos, partial)
+
+    def _probe(self, index, state):
+        """
+        Find a backward partial state satisfied by a forward state.
+
+        Args:
+            index (dict): The backward partial states, see _index.
+            state (int): The forward state bitset.
+
+        Returns:
+            tuple: A (state, partial state) meeting pair, or None.
+        """
+        for mask, group in index.items():
+            partial = group.get(state & mask)
+            if partial is not None:
+                return state, partial
+        return None
@@ -0,0 +1,428 @@
+"""
+runner.py
+
+This module defines the PlannerJob, PlannerRun, and PlannerRunner classes, which
+run external planners (FF, Fast Downward, LPG-td) and the planner of this
+directory as subprocesses with asyncio.
+
+Each job runs in its own session, hence in its own process group, so that a
+timeout or a cancellation kills the planner together with the processes it
+started (the Fast Downward driver runs the translator and the search as child
+processes): the group gets SIGTERM, then SIGKILL after a grace period. The
+address space of a planner is limited with resource.setrlimit(RLIMIT_AS) in the
+child process before the planner is executed, so a planner exceeding its memory
+limit fails to allocate and exits with an error instead of exhausting the
+machine. A semaphore bounds the number of planners running at the same time.
+
+A job can also receive the standard output of its planner line by line, as it
+is produced (see plan_stream.py). The planner then runs under stdbuf -oL, when
+available, as C programs such as FF only flush their output line by line when
+it goes to a terminal.
+
+The planners are looked up on the PATH unless an executable is given, which
+also lets a stub script stand in for a planner:
+
+    python runner.py -d domain.pddl -p problem.pddl --planner ff --executable ./stub.sh
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import shutil
+import signal
+import sys
+import time
+
+from limits import TIME_LIMIT
+
+FINISHED = "finished"
+ERROR = "error"
+
+# The default executable and the arguments of each planner
+PLANNERS = {
+    "ff": ("ff", ["{domain}", "{problem}"]),
+    "fast-downward": (
+        "fast-downward.py",
+        ["--alias", "lama-first", "{domain}", "{problem}"],
+    ),
+    "lpg-td": ("lpg-td", ["-o", "{domain}", "-f", "{problem}", "-n", "1"]),
+    "internal": (
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "dfs_planner.py"),
+        ["-d", "{domain}", "-p", "{problem}"],
+    ),
+}
+
+
+def planner_command(planner, domain, problem, executable=None):
+    """
+    Build the command line running a planner on a problem.
+
+    Args:
+        planner (str): A key of PLANNERS.
+        domain (str): The path of the domain file.
+        problem (str): The path of the problem file.
+        executable (str, optional): The executable to run instead of the default one
+            of the planner. Defaults to None.
+
+    Returns:
+        list: The command line; Python scripts are run with the current interpreter.
+    """
+    default, arguments = PLANNERS[planner]
+    executable = executable or default
+    command = [executable] + [
+        argument.format(domain=domain, problem=problem) for argument in arguments
+    ]
+    if executable.endswith(".py"):
+        command.insert(0, sys.executable)
+    return command
+
+
+def _address_space_limit(memory_limit):
+    """
+    Build the function limiting the address space of a child process.
+
+    Args:
+        memory_limit (float): The limit in megabytes, or None.
+
+    Returns:
+        callable: The function to run in the child before the planner, or None.
+    """
+    if memory_limit is None:
+        return None
+    size = int(memory_limit * (1 << 20))
+
+    def limit():
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    return limit
+
+
+class PlannerJob:
+    """
+    A planner command line with its limits.
+
+    Attributes:
+        command (list): The command line.
+        timeout (float): The wall-clock limit in seconds, or None.
+        memory_limit (float): The address-space limit in megabytes, or None.
+        cwd (str): The working directory of the planner, or None for the current one.
+        name (str): A name for the logs and reports.
+        on_line (callable): The function called with each line of the standard
+            output as soon as it is read, or None.
+    """
+
+    def __init__(
+        self,
+        command,
+        timeout=None,
+        memory_limit=None,
+        cwd=None,
+        name=None,
+        on_line=None,
+    ):
+        """
+        Initialize the job.
+
+        Args:
+            command (list): The command line.
+            timeout (float, optional): The wall-clock limit in seconds. Defaults to None.
+            memory_limit (float, optional): The address-space limit in megabytes. Defaults to None.
+            cwd (str, optional): The working directory of the planner. Defaults to None.
+            name (str, optional): A name for the logs and reports. Defaults to the command line.
+            on_line (callable, optional): The function called with each line of the
+                standard output, without its line break. Defaults to None.
+        """
+        self.command = command
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.cwd = cwd
+        self.name = name or " ".join(command)
+        self.on_line = on_line
+
+
+class PlannerRun:
+    """
+    The outcome of a job.
+
+    Attributes:
+        job (PlannerJob): The job.
+        status (str): FINISHED (exit status 0), ERROR (the planner could not be
+            started or exited with another status), or TIME_LIMIT.
+        returncode (int): The exit status of the planner, negative for a signal, or
+            None if it could not be started.
+        stdout (str): The standard output, up to the end of the planner.
+        stderr (str): The standard error, or the reason the planner could not be started.
+        elapsed (float): The wall-clock time of the planner in seconds.
+    """
+
+    def __init__(self, job, status, returncode, stdout, stderr, elapsed):
+        """
+        Initialize the outcome.
+
+        Args:
+            job (PlannerJob): The job.
+            status (str): The termination status.
+            returncode (int): The exit status, or None.
+            stdout (str): The standard output.
+            stderr (str): The standard error.
+            elapsed (float): The wall-clock time in seconds.
+        """
+        self.job = job
+        self.status = status
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.elapsed = elapsed
+
+    def __str__(self):
+        return f"{self.job.name}: {self.status} (exit status {self.returncode}, {self.elapsed:.2f} s, {len(self.stdout)} characters of output)"
+
+
+class PlannerRunner:
+    """
+    Run planner jobs concurrently, with at most max_concurrent at a time.
+
+    Attributes:
+        max_concurrent (int): The largest number of planners running at once.
+        grace_period (float): The number of seconds between SIGTERM and SIGKILL.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, max_concurrent=None, grace_period=1.0, logger=None):
+        """
+        Initialize the runner.
+
+        Args:
+            max_concurrent (int, optional): The largest number of planners running at
+                once. Defaults to the number of CPUs.
+            grace_period (float, optional): The number of seconds between SIGTERM and
+                SIGKILL. Defaults to 1.0.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.grace_period = grace_period
+        self.logger = logger or logging.getLogger(__name__)
+        self._semaphore = None
+
+    async def run(self, job):
+        """
+        Run a job once a slot is free.
+
+        If the calling task is cancelled, the process group of the planner is killed
+        before the cancellation propagates.
+
+        Args:
+            job (PlannerJob): The job.
+
+        Returns:
+            PlannerRun: The outcome of the job.
+        """
+        function_name = "run"
+        if self._semaphore is None:
+            # Created here to belong to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            self.logger.debug(
+                f"{self.__class__.__name__}.{function_name}: Starting {job.name}"
+            )
+            command, environment = job.command, None
+            if job.on_line is not None:
+                # Ask the planner to flush its output at each line
+                environment = dict(os.environ, PYTHONUNBUFFERED="1")
+                if shutil.which("stdbuf"):
+                    command = ["stdbuf", "-oL"] + command
+            start = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=job.cwd,
+                    env=environment,
+                    start_new_session=True,
+                    preexec_fn=_address_space_limit(job.memory_limit),
+                )
+            except OSError as e:
+                self.logger.warning(
+                    f"{self.__class__.__name__}.{function_name}: Cannot start {job.name}: {e}"
+                )
+                return PlannerRun(job, ERROR, None, "", str(e), 0.0)
+            stdout, stderr = [], []
+            finished = asyncio.ensure_future(
+                asyncio.gather(
+                    self._read(process.stdout, stdout, job.on_line),
+                    self._read(process.stderr, stderr, None),
+                    process.wait(),
+                )
+            )
+            try:
+                # The shield keeps the output read so far when the timeout expires
+                await asyncio.wait_for(asyncio.shield(finished), job.timeout)
+                status = FINISHED if process.returncode == 0 else ERROR
+            except asyncio.TimeoutError:
+                status = TIME_LIMIT
+                await self._kill(process)
+                await finished
+            except BaseException:
+                # Cancelled, or the line callback failed
+                await self._kill(process)
+                finished.cancel()
+                raise
+            run = PlannerRun(
+                job,
+                status,
+                process.returncode,
+                b"".join(stdout).decode(errors="replace"),
+                b"".join(stderr).decode(errors="replace"),
+                time.monotonic() - start,
+            )
+            self.logger.info(f"{self.__class__.__name__}.{function_name}: {run}")
+            return run
+
+    async def run_all(self, jobs):
+        """
+        Run jobs concurrently.
+
+        Args:
+            jobs (list): The jobs.
+
+        Returns:
+            list: The outcome of each job, in the order of the jobs.
+        """
+        return await asyncio.gather(*(self.run(job) for job in jobs))
+
+    def run_jobs(self, jobs):
+        """
+        Run jobs concurrently from synchronous code.
+
+        Args:
+            jobs (list): The jobs.
+
+        Returns:
+            list: The outcome of each job, in the order of the jobs.
+        """
+        self._semaphore = None
+        return asyncio.run(self.run_all(jobs))
+
+    async def _read(self, stream, chunks, on_line):
+        """
+        Read a stream to its end.
+
+        Args:
+            stream (StreamReader): The stream.
+            chunks (list): The list to which the chunks read are appended.
+            on_line (callable): The function called with each complete line, or None.
+        """
+        pending = b""
+        while True:
+            chunk = await stream.read(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if on_line is not None:
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    on_line(line.decode(errors="replace"))
+        if on_line is not None and pending:
+            on_line(pending.decode(errors="replace"))
+
+    async def _kill(self, process):
+        """
+        Terminate the process group of a planner: SIGTERM, then SIGKILL for the
+        processes still running after the grace period.
+
+        Args:
+            process (Process): The planner, leader of its process group.
+        """
+        function_name = "_kill"
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Terminating process group {process.pid}"
+        )
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                break
+            if sig == signal.SIGTERM:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(process.wait()), self.grace_period
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        await process.wait()
+
+
+def run_planner_job(job):
+    """
+    Run a single job from synchronous code.
+
+    Args:
+        job (PlannerJob): The job.
+
+    Returns:
+        PlannerRun: The outcome of the job.
+    """
+    return PlannerRunner(max_concurrent=1).run_jobs([job])[0]
+
+
+if __name__ == "__main__":
+    apr = argparse.ArgumentParser(
+        description="Run a planner on several problems concurrently",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    apr.add_argument("-d", "--domain", type=str, help="Path to the domain file")
+    apr.add_argument(
+        "-p", "--problem", type=str, nargs="+", help="Paths to the problem files"
+    )
+    apr.add_argument(
+        "--planner", choices=sorted(PLANNERS), default="ff", help="Planner to run"
+    )
+    apr.add_argument(
+        "--executable",
+        type=str,
+        default=None,
+        help="Executable run instead of the default one of the planner, e.g. a stub",
+    )
+    apr.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Wall-clock limit per problem in seconds",
+    )
+    apr.add_argument(
+        "--memory-limit",
+        type=float,
+        default=None,
+        help="Address-space limit per planner in megabytes",
+    )
+    apr.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Largest number of planners running at once (default: number of CPUs)",
+    )
+    apr.add_argument(
+        "-v", "--verbose", action="store_true", help="Print the output of each planner"
+    )
+    args = apr.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    jobs = [
+        PlannerJob(
+            planner_command(args.planner, args.domain, problem, args.executable),
+            timeout=args.timeout,
+            memory_limit=args.memory_limit,
+            name=f"{args.planner} {problem}",
+        )
+        for problem in args.problem
+    ]
+    for run in PlannerRunner(max_concurrent=args.jobs).run_jobs(jobs):
+        print(run)
+        if args.verbose:
+            print(run.stdout)
@@ -0,0 +1,352 @@
+"""
+satplan.py
+
+This module defines the SatPlanner class, which solves the grounded Task of
+task.py as a sequence of satisfiability problems, one per horizon, with the
+CDCL solver of cdcl.py.
+
+The formula for horizon T has a variable for each fact at each time 0..T and for
+each operator at each step 0..T-1:
+
+- The initial state fixes the facts at time 0.
+- An operator at step t implies its preconditions at time t and its effects at
+  time t + 1.
+- Explanatory frame axioms: a fact that changes between t and t + 1 was added
+  (or deleted) by an operator at step t.
+- The goal holds at time T.
+- At most one value of each finite-domain variable found by
+  FiniteDomainVariables (see pattern_database.py) holds at each time. These
+  invariants are implied by the other clauses, but they let the solver refute
+  short horizons much faster.
+
+Steps use the ∃-step parallel semantics: several operators may share a step
+when executing them in operator order is possible, i.e. no operator deletes a
+precondition (or adds a negative precondition) of a later one in the same step.
+This is encoded in linear size with a chain of auxiliary variables per fact and
+step, which is true from the first selected operator that deletes the fact on.
+Parallel steps make the horizon much shorter than the plan where operators are
+independent.
+
+Operators and facts that are not reachable within t steps of the relaxed
+planning graph are left out of step t, and no solver call is made for horizons
+shorter than the relaxed distance of the goal.
+
+The horizons are solved incrementally with the same solver: the clauses of step
+T - 1 are added to those of the previous horizons, the goal clauses of horizon
+T are guarded by an activation variable that is assumed by the solver call and
+disabled afterwards, and the clauses learned for earlier horizons are kept.
+"""
+
+from cdcl import CDCLSolver, SAT
+from pattern_database import FiniteDomainVariables
+from search import SearchEngine
+
+
+class SatPlanner(SearchEngine):
+    """
+    Planning as satisfiability with ∃-step semantics and incremental horizons.
+
+    Attributes:
+        max_horizon (int): The largest horizon tried, or None for no limit.
+        horizon (int): The last horizon tried.
+        solver (CDCLSolver): The incremental SAT solver.
+    """
+
+    complete = False
+    PAIRWISE_LIMIT = 6
+
+    def __init__(self, task, max_horizon=None, limits=None, logger=None):
+        """
+        Initialize the planner.
+
+        Args:
+            task (Task): The grounded task; it must not be lazy.
+            max_horizon (int, optional): The largest horizon tried. Defaults to None (no limit).
+            limits (ResourceLimits, optional): Limits checked at every conflict of the
+                solver, which counts as an expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(task, limits=limits, logger=logger)
+        self.max_horizon = max_horizon
+        self.horizon = 0
+        self.solver = CDCLSolver(logger=self.logger)
+        # Variables of the facts at each time and of the operators at each step
+        self._facts = []
+        self._operators = []
+        self._fact_layer, self._operator_layer = self._relaxed_layers()
+        self._mutexes = [
+            facts for facts in FiniteDomainVariables(task).variables if len(facts) > 1
+        ]
+        # For each fact, the operators needing it true and false
+        self._requirers = [[] for _ in task.facts]
+        self._neg_requirers = [[] for _ in task.facts]
+        for op in task.operators:
+            for fact in op.pre_facts:
+                self._requirers[fact].append(op)
+            for fact in op.neg_facts:
+                self._neg_requirers[fact].append(op)
+
+    def search(self):
+        """
+        Solve increasing horizons until a plan is found.
+
+        Returns:
+            list: The operators of a plan, or None if max_horizon was reached or the
+                goal is not reachable.
+        """
+        function_name = "search"
+        task = self.task
+        goal_facts = task.state_facts(task.goal)
+        if any(fact not in self._fact_layer for fact in goal_facts):
+            return None
+        first = max((self._fact_layer[fact] for fact in goal_facts), default=0)
+        self._encode_initial()
+        while self.max_horizon is None or self.horizon <= self.max_horizon:
+            self._check(self.solver.statistics["conflicts"])
+            if self.horizon > 0:
+                self._encode_step(self.horizon - 1)
+            if self.horizon >= first:
+                self.statistics["horizons"] = self.statistics.get("horizons", 0) + 1
+                activation = self._encode_goal(self.horizon)
+                status = self.solver.solve([activation], check=self._check)
+                self.logger.info(
+                    f"{self.__class__.__name__}.{function_name}: Horizon {self.horizon}: {'satisfiable' if status == SAT else 'unsatisfiable'} ({self.solver.num_vars} variables, {self.solver.statistics['conflicts']} conflicts so far)"
+                )
+                if status == SAT:
+                    return self._decode()
+                self.solver.add_clause([-activation])
+            self.horizon += 1
+        return None
+
+    def _relaxed_layers(self):
+        """
+        Compute the first layer of the relaxed planning graph at which each fact
+        and operator appears, ignoring deletes and negative preconditions.
+
+        Returns:
+            tuple: (dictionary mapping fact ids to layers, dictionary mapping operator
+                ids to layers).
+        """
+        task = self.task
+        reached = task.initial_state
+        fact_layer = {fact: 0 for fact in task.state_facts(reached)}
+        operator_layer = {}
+        pending = list(task.operators)
+        layer = 0
+        while pending:
+            added = 0
+            waiting = []
+            for op in pending:
+                if reached & op.pre == op.pre:
+                    operator_layer[op.id] = layer
+                    added |= op.add
+                else:
+                    waiting.append(op)
+            added &= ~reached
+            if not added:
+                break
+            layer += 1
+            for fact in task.state_facts(added):
+                fact_layer[fact] = layer
+            reached |= added
+            pending = waiting
+        return fact_layer, operator_layer
+
+    def _encode_initial(self):
+        """
+        Create the fact variables of time 0 and fix them to the initial state.
+        """
+        self._facts.append(self._new_facts(0))
+        initial = self.task.initial_state
+        for fact, variable in enumerate(self._facts[0]):
+            self.solver.add_clause([variable if initial >> fact & 1 else -variable])
+
+    def _new_facts(self, time):
+        """
+        Create the fact variables of a time, fixing the facts not reachable by then
+        to false.
+
+        Args:
+            time (int): The time.
+
+        Returns:
+            list: The variable of each fact.
+        """
+        variables = []
+        for fact in range(len(self.task.facts)):
+            variable = self.solver.new_var()
+            if self._fact_layer.get(fact, time + 1) > time:
+                self.solver.add_clause([-variable])
+            variables.append(variable)
+        for facts in self._mutexes:
+            self._at_most_one([variables[fact] for fact in facts])
+        return variables
+
+    def _at_most_one(self, variables):
+        """
+        Add clauses allowing at most one of some variables to be true.
+
+        Small groups are encoded pairwise, larger ones with a sequential counter of
+        len(variables) - 1 auxiliary variables, each true when one of the variables
+        up to it is.
+
+        Args:
+            variables (list): The variables.
+        """
+        solver = self.solver
+        if len(variables) <= self.PAIRWISE_LIMIT:
+            for i, first in enumerate(variables):
+                for second in variables[i + 1 :]:
+                    solver.add_clause([-first, -second])
+            return
+        previous = None
+        for variable in variables[:-1]:
+            counter = solver.new_var()
+            solver.add_clause([-variable, counter])
+            if previous is not None:
+                solver.add_clause([-previous, counter])
+                solver.add_clause([-previous, -variable])
+            previous = counter
+        solver.add_clause([-previous, -variables[-1]])
+
+    def _encode_step(self, step):
+        """
+        Add the operators of a step and the facts of the time after it.
+
+        Args:
+            step (int): The step, from time step to time step + 1.
+        """
+        solver = self.solver
+        before = self._facts[step]
+        after = self._new_facts(step + 1)
+        self._facts.append(after)
+        operators = {
+            op.id: solver.new_var()
+            for op in self.task.operators
+            if self._operator_layer.get(op.id, step + 1) <= step
+        }
+        self._operators.append(operators)
+        adders = [[] for _ in self.task.facts]
+        deleters = [[] for _ in self.task.facts]
+        for op in self.task.operators:
+            variable = operators.get(op.id)
+            if variable is None:
+                continue
+            for fact in op.pre_facts:
+                solver.add_clause([-variable, before[fact]])
+            for fact in op.neg_facts:
+                solver.add_clause([-variable, -before[fact]])
+            for fact in op.add_facts:
+                solver.add_clause([-variable, after[fact]])
+                adders[fact].append(op)
+            for fact in op.del_facts:
+                solver.add_clause([-variable, -after[fact]])
+                deleters[fact].append(op)
+        for fact in range(len(self.task.facts)):
+            solver.add_clause(
+                [-before[fact], after[fact]]
+                + [operators[op.id] for op in deleters[fact]]
+            )
+            solver.add_clause(
+                [before[fact], -after[fact]] + [operators[op.id] for op in adders[fact]]
+            )
+            # ∃-step: no operator may disable a later operator of the same step
+            self._encode_chain(operators, deleters[fact], self._requirers[fact])
+            self._encode_chain(operators, adders[fact], self._neg_requirers[fact])
+
+    def _encode_chain(self, operators, disablers, requirers):
+        """
+        Forbid an operator of a step from being disabled by an earlier one.
+
+        Args:
+            operators (dict): The variables of the operators of the step, by id.
+            disablers (list): The operators of the step that falsify a literal.
+            requirers (list): The operators that need the literal.
+        """
+        if not disablers:
+            return
+        solver = self.solver
+        disabler_ids = {op.id for op in disablers}
+        required_ids = {op.id for op in requirers if op.id in operators}
+        last = max(required_ids, default=-1)
+        # True when an operator disabling the literal was selected earlier in the step
+        earlier = None
+        for index in sorted(disabler_ids | required_ids):
+            if index > last:
+                break
+            variable = operators[index]
+            if earlier is not None and index in required_ids:
+                solver.add_clause([-earlier, -variable])
+            if index in disabler_ids and index != last:
+                chained = solver.new_var()
+                solver.add_clause([-variable, chained])
+                if earlier is not None:
+                    solver.add_clause([-earlier, chained])
+                earlier = chained
+
+    def _encode_goal(self, horizon):
+        """
+        Add the goal clauses of a horizon, guarded by a fresh activation variable.
+
+        Args:
+            horizon (int): The horizon.
+
+        Returns:
+            int: The activation variable.
+        """
+        task = self.task
+        facts = self._facts[horizon]
+        activation = self.solver.new_var()
+        for fact in task.state_facts(task.goal):
+            self.solver.add_clause([-activation, facts[fact]])
+        for fact in task.state_facts(task.goal_neg):
+            self.solver.add_clause([-activation, -facts[fact]])
+        return activation
+
+    def _decode(self):
+        """
+        Read the plan from the model, ordering each step by operator id.
+
+        Returns:
+            list: The operators of the plan.
+
+        Raises:
+            RuntimeError: If the model does not describe a valid plan, which would be a
+                bug of the encoding or of the solver.
+        """
+        plan = []
+        state = self.task.initial_state
+        for operators in self._operators:
+            for index in sorted(operators):
+                if self.solver.value(operators[index]):
+                    op = self.task.operators[index]
+                    if not op.applicable(state):
+                        raise RuntimeError(f"Decoded operator {op} is not applicable")
+                    state = op.apply(state)
+                    plan.append(op)
+        if not self.task.is_goal(state):
+            raise RuntimeError("The decoded plan does not reach the goal")
+        return plan
+
+    def _check(self, conflicts):
+        """
+        Check the resource limits, counting each conflict as an expansion.
+
+        Args:
+            conflicts (int): The number of conflicts so far.
+
+        Raises:
+            LimitExceeded: If a resource limit is exceeded.
+        """
+        self.statistics["expansions"] = conflicts
+        if self.limits is not None:
+            self.limits.check(conflicts)
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including those of the solver.
+        """
+        self.statistics["horizon"] = self.horizon
+        self.statistics["expansions"] = self.solver.statistics["conflicts"]
+        self.statistics.update(self.solver.statistics)
+        super()._log_statistics()
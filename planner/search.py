@@ -0,0 +1,203 @@
+"""
+search.py
+
+This module defines the SearchEngine class, the base class of the search
+engines that work on the grounded Task of task.py. An engine searches over
+bitset states, optionally guided by a heuristic (see heuristics.py) and
+restricted by a successor pruning such as StubbornSetPruning, and returns its
+plan as (action name, binding) pairs, the same format as Planner.plan, so
+dfs_planner.py writes plans the same way whatever engine produced them.
+"""
+
+import logging
+import math
+import time
+
+from limits import (
+    FAILED,
+    SOLVED,
+    UNSOLVABLE,
+    LimitExceeded,
+    SearchResult,
+    peak_memory,
+)
+
+
+class SearchEngine:
+    """
+    Base class for search engines over a grounded task.
+
+    Subclasses implement search, which returns the operators of a plan or None.
+    Incomplete engines set complete to False, so that failing to find a plan is
+    not reported as a proof of unsolvability.
+
+    Attributes:
+        task (Task): The grounded task.
+        heuristic (object): A heuristic whose evaluate method estimates the goal
+            distance of a state, or None for blind search.
+        pruning (StubbornSetPruning): A pruning applied to the applicable operators
+            of each state, or None to keep them all.
+        limits (ResourceLimits): Limits on time, expansions, and memory, or None.
+        complete (bool): Whether the engine finds a plan whenever one exists.
+        statistics (dict): Counters describing the search effort.
+        solution (list): The plan found, as (action name, binding) pairs.
+        result (SearchResult): How the last call to plan terminated.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    complete = True
+
+    def __init__(self, task, heuristic=None, pruning=None, limits=None, logger=None):
+        """
+        Initialize the engine for a grounded task.
+
+        Args:
+            task (Task): The grounded task.
+            heuristic (object, optional): A heuristic from heuristics.py. Defaults to None.
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.heuristic = heuristic
+        self.pruning = pruning
+        self.limits = limits
+        self.logger = logger or logging.getLogger(__name__)
+        self.statistics = {"expansions": 0, "generated": 0, "duplicates": 0}
+        self.solution = None
+        self.result = None
+
+    def plan(self):
+        """
+        Run the search and convert the operators found into a plan.
+
+        Returns:
+            list: A sequence of (action name, binding) pairs, or None if no solution is found.
+        """
+        function_name = "plan"
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Searching {len(self.task.operators)} operators over {len(self.task.facts)} facts"
+        )
+        start = time.monotonic()
+        if self.limits is not None:
+            self.limits.start()
+        try:
+            operators = self.search() if self.task.solvable else None
+            if operators is not None:
+                status = SOLVED
+            elif self.complete or not self.task.solvable:
+                status = UNSOLVABLE
+            else:
+                status = FAILED
+        except LimitExceeded as error:
+            operators = self.incumbent()
+            status = error.limit
+            self.logger.warning(
+                f"{self.__class__.__name__}.{function_name}: Search stopped: {error}"
+            )
+        # The time and memory are reported with or without limits
+        elapsed = time.monotonic() - start
+        if self.limits is not None:
+            memory = self.limits.memory()
+            self.limits.stop()
+        else:
+            memory = peak_memory()
+        if operators is not None:
+            self.solution = [(op.name, op.binding) for op in operators]
+            self.statistics["plan_length"] = len(operators)
+        self._log_statistics()
+        self.result = SearchResult(
+            status, self.solution, self.statistics, elapsed, memory
+        )
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Result: {self.result}"
+        )
+        return self.solution
+
+    def search(self):
+        """
+        Search for a plan.
+
+        Returns:
+            list: The operators of a plan, or None if no solution is found.
+        """
+        raise NotImplementedError
+
+    def incumbent(self):
+        """
+        Get the best plan found so far, for engines that improve plans over time.
+
+        Returns:
+            list: The operators of the plan, or None.
+        """
+        return None
+
+    def successors(self, state):
+        """
+        Generate the successors of a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            list: A list of (operator, new_state) tuples, in operator order.
+
+        Raises:
+            LimitExceeded: If a resource limit is exceeded.
+        """
+        if self.limits is not None:
+            self.limits.check(self.statistics["expansions"])
+        operators = self.task.applicable(state)
+        if self.pruning is not None:
+            operators = self.pruning.prune(state, operators)
+        self.statistics["generated"] += len(operators)
+        return [(op, op.apply(state)) for op in operators]
+
+    def evaluate(self, state, parent=None, operator=None):
+        """
+        Evaluate the heuristic on a state.
+
+        Args:
+            state (int): The state bitset.
+            parent (int, optional): The state the operator was applied to. Defaults to None.
+            operator (Operator, optional): The operator that produced the state. Defaults to None.
+
+        Returns:
+            float: The heuristic value, 0 for blind search, or math.inf for a dead end.
+        """
+        if self.heuristic is None:
+            return 0
+        value = self.heuristic.evaluate(state, parent, operator)
+        return math.inf if value is None else value
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the pruning counters if enabled.
+        """
+        function_name = "_log_statistics"
+        if self.pruning is not None:
+            self.statistics["stubborn_pruned"] = self.pruning.statistics["pruned"]
+            self.statistics["stubborn_enabled"] = self.pruning.enabled
+        for key, value in self.statistics.items():
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: {key}: {value}"
+            )
+
+
+def extract_plan(parents, state):
+    """
+    Follow parent pointers back to the initial state.
+
+    Args:
+        parents (dict): Maps states to (parent state, operator), or None for the initial state.
+        state (int): The goal state.
+
+    Returns:
+        list: The operators leading from the initial state to the state.
+    """
+    plan = []
+    while parents[state] is not None:
+        state, op = parents[state]
+        plan.append(op)
+    plan.reverse()
+    return plan
@@ -0,0 +1,240 @@
+"""
+stubborn.py
+
+This module defines the StubbornSetPruning class, a partial-order reduction
+based on strong stubborn sets. In a state s, a strong stubborn set is a set of
+operators that contains the achievers of one unsatisfied goal fact, all the
+operators that interfere with its applicable members, and, for each of its
+inapplicable members, the achievers of one unsatisfied precondition. Expanding
+only the applicable operators of the set preserves completeness (and optimality
+for unit costs): independent operators, such as moves on disjoint towers in
+blocksworld, are no longer interleaved in every order.
+
+Computing the set costs more than generating successors, so pruning switches
+itself off when, after a number of states, it has removed too few successors.
+
+The pruning works on the grounded Task of task.py. Search engines on the
+grounded task call prune directly; the lifted Planner calls prune_successors,
+which maps its (action, binding, new_state) successors to ground operators.
+"""
+
+import logging
+
+
+class StubbornSetPruning:
+    """
+    Strong stubborn set pruning over a grounded task.
+
+    Attributes:
+        task (Task): The grounded task.
+        min_ratio (float): The fraction of successors that must be pruned for the
+            pruning to stay enabled.
+        check_after (int): The number of states after which the ratio is checked.
+        enabled (bool): False once the pruning has switched itself off.
+        statistics (dict): Counters for the states seen, the successors generated,
+            and the successors pruned.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, task, min_ratio=0.2, check_after=1000, logger=None):
+        """
+        Initialize the pruning for a grounded task.
+
+        Args:
+            task (Task): The grounded task.
+            min_ratio (float, optional): The fraction of successors that must be pruned
+                for the pruning to stay enabled. Defaults to 0.2.
+            check_after (int, optional): The number of states after which the ratio is
+                checked. Defaults to 1000.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.task = task
+        self.min_ratio = min_ratio
+        self.check_after = check_after
+        self.enabled = True
+        self.statistics = {"states": 0, "generated": 0, "pruned": 0}
+        self.logger = logger or logging.getLogger(__name__)
+        self._deleters = [[] for _ in task.facts]
+        self._pre_users = [[] for _ in task.facts]
+        self._neg_users = [[] for _ in task.facts]
+        for op in task.operators:
+            for fact in op.del_facts:
+                self._deleters[fact].append(op.id)
+            for fact in op.pre_facts:
+                self._pre_users[fact].append(op.id)
+            for fact in op.neg_facts:
+                self._neg_users[fact].append(op.id)
+        self._achievers = [[op.id for op in ops] for ops in task.achievers]
+        self._interference = {}
+        self._ground_operators = {}
+        for op in task.operators:
+            self._ground_operators.setdefault((op.name, op.args), []).append(op.id)
+
+    def prune(self, state, operators):
+        """
+        Restrict the applicable operators of a state to a strong stubborn set.
+
+        Args:
+            state (int): The state bitset.
+            operators (list): The operators applicable in the state.
+
+        Returns:
+            list: The applicable operators in the stubborn set, in their original order.
+        """
+        if not self.enabled or len(operators) <= 1:
+            return operators
+        stubborn = self._stubborn_set(state)
+        if stubborn is None:
+            return operators
+        kept = [op for op in operators if op.id in stubborn]
+        self._record(len(operators), len(kept))
+        return kept
+
+    def prune_successors(self, state, successors):
+        """
+        Restrict the successors generated by the lifted Planner to a strong stubborn set.
+
+        Args:
+            state (State): The state being expanded.
+            successors (list): A list of (action, binding, new_state) tuples.
+
+        Returns:
+            list: The successors whose action is in the stubborn set, in their original order.
+        """
+        if not self.enabled or len(successors) <= 1:
+            return successors
+        stubborn = self._stubborn_set(self.task.encode(state.atoms))
+        if stubborn is None:
+            return successors
+        kept = []
+        for successor in successors:
+            action, binding, _ = successor
+            key = (
+                str(action.name).lower(),
+                tuple(str(arg).lower() for arg in binding.values()),
+            )
+            ids = self._ground_operators.get(key)
+            if ids is None or any(op_id in stubborn for op_id in ids):
+                kept.append(successor)
+        self._record(len(successors), len(kept))
+        return kept
+
+    def _stubborn_set(self, state):
+        """
+        Compute a strong stubborn set for a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            set: The ids of the operators in the set, or None if the state is a goal state.
+        """
+        operators = self.task.operators
+        enabling = self._unsatisfied_goal(state)
+        if enabling is None:
+            return None
+        stubborn = set(enabling)
+        pending = list(enabling)
+        while pending:
+            op = operators[pending.pop()]
+            if op.applicable(state):
+                candidates = self._interfering(op)
+            else:
+                candidates = self._necessary_enabling_set(op, state)
+            for op_id in candidates:
+                if op_id not in stubborn:
+                    stubborn.add(op_id)
+                    pending.append(op_id)
+        return stubborn
+
+    def _unsatisfied_goal(self, state):
+        """
+        Choose the operators that can satisfy one unsatisfied goal literal.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            list: The ids of the operators achieving the first unsatisfied positive goal
+                fact, or deleting the first true negative goal fact; None if the state
+                satisfies the goal.
+        """
+        for fact in self.task.goal_facts:
+            if not state >> fact & 1:
+                return self._achievers[fact]
+        violated = state & self.task.goal_neg
+        if violated:
+            return self._deleters[(violated & -violated).bit_length() - 1]
+        return None
+
+    def _necessary_enabling_set(self, op, state):
+        """
+        Choose the operators that can fix one unsatisfied precondition of an operator.
+
+        Args:
+            op (Operator): An operator that is not applicable in the state.
+            state (int): The state bitset.
+
+        Returns:
+            list: The ids of the achievers of the first false precondition fact, or of
+                the deleters of the first true negative precondition fact.
+        """
+        for fact in op.pre_facts:
+            if not state >> fact & 1:
+                return self._achievers[fact]
+        for fact in op.neg_facts:
+            if state >> fact & 1:
+                return self._deleters[fact]
+        return []
+
+    def _interfering(self, op):
+        """
+        Get the operators that interfere with an operator.
+
+        Two operators interfere when one can disable the other (it deletes a
+        precondition or adds a negative precondition of the other) or when their
+        effects conflict (one adds a fact the other deletes).
+
+        Args:
+            op (Operator): The operator.
+
+        Returns:
+            tuple: The ids of the interfering operators, computed once and cached.
+        """
+        interfering = self._interference.get(op.id)
+        if interfering is None:
+            ids = set()
+            for fact in op.pre_facts:
+                ids.update(self._deleters[fact])
+            for fact in op.neg_facts:
+                ids.update(self._achievers[fact])
+            for fact in op.del_facts:
+                ids.update(self._pre_users[fact])
+                ids.update(self._achievers[fact])
+            for fact in op.add_facts:
+                ids.update(self._neg_users[fact])
+                ids.update(self._deleters[fact])
+            ids.discard(op.id)
+            interfering = tuple(sorted(ids))
+            self._interference[op.id] = interfering
+        return interfering
+
+    def _record(self, generated, kept):
+        """
+        Update the statistics and switch the pruning off if it does not pay off.
+
+        Args:
+            generated (int): The number of successors before pruning.
+            kept (int): The number of successors after pruning.
+        """
+        function_name = "_record"
+        self.statistics["states"] += 1
+        self.statistics["generated"] += generated
+        self.statistics["pruned"] += generated - kept
+        if self.statistics["states"] == self.check_after:
+            ratio = self.statistics["pruned"] / max(self.statistics["generated"], 1)
+            if ratio < self.min_ratio:
+                self.enabled = False
+                self.logger.info(
+                    f"{self.__class__.__name__}.{function_name}: Pruning ratio {ratio:.3f} below {self.min_ratio} after {self.check_after} states, disabling stubborn sets"
+                )
@@ -0,0 +1,374 @@
+"""
+symmetry.py
+
+This module defines the SymmetryGroup class, which detects object symmetries of
+a planning problem and uses them to map states to canonical representatives.
+
+The problem is described by a colored graph with one vertex per object and one
+vertex per static initial atom and goal literal; each atom vertex is linked to
+its argument objects by edges labelled with the argument position. Dynamic
+initial atoms are left out: every action schema treats objects uniformly, so a
+permutation of the objects that preserves the static atoms and the goal maps
+transitions to transitions and goal states to goal states, whatever the initial
+state. Two states related by such a permutation are therefore equally solvable,
+and the search only needs to expand one of them.
+
+Automorphism generators are found with individualization-refinement along a
+stabilizer chain: the orbit of each base object is computed exactly, so the
+group order is the product of the orbit sizes.
+"""
+
+import logging
+from collections import Counter
+
+import pddl
+from nogood import static_predicates
+
+
+class SymmetryGroup:
+    """
+    The object symmetries of a planning problem.
+
+    Attributes:
+        objects (list): The names of the problem objects.
+        generators (list): Automorphism generators, as dictionaries mapping object names to object names.
+        order (int): The order of the symmetry group (a lower bound if the search budget ran out).
+        complete (bool): False if the automorphism search budget ran out.
+        static_predicates (set): Names of predicates that no action changes.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, domain, problem, node_budget=100000, logger=None):
+        """
+        Detect the object symmetries of a problem.
+
+        Args:
+            domain (Domain): The PDDL domain containing actions and predicates.
+            problem (Problem): The PDDL problem containing the objects, initial state, and goal.
+            node_budget (int, optional): Maximum number of search nodes spent looking for
+                automorphisms. Defaults to 100000.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.static_predicates = static_predicates(domain)
+        self.objects = sorted(obj.name for obj in problem.objects)
+        self.generators = []
+        self.order = 1
+        self.complete = True
+        self._budget = node_budget
+        self._build_graph(domain, problem)
+        self._find_generators()
+
+    def canonical(self, state):
+        """
+        Map a state to a canonical representative of its symmetry class.
+
+        The generators are applied greedily while they make the sorted atom list
+        lexicographically smaller. Symmetric states usually, but not always, end up
+        with the same representative; the result is always symmetric to the state.
+
+        Args:
+            state (State): The state to canonicalize.
+
+        Returns:
+            tuple: A sorted tuple of (predicate, arg1, ...) tuples.
+        """
+        atoms = sorted(
+            (atom.name, *(term.name for term in atom.terms))
+            for atom in state.atoms
+            if isinstance(atom, pddl.logic.Predicate)
+            and atom.name not in self.static_predicates
+        )
+        improved = bool(self.generators)
+        while improved:
+            improved = False
+            for generator in self.generators:
+                image = sorted(
+                    (atom[0], *(generator.get(arg, arg) for arg in atom[1:]))
+                    for atom in atoms
+                )
+                if image < atoms:
+                    atoms = image
+                    improved = True
+        return tuple(atoms)
+
+    def _build_graph(self, domain, problem):
+        """
+        Build the colored problem graph.
+
+        Args:
+            domain (Domain): The PDDL domain.
+            problem (Problem): The PDDL problem.
+        """
+        function_name = "_build_graph"
+        self._vertices = list(self.objects)
+        index = {name: i for i, name in enumerate(self._vertices)}
+        fixed = self._action_constants(domain)
+        colors = []
+        for obj in sorted(problem.objects, key=lambda obj: obj.name):
+            if obj.name in fixed:
+                colors.append(("constant", obj.name))
+            else:
+                colors.append(("object", tuple(sorted(obj.type_tags))))
+        self._adjacency = [[] for _ in self._vertices]
+
+        def add_atom(kind, atom):
+            vertex = len(self._vertices)
+            self._vertices.append(None)
+            colors.append((kind, atom.name))
+            self._adjacency.append([])
+            for position, term in enumerate(atom.terms):
+                obj = index[term.name]
+                self._adjacency[vertex].append((position, obj))
+                self._adjacency[obj].append((-position - 1, vertex))
+
+        for atom in problem.init:
+            if (
+                isinstance(atom, pddl.logic.Predicate)
+                and atom.name in self.static_predicates
+            ):
+                add_atom("init", atom)
+        goal = problem.goal
+        literals = goal.operands if isinstance(goal, pddl.logic.base.And) else [goal]
+        for literal in literals:
+            if isinstance(literal, pddl.logic.Predicate):
+                add_atom("goal", literal)
+            elif isinstance(literal, pddl.logic.base.Not):
+                add_atom("goal-not", literal.argument)
+        palette = {color: i for i, color in enumerate(sorted(set(colors), key=str))}
+        self._initial_colors = [palette[color] for color in colors]
+        self.logger.debug(
+            f"{self.__class__.__name__}.{function_name}: Problem graph has {len(self._vertices)} vertices, {len(self.objects)} objects"
+        )
+
+    def _find_generators(self):
+        """
+        Compute automorphism generators and the group order along a stabilizer chain.
+        """
+        function_name = "_find_generators"
+        num_objects = len(self.objects)
+        coloring = self._refine([self._initial_colors])[0]
+        while coloring is not None:
+            cells = self._object_cells(coloring, num_objects)
+            cell = next((cell for cell in cells if len(cell) > 1), None)
+            if cell is None:
+                break
+            base = cell[0]
+            orbit = {base}
+            level_generators = []
+            for target in cell[1:]:
+                if target in orbit:
+                    continue
+                mapping = self._find_automorphism(coloring, base, target)
+                if mapping is None:
+                    continue
+                level_generators.append(mapping)
+                self.generators.append(
+                    {
+                        self.objects[i]: self.objects[j]
+                        for i, j in enumerate(mapping[:num_objects])
+                        if i != j
+                    }
+                )
+                orbit = self._orbit(base, level_generators)
+            self.order *= len(orbit)
+            coloring = self._individualize(coloring, base)
+            coloring = self._refine([coloring])[0]
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Symmetry group order {self.order} with {len(self.generators)} generators"
+            + ("" if self.complete else " (search budget exhausted, lower bound)")
+        )
+
+    def _find_automorphism(self, coloring, source, target):
+        """
+        Search for an automorphism respecting a coloring that maps source to target.
+
+        Args:
+            coloring (list): The current vertex coloring.
+            source (int): The object vertex to map.
+            target (int): The object vertex it should be mapped to.
+
+        Returns:
+            list: The automorphism as a list of vertex images, or None if none was found.
+        """
+        left = self._individualize(coloring, source)
+        right = self._individualize(coloring, target)
+        return self._search(left, right)
+
+    def _search(self, left, right):
+        """
+        Recursively individualize and refine two colorings until they are discrete.
+
+        Args:
+            left (list): The coloring of the source side.
+            right (list): The coloring of the target side.
+
+        Returns:
+            list: An automorphism as a list of vertex images, or None if none was found.
+        """
+        if self._budget <= 0:
+            self.complete = False
+            return None
+        self._budget -= 1
+        refined = self._refine([left, right])
+        if refined is None:
+            return None
+        left, right = refined
+        num_objects = len(self.objects)
+        left_cells = self._object_cells(left, num_objects)
+        cell = next((cell for cell in left_cells if len(cell) > 1), None)
+        if cell is None:
+            return self._check_leaf(left, right)
+        color = left[cell[0]]
+        for candidate in range(num_objects):
+            if right[candidate] != color:
+                continue
+            mapping = self._search(
+                self._individualize(left, cell[0]),
+                self._individualize(right, candidate),
+            )
+            if mapping is not None:
+                return mapping
+        return None
+
+    def _check_leaf(self, left, right):
+        """
+        Turn two discrete colorings into a vertex mapping and check it is an automorphism.
+
+        Args:
+            left (list): A coloring in which every vertex has a distinct color.
+            right (list): A coloring in which every vertex has a distinct color.
+
+        Returns:
+            list: The automorphism as a list of vertex images, or None if the mapping is not one.
+        """
+        by_color = {color: vertex for vertex, color in enumerate(right)}
+        if len(by_color) != len(right):
+            return None
+        mapping = [by_color[color] for color in left]
+        for vertex, neighbors in enumerate(self._adjacency):
+            image = Counter((label, mapping[u]) for label, u in neighbors)
+            if image != Counter(self._adjacency[mapping[vertex]]):
+                return None
+        return mapping
+
+    def _refine(self, colorings):
+        """
+        Jointly refine colorings until stable, keeping their colors comparable.
+
+        Args:
+            colorings (list): One or more colorings to refine together.
+
+        Returns:
+            list: The refined colorings, or None if they stop being equivalent.
+        """
+        num_colors = len(set(colorings[0]))
+        while True:
+            signatures = [
+                [
+                    (
+                        coloring[vertex],
+                        tuple(sorted((label, coloring[u]) for label, u in neighbors)),
+                    )
+                    for vertex, neighbors in enumerate(self._adjacency)
+                ]
+                for coloring in colorings
+            ]
+            counts = [Counter(signature) for signature in signatures]
+            if any(count != counts[0] for count in counts[1:]):
+                return None
+            ranking = {signature: i for i, signature in enumerate(sorted(counts[0]))}
+            colorings = [
+                [ranking[signature] for signature in signature_list]
+                for signature_list in signatures
+            ]
+            if len(ranking) == num_colors:
+                return colorings
+            num_colors = len(ranking)
+
+    @staticmethod
+    def _individualize(coloring, vertex):
+        """
+        Give a vertex a color of its own.
+
+        Args:
+            coloring (list): The coloring to start from.
+            vertex (int): The vertex to individualize.
+
+        Returns:
+            list: A new coloring in which the vertex has a fresh color.
+        """
+        new_coloring = list(coloring)
+        new_coloring[vertex] = max(coloring) + 1
+        return new_coloring
+
+    @staticmethod
+    def _object_cells(coloring, num_objects):
+        """
+        Group the object vertices by color.
+
+        Args:
+            coloring (list): The vertex coloring.
+            num_objects (int): The number of object vertices (they come first).
+
+        Returns:
+            list: Lists of object vertices sharing a color, ordered by color.
+        """
+        cells = {}
+        for vertex in range(num_objects):
+            cells.setdefault(coloring[vertex], []).append(vertex)
+        return [cells[color] for color in sorted(cells)]
+
+    @staticmethod
+    def _orbit(vertex, generators):
+        """
+        Compute the orbit of a vertex under a set of generators.
+
+        Args:
+            vertex (int): The vertex.
+            generators (list): Automorphisms as lists of vertex images.
+
+        Returns:
+            set: The vertices reachable from vertex by applying the generators.
+        """
+        orbit = {vertex}
+        pending = [vertex]
+        while pending:
+            current = pending.pop()
+            for generator in generators:
+                image = generator[current]
+                if image not in orbit:
+                    orbit.add(image)
+                    pending.append(image)
+        return orbit
+
+    @staticmethod
+    def _action_constants(domain):
+        """
+        Collect the constants mentioned in the action schemas.
+
+        Args:
+            domain (Domain): The PDDL domain.
+
+        Returns:
+            set: The names of the constants; symmetries must fix them.
+        """
+        constants = {constant.name for constant in domain.constants}
+        pending = []
+        for action in domain.actions:
+            pending.extend([action.precondition, action.effect])
+        while pending:
+            formula = pending.pop()
+            if isinstance(formula, pddl.logic.Predicate):
+                constants.update(
+                    term.name
+                    for term in formula.terms
+                    if isinstance(term, pddl.logic.terms.Constant)
+                )
+            elif isinstance(formula, (pddl.logic.base.And, pddl.logic.base.Or)):
+                pending.extend(formula.operands)
+            elif isinstance(formula, pddl.logic.base.Not):
+                pending.append(formula.argument)
+            elif isinstance(formula, pddl.logic.effects.When):
+                pending.extend([formula.condition, formula.effect])
+        return constants
@@ -0,0 +1,1005 @@
+"""
+task.py
+
+This module defines the Task and Operator classes, a grounded STRIPS view of a
+PDDL domain and problem. Every fluent atom is interned to an integer id and a
+state is a Python int used as a bitset, so applicability tests, successor
+generation, and hashing are single big-integer operations.
+
+Grounding follows the relaxed reachability of the problem: atoms that no
+action changes are kept aside as static facts and checked while grounding, and
+only operators whose positive preconditions are relaxed-reachable are created.
+Disjunctive preconditions are split into one operator per disjunct, and
+conditional effects are supported when their condition only mentions static
+atoms or equalities, which is resolved at grounding time.
+"""
+
+import logging
+
+import pddl
+from nogood import static_predicates
+
+
+class Operator:
+    """
+    A ground action.
+
+    Attributes:
+        id (int): The index of the operator in Task.operators.
+        name (str): The name of the action.
+        parameters (tuple): The names of the action parameters.
+        args (tuple): The objects bound to the parameters.
+        pre_facts (tuple): Ids of the facts that must hold.
+        neg_facts (tuple): Ids of the facts that must not hold.
+        add_facts (tuple): Ids of the facts made true.
+        del_facts (tuple): Ids of the facts made false.
+        pre (int): Bitset of pre_facts.
+        neg (int): Bitset of neg_facts.
+        add (int): Bitset of add_facts.
+        delete (int): Bitset of del_facts that are not also added.
+        cost (int): The cost of the operator (unit costs).
+    """
+
+    def __init__(self, id, name, parameters, args, pre, neg, add, delete):
+        """
+        Initialize a ground action.
+
+        Args:
+            id (int): The index of the operator in Task.operators.
+            name (str): The name of the action.
+            parameters (tuple): The names of the action parameters.
+            args (tuple): The objects bound to the parameters.
+            pre (iterable): Ids of the facts that must hold.
+            neg (iterable): Ids of the facts that must not hold.
+            add (iterable): Ids of the facts made true.
+            delete (iterable): Ids of the facts made false.
+        """
+        self.id = id
+        self.name = name
+        self.parameters = tuple(parameters)
+        self.args = tuple(args)
+        self.pre_facts = tuple(sorted(pre))
+        self.neg_facts = tuple(sorted(neg))
+        self.add_facts = tuple(sorted(add))
+        self.del_facts = tuple(sorted(set(delete) - set(add)))
+        self.pre = _mask(self.pre_facts)
+        self.neg = _mask(self.neg_facts)
+        self.add = _mask(self.add_facts)
+        self.delete = _mask(self.del_facts)
+        self.cost = 1
+
+    @property
+    def binding(self):
+        """
+        Get the binding of the action parameters, in parameter order.
+
+        Returns:
+            dict: A dictionary mapping parameter names to object names.
+        """
+        return dict(zip(self.parameters, self.args))
+
+    def applicable(self, state):
+        """
+        Check whether the operator is applicable in a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            bool: True if the operator is applicable, False otherwise.
+        """
+        return state & self.pre == self.pre and not state & self.neg
+
+    def apply(self, state):
+        """
+        Apply the operator to a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            int: The successor state bitset.
+        """
+        return (state & ~self.delete) | self.add
+
+    def __str__(self):
+        """
+        Return the operator in plan-file format.
+
+        Returns:
+            str: A string such as "( move-to-next v1 v2 n1 n2 )".
+        """
+        return f"( {self.name} {' '.join(self.args)} )"
+
+    def __repr__(self):
+        """
+        Return a debugging representation of the operator.
+
+        Returns:
+            str: A string such as "Operator(move-to-next v1 v2 n1 n2)".
+        """
+        return f"Operator({' '.join((self.name,) + self.args)})"
+
+
+class Task:
+    """
+    A grounded planning task with interned facts and bitset states.
+
+    Attributes:
+        domain (Domain): The PDDL domain.
+        problem (Problem): The PDDL problem.
+        static_predicates (set): Names of the predicates no action changes.
+        facts (list): The fluent facts, as (predicate, arg1, ...) tuples, indexed by id.
+        fact_index (dict): Maps fact tuples to their ids.
+        operators (list): The ground operators, empty for lazy tasks.
+        initial_state (int): The initial state bitset.
+        goal (int): Bitset of the facts that must hold in a goal state.
+        goal_neg (int): Bitset of the facts that must not hold in a goal state.
+        goal_facts (tuple): Ids of the facts in goal.
+        achievers (list): For each fact id, the operators that add it.
+        solvable (bool): False if grounding already proved the goal unreachable.
+        lazy (bool): True if operators are instantiated per state by applicable.
+        logger (Logger): A logger for debugging and informational messages.
+    """
+
+    def __init__(self, domain, problem, logger=None, lazy=False):
+        """
+        Ground a domain and problem.
+
+        Args:
+            domain (Domain): The PDDL domain containing actions and predicates.
+            problem (Problem): The PDDL problem containing the initial state, goal, and objects.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+            lazy (bool, optional): Instantiate operators per state instead of grounding
+                them all up front. Defaults to False.
+        """
+        self.domain = domain
+        self.problem = problem
+        self.lazy = lazy
+        self.logger = logger or logging.getLogger(__name__)
+        self.static_predicates = {_name(name) for name in static_predicates(domain)}
+        self.facts = []
+        self.fact_index = {}
+        self.operators = []
+        self.solvable = True
+        self._ground()
+        self.achievers = [[] for _ in self.facts]
+        for op in self.operators:
+            for fact in op.add_facts:
+                self.achievers[fact].append(op)
+        self._generator = self._build_generator(self.operators, frozenset())
+
+    def applicable(self, state):
+        """
+        Get the operators applicable in a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            list: The applicable operators, in operator order.
+        """
+        if self.lazy:
+            return self._instantiate_applicable(state)
+        result = []
+        pending = [self._generator]
+        while pending:
+            immediate, fact, with_fact, without_fact = pending.pop()
+            for op in immediate:
+                if not state & op.neg:
+                    result.append(op)
+            if fact is not None:
+                pending.append(without_fact)
+                if state >> fact & 1:
+                    pending.append(with_fact)
+        result.sort(key=lambda op: op.id)
+        return result
+
+    def _instantiate_applicable(self, state):
+        """
+        Instantiate the operators applicable in a state, for lazy tasks.
+
+        Positive preconditions are joined with the facts of the state, so only
+        candidate operators are created; they are not kept after the call.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            list: The applicable operators, in schema order then binding order.
+        """
+        relations = {}
+        for fact in self.state_facts(state):
+            name, *args = self.facts[fact]
+            relations.setdefault(name, set()).add(tuple(args))
+        result = []
+        indexes = {}
+        for name, parameters, candidates, clause, effects in self._schemas:
+            negative = [
+                (predicate, terms)
+                for kind, positive, predicate, terms in clause
+                if not positive
+                and kind != "eq"
+                and predicate not in self.static_predicates
+            ]
+            for binding in self._bindings(
+                clause, candidates, parameters, relations, indexes
+            ):
+                # Reject violated negative preconditions before creating the operator
+                if any(
+                    _ground(terms, binding) in relations.get(predicate, ())
+                    for predicate, terms in negative
+                ):
+                    continue
+                op = self._instantiate(
+                    len(result), name, parameters, clause, effects, binding
+                )
+                if op is not None and op.applicable(state):
+                    result.append(op)
+        return result
+
+    def instantiate(self, name, args):
+        """
+        Instantiate an action with given arguments, for lazy tasks, e.g. to check a
+        step of a plan.
+
+        Unlike grounding, the arguments need not be relaxed-reachable, and the static
+        preconditions that do not hold are reported instead of filtering the operator out.
+
+        Args:
+            name (str): The action name.
+            args (Sequence): The objects bound to the parameters, in order.
+
+        Returns:
+            list: One (operator, failures) pair per disjunct of the precondition, where
+                failures lists the arguments of the wrong type and the static or equality
+                preconditions that do not hold, and operator is None if the disjunct
+                requires a fact both true and false. The list is empty if the domain has
+                no action with that name and number of parameters.
+        """
+        if not self.lazy:
+            raise ValueError("Only lazy tasks instantiate actions on demand")
+        name = _name(name)
+        args = tuple(_name(arg) for arg in args)
+        result = []
+        for schema_name, parameters, candidates, clause, effects in self._schemas:
+            if schema_name != name or len(parameters) != len(args):
+                continue
+            binding = dict(zip(parameters, args))
+            failures = [
+                f"{binding[param]} does not have the type of ?{param}"
+                for param in parameters
+                if binding[param] not in candidates[param]
+            ]
+            failures.extend(
+                _literal_name(literal, binding)
+                for literal in clause
+                if (literal[0] == "eq" or literal[2] in self.static_predicates)
+                and not self._holds_statically(literal, binding)
+            )
+            op = self._instantiate(
+                len(result), name, parameters, clause, effects, binding
+            )
+            result.append((op, failures))
+        return result
+
+    def is_goal(self, state):
+        """
+        Check whether a state satisfies the goal.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            bool: True if the state is a goal state, False otherwise.
+        """
+        return state & self.goal == self.goal and not state & self.goal_neg
+
+    def encode(self, atoms):
+        """
+        Convert a set of PDDL atoms to a state bitset.
+
+        Static atoms, negated atoms, and atoms that are not relaxed-reachable are ignored.
+
+        Args:
+            atoms (iterable): PDDL predicates, e.g. the atoms of a State.
+
+        Returns:
+            int: The state bitset.
+        """
+        state = 0
+        for atom in atoms:
+            if isinstance(atom, pddl.logic.Predicate):
+                fact = self.fact_index.get(
+                    (_name(atom.name), *(_name(term.name) for term in atom.terms))
+                )
+                if fact is not None:
+                    state |= 1 << fact
+        return state
+
+    def state_facts(self, state):
+        """
+        List the facts that hold in a state.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            list: The ids of the facts set in the bitset.
+        """
+        facts = []
+        while state:
+            low = state & -state
+            facts.append(low.bit_length() - 1)
+            state ^= low
+        return facts
+
+    def export_state(self, state):
+        """
+        Convert a state to a representation that does not depend on fact ids, which
+        differ between runs of a lazy task.
+
+        Args:
+            state (int): The state bitset.
+
+        Returns:
+            tuple: The sorted (predicate, arg1, ...) tuples of the facts of the state.
+        """
+        return tuple(sorted(self.facts[fact] for fact in self.state_facts(state)))
+
+    def import_state(self, facts):
+        """
+        Convert the result of export_state back to a state bitset.
+
+        Args:
+            facts (iterable): (predicate, arg1, ...) tuples.
+
+        Returns:
+            int: The state bitset.
+        """
+        return _mask(self._intern(tuple(fact)) for fact in facts)
+
+    def fact_name(self, fact):
+        """
+        Get the PDDL representation of a fact.
+
+        Args:
+            fact (int): The fact id.
+
+        Returns:
+            str: A string such as "(visited v1)".
+        """
+        return f"({' '.join(self.facts[fact])})"
+
+    def _ground(self):
+        """
+        Intern the facts and create the operators reachable from the initial state.
+
+        In lazy mode only the initial and goal facts are interned; operators are
+        instantiated per state by applicable, and other facts are interned as they
+        are first met.
+        """
+        function_name = "_ground"
+        initial, reached = self._compile()
+        if self.lazy:
+            for fact in sorted(initial):
+                self._intern(fact)
+            self._compile_goal()
+            self.initial_state = _mask(self.fact_index[fact] for fact in initial)
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: Compiled {len(self._schemas)} schemas for lazy grounding"
+            )
+            return
+
+        # Relaxed reachability: apply every add effect until nothing new is reached.
+        # After the first pass, only bindings using an atom reached in the previous
+        # pass are enumerated (semi-naive evaluation).
+        delta = None
+        while delta is None or delta:
+            indexes = {}
+            new_atoms = {}
+            for _, parameters, candidates, clause, effects in self._schemas:
+                for binding in self._bindings(
+                    clause, candidates, parameters, reached, indexes, delta
+                ):
+                    for condition, positive, name, terms in effects:
+                        if positive and self._static_condition(condition, binding):
+                            args = _ground(terms, binding)
+                            if args not in reached.get(name, ()):
+                                new_atoms.setdefault(name, set()).add(args)
+            for name, relation in new_atoms.items():
+                reached.setdefault(name, set()).update(relation)
+            delta = new_atoms
+
+        for name in sorted(reached):
+            for args in sorted(reached[name]):
+                self._intern((name, *args))
+        self._compile_goal()
+        self.initial_state = _mask(self.fact_index[fact] for fact in initial)
+
+        indexes = {}
+        seen = set()
+        for name, parameters, candidates, clause, effects in self._schemas:
+            for binding in self._bindings(
+                clause, candidates, parameters, reached, indexes
+            ):
+                op = self._instantiate(
+                    len(self.operators), name, parameters, clause, effects, binding
+                )
+                if op is None:
+                    continue
+                key = (name, op.args, op.pre, op.neg)
+                if key in seen:
+                    continue
+                seen.add(key)
+                self.operators.append(op)
+        self.logger.info(
+            f"{self.__class__.__name__}.{function_name}: Grounded {len(self.facts)} facts and {len(self.operators)} operators"
+        )
+
+    def _compile(self):
+        """
+        Split the initial state into static and fluent atoms and compile the action
+        schemas, one per disjunct of their precondition.
+
+        Returns:
+            tuple: (the initial fluent facts, a dictionary mapping fluent predicate
+                names to sets of initial argument tuples).
+        """
+        self._objects = self._typed_objects()
+        self._static = {}
+        self._static_indexes = {}
+        reached = {}
+        initial = []
+        for atom in self.problem.init:
+            if not isinstance(atom, pddl.logic.Predicate):
+                continue
+            name = _name(atom.name)
+            args = tuple(_name(term.name) for term in atom.terms)
+            if name in self.static_predicates:
+                self._static.setdefault(name, set()).add(args)
+            else:
+                reached.setdefault(name, set()).add(args)
+                initial.append((name, *args))
+
+        self._schemas = []
+        for action in sorted(self.domain.actions, key=lambda action: action.name):
+            parameters = [_name(param.name) for param in action.parameters]
+            candidates = {
+                _name(param.name): self._objects_of_type(param.type_tags)
+                for param in action.parameters
+            }
+            effects = self._effects(action.effect)
+            for clause in self._dnf(action.precondition):
+                self._schemas.append(
+                    (_name(action.name), parameters, candidates, clause, effects)
+                )
+        return initial, reached
+
+    def _compile_goal(self):
+        """
+        Intern the goal facts and set goal, goal_neg, and goal_facts.
+        """
+        goal_clauses = self._dnf(self.problem.goal)
+        if len(goal_clauses) != 1:
+            raise NotImplementedError("Only conjunctive goals are supported")
+        goal, goal_neg = set(), set()
+        for literal in goal_clauses[0]:
+            kind, positive, name, terms = literal
+            if kind == "eq" or name in self.static_predicates:
+                if not self._holds_statically(literal, {}):
+                    self.solvable = False
+                continue
+            fact = self._intern((name, *_ground(terms, {})))
+            (goal if positive else goal_neg).add(fact)
+        self.goal_facts = tuple(sorted(goal))
+        self.goal = _mask(goal)
+        self.goal_neg = _mask(goal_neg)
+
+    def _instantiate(self, id, name, parameters, clause, effects, binding):
+        """
+        Create the ground operator of a schema under a binding.
+
+        Facts that are not interned are left out (they can never hold) unless the
+        task is lazy, in which case they are interned.
+
+        Args:
+            id (int): The id of the new operator.
+            name (str): The action name.
+            parameters (list): The parameter names, in order.
+            clause (list): The precondition literals.
+            effects (list): The effects, see _effects.
+            binding (dict): The binding of the parameters.
+
+        Returns:
+            Operator: The operator, or None if it requires a fact both true and false.
+        """
+        lookup = self._intern if self.lazy else self.fact_index.get
+        pre, neg, add, delete = set(), set(), set(), set()
+        for kind, positive, predicate, terms in clause:
+            if kind == "eq" or predicate in self.static_predicates:
+                continue
+            fact = lookup((predicate, *_ground(terms, binding)))
+            if positive:
+                pre.add(fact)
+            elif fact is not None:
+                neg.add(fact)
+        if pre & neg:
+            return None
+        for condition, positive, predicate, terms in effects:
+            if not self._static_condition(condition, binding):
+                continue
+            fact = lookup((predicate, *_ground(terms, binding)))
+            if positive:
+                add.add(fact)
+            elif fact is not None:
+                delete.add(fact)
+        args = tuple(binding[param] for param in parameters)
+        return Operator(id, name, parameters, args, pre, neg, add, delete)
+
+    def _intern(self, fact):
+        """
+        Get the id of a fact, assigning a new one if needed.
+
+        Args:
+            fact (tuple): A (predicate, arg1, ...) tuple.
+
+        Returns:
+            int: The fact id.
+        """
+        fact_id = self.fact_index.get(fact)
+        if fact_id is None:
+            fact_id = len(self.facts)
+            self.facts.append(fact)
+            self.fact_index[fact] = fact_id
+        return fact_id
+
+    def _bindings(self, clause, candidates, parameters, reached, indexes, delta=None):
+        """
+        Enumerate the bindings of a precondition clause that are relaxed-applicable.
+
+        Positive atoms are joined against the static and reached relations, the
+        remaining parameters are enumerated over their typed candidates, and the
+        equality and negative static literals are checked last.
+
+        Args:
+            clause (list): The literals of the clause.
+            candidates (dict): Maps parameter names to the objects of their type.
+            parameters (list): The parameter names, in order.
+            reached (dict): Maps fluent predicate names to sets of reached argument tuples.
+            indexes (dict): Cache of relation indexes, see _lookup.
+            delta (dict, optional): When set, only bindings matching at least one
+                positive fluent atom against these newly reached atoms are returned
+                (possibly more than once). Defaults to None.
+
+        Returns:
+            list: The bindings (dictionaries) satisfying the clause.
+        """
+        positive = [
+            literal for literal in clause if literal[0] == "atom" and literal[1]
+        ]
+        checks = [
+            literal
+            for literal in clause
+            if literal[0] == "eq"
+            or (not literal[1] and literal[2] in self.static_predicates)
+        ]
+        if delta is None:
+            partials = self._join(positive, candidates, reached, indexes, {})
+        else:
+            partials = [
+                partial
+                for literal in positive
+                if delta.get(literal[2])
+                for partial in self._join(
+                    positive, candidates, reached, indexes, {}, (literal, delta)
+                )
+            ]
+        bindings = []
+        for partial in partials:
+            for binding in self._complete(partial, candidates, parameters):
+                if all(self._holds_statically(literal, binding) for literal in checks):
+                    bindings.append(binding)
+        return bindings
+
+    def _join(self, atoms, candidates, reached, indexes, binding, restricted=None):
+        """
+        Recursively join atoms with the static and reached relations.
+
+        Args:
+            atoms (list): The positive literals still to be matched.
+            candidates (dict): Maps parameter names to the objects of their type.
+            reached (dict): Maps fluent predicate names to sets of reached argument tuples.
+            indexes (dict): Cache of relation indexes, see _lookup.
+            binding (dict): The current partial binding.
+            restricted (tuple, optional): A (literal, delta) pair; the literal is matched
+                first, against the delta relations only. Defaults to None.
+
+        Returns:
+            list: The partial bindings satisfying every atom.
+        """
+        if not atoms:
+            return [binding]
+
+        def bound_terms(literal):
+            return sum(not is_var or name in binding for is_var, name in literal[3])
+
+        relations = reached
+        if restricted is not None and restricted[0] in atoms:
+            literal, relations = restricted
+        else:
+            literal = max(atoms, key=bound_terms)
+        rest = [other for other in atoms if other is not literal]
+        _, _, predicate, terms = literal
+        positions = tuple(
+            i for i, (is_var, name) in enumerate(terms) if not is_var or name in binding
+        )
+        key = tuple(
+            binding[name] if is_var else name
+            for is_var, name in (terms[i] for i in positions)
+        )
+        bindings = []
+        index = self._lookup(predicate, positions, relations, indexes)
+        for args in index.get(key, ()):
+            if len(args) != len(terms):
+                continue
+            new_binding = dict(binding)
+            for (is_var, name), value in zip(terms, args):
+                if not is_var:
+                    continue
+                bound = new_binding.get(name)
+                if bound is None:
+                    if value not in candidates.get(name, ()):
+                        break
+                    new_binding[name] = value
+                elif bound != value:
+                    break
+            else:
+                bindings.extend(
+                    self._join(
+                        rest, candidates, reached, indexes, new_binding, restricted
+                    )
+                )
+        return bindings
+
+    def _lookup(self, predicate, positions, relations, indexes):
+        """
+        Get a hash index of a relation on the given argument positions.
+
+        Args:
+            predicate (str): The predicate name.
+            positions (tuple): The argument positions used as the key.
+            relations (dict): Maps fluent predicate names to sets of argument tuples.
+            indexes (dict): Cache of the indexes built so far.
+
+        Returns:
+            dict: Maps key tuples to lists of argument tuples.
+        """
+        if predicate in self.static_predicates:
+            # Static relations never change, so their indexes are kept across calls
+            indexes = self._static_indexes
+            cache_key = (predicate, positions)
+            relation = self._static.get(predicate, ())
+        else:
+            cache_key = (id(relations), predicate, positions)
+            relation = relations.get(predicate, ())
+        index = indexes.get(cache_key)
+        if index is None:
+            index = {}
+            for args in relation:
+                index.setdefault(tuple(args[i] for i in positions), []).append(args)
+            indexes[cache_key] = index
+        return index
+
+    def _complete(self, partial, candidates, parameters):
+        """
+        Enumerate the parameters a partial binding leaves unbound.
+
+        Args:
+            partial (dict): A partial binding.
+            candidates (dict): Maps parameter names to the objects of their type.
+            parameters (list): The parameter names, in order.
+
+        Returns:
+            list: Complete bindings extending the partial one.
+        """
+        bindings = [partial]
+        for param in parameters:
+            if param in partial:
+                continue
+            bindings = [
+                {**binding, param: value}
+                for binding in bindings
+                for value in sorted(candidates[param])
+            ]
+        return bindings
+
+    def _holds_statically(self, literal, binding):
+        """
+        Evaluate an equality or static literal under a binding.
+
+        Args:
+            literal (tuple): A (kind, positive, predicate, terms) literal.
+            binding (dict): The binding of the action parameters.
+
+        Returns:
+            bool: True if the literal holds.
+        """
+        kind, positive, predicate, terms = literal
+        args = _ground(terms, binding)
+        if kind == "eq":
+            return (args[0] == args[1]) == positive
+        return (args in self._static.get(predicate, ())) == positive
+
+    def _static_condition(self, condition, binding):
+        """
+        Evaluate the condition of a conditional effect under a binding.
+
+        Args:
+            condition (list): The DNF clauses of the condition, or None for unconditional effects.
+            binding (dict): The binding of the action parameters.
+
+        Returns:
+            bool: True if the effect applies.
+        """
+        if condition is None:
+            return True
+        return any(
+            all(self._holds_statically(literal, binding) for literal in clause)
+            for clause in condition
+        )
+
+    @staticmethod
+    def _compile_terms(terms):
+        """
+        Convert PDDL terms to plain (is_variable, name) pairs.
+
+        Args:
+            terms (Sequence): The terms of an atom or equality.
+
+        Returns:
+            tuple: (is_variable, name) pairs.
+        """
+        return tuple(
+            (isinstance(term, pddl.logic.terms.Variable), _name(term.name))
+            for term in terms
+        )
+
+    def _dnf(self, formula, negated=False):
+        """
+        Convert a precondition or goal to disjunctive normal form.
+
+        Args:
+            formula (Formula): The formula, or None for an empty precondition.
+            negated (bool, optional): Whether the formula appears under a negation. Defaults to False.
+
+        Returns:
+            list: Clauses, each a list of (kind, positive, predicate, terms) literals, where
+                kind is "atom" or "eq" and terms are (is_variable, name) pairs.
+        """
+        if formula is None:
+            return [[]]
+        if isinstance(formula, pddl.logic.base.Not):
+            return self._dnf(formula.argument, not negated)
+        if isinstance(formula, pddl.logic.Predicate):
+            return [
+                [
+                    (
+                        "atom",
+                        not negated,
+                        _name(formula.name),
+                        self._compile_terms(formula.terms),
+                    )
+                ]
+            ]
+        if isinstance(formula, pddl.logic.predicates.EqualTo):
+            return [
+                [
+                    (
+                        "eq",
+                        not negated,
+                        None,
+                        self._compile_terms((formula.left, formula.right)),
+                    )
+                ]
+            ]
+        conjunction = isinstance(formula, pddl.logic.base.And)
+        if not conjunction and not isinstance(formula, pddl.logic.base.Or):
+            raise NotImplementedError(
+                f"Unsupported formula {formula} ({type(formula).__name__})"
+            )
+        if conjunction != negated:
+            clauses = [[]]
+            for operand in formula.operands:
+                clauses = [
+                    clause + other
+                    for clause in clauses
+                    for other in self._dnf(operand, negated)
+                ]
+            return clauses
+        return [
+            clause
+            for operand in formula.operands
+            for clause in self._dnf(operand, negated)
+        ]
+
+    def _effects(self, effect, condition=None):
+        """
+        Flatten an action effect.
+
+        Args:
+            effect (Effect): The effect formula.
+            condition (list, optional): DNF clauses of an enclosing when-condition. Defaults to None.
+
+        Returns:
+            list: (condition, positive, predicate, terms) tuples.
+        """
+        if effect is None:
+            return []
+        if isinstance(effect, pddl.logic.Predicate):
+            return [
+                (condition, True, _name(effect.name), self._compile_terms(effect.terms))
+            ]
+        if isinstance(effect, pddl.logic.base.Not):
+            atom = effect.argument
+            return [
+                (condition, False, _name(atom.name), self._compile_terms(atom.terms))
+            ]
+        if isinstance(effect, pddl.logic.base.And):
+            return [
+                item
+                for operand in effect.operands
+                for item in self._effects(operand, condition)
+            ]
+        if isinstance(effect, pddl.logic.effects.When):
+            if condition is not None:
+                raise NotImplementedError(
+                    "Nested conditional effects are not supported"
+                )
+            clauses = self._dnf(effect.condition)
+            for clause in clauses:
+                for kind, _, predicate, _ in clause:
+                    if kind == "atom" and predicate not in self.static_predicates:
+                        raise NotImplementedError(
+                            f"Conditional effect on fluent {predicate} is not supported"
+                        )
+            return self._effects(effect.effect, clauses)
+        raise NotImplementedError(
+            f"Unsupported effect {effect} ({type(effect).__name__})"
+        )
+
+    def _typed_objects(self):
+        """
+        Map every object and constant to the set of its types and their ancestors.
+
+        Returns:
+            dict: A dictionary mapping object names to sets of type names.
+        """
+        parents = {name: parent for name, parent in self.domain.types.items()}
+        objects = {}
+        for obj in list(self.problem.objects) + list(self.domain.constants):
+            types = set()
+            pending = list(obj.type_tags)
+            while pending:
+                type_name = pending.pop()
+                if type_name in types:
+                    continue
+                types.add(type_name)
+                if parents.get(type_name):
+                    pending.append(parents[type_name])
+            objects[_name(obj.name)] = types
+        return objects
+
+    def _objects_of_type(self, type_tags):
+        """
+        Get the objects a parameter of the given type may be bound to.
+
+        Args:
+            type_tags (set): The type tags of the parameter; empty for untyped parameters.
+
+        Returns:
+            set: The names of the matching objects.
+        """
+        return {
+            name
+            for name, types in self._objects.items()
+            if not type_tags or types & set(type_tags)
+        }
+
+    def _build_generator(self, operators, tested):
+        """
+        Build a decision tree over precondition facts for successor generation.
+
+        Each node holds the operators whose preconditions are all tested on the path
+        to it, a fact to branch on, and the subtrees for the operators that require
+        the fact and for those that do not.
+
+        Args:
+            operators (list): The operators to organize.
+            tested (frozenset): The facts already tested on the path to this node.
+
+        Returns:
+            tuple: (immediate, fact, with_fact, without_fact), with fact None for leaves.
+        """
+        immediate = []
+        rest = []
+        counts = {}
+        for op in operators:
+            remaining = [fact for fact in op.pre_facts if fact not in tested]
+            if not remaining:
+                immediate.append(op)
+                continue
+            rest.append(op)
+            for fact in remaining:
+                counts[fact] = counts.get(fact, 0) + 1
+        if not rest:
+            return (immediate, None, None, None)
+        fact = max(sorted(counts), key=counts.get)
+        with_fact = [op for op in rest if fact in op.pre_facts]
+        without_fact = [op for op in rest if fact not in op.pre_facts]
+        return (
+            immediate,
+            fact,
+            self._build_generator(with_fact, tested | {fact}),
+            self._build_generator(without_fact, tested | {fact}),
+        )
+
+
+def _name(name):
+    """
+    Normalize a PDDL name, which is case-insensitive, to a lowercase str.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        str: The lowercase name.
+    """
+    return str(name).lower()
+
+
+def _ground(terms, binding):
+    """
+    Ground compiled terms under a binding.
+
+    Args:
+        terms (tuple): (is_variable, name) pairs.
+        binding (dict): The binding of the action parameters.
+
+    Returns:
+        tuple: The object names.
+    """
+    return tuple(binding[name] if is_var else name for is_var, name in terms)
+
+
+def _literal_name(literal, binding):
+    """
+    Get the PDDL representation of a compiled literal under a binding.
+
+    Args:
+        literal (tuple): A (kind, positive, predicate, terms) literal.
+        binding (dict): The binding of the action parameters.
+
+    Returns:
+        str: A string such as "(edge v1 v2)" or "(not (= v1 v1))".
+    """
+    kind, positive, predicate, terms = literal
+    symbol = "=" if kind == "eq" else predicate
+    atom = f"({' '.join((symbol,) + _ground(terms, binding))})"
+    return atom if positive else f"(not {atom})"
+
+
+def _mask(facts):
+    """
+    Build a bitset from fact ids.
+
+    Args:
+        facts (iterable): Fact ids.
+
+    Returns:
+        int: The bitset with those bits set.
+    """
+    mask = 0
+    for fact in facts:
+        mask |= 1 << fact
+    return mask
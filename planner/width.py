@@ -0,0 +1,267 @@
+"""
+width.py
+
+This module defines width-based search engines over the grounded Task of
+task.py: iterated width, IW(k), and best-first width search, BFWS.
+
+The novelty of a state is the size of the smallest tuple of facts that holds in
+it and in no state seen before. IW(k) is a breadth-first search that prunes
+every state whose novelty is greater than k; it is incomplete, but many goals
+(a single atom, or several serializable ones) are reached with k = 1 or 2 after
+expanding a number of states polynomial in the number of facts. IW runs IW(1),
+then IW(2), and reports the width at which the problem was solved.
+
+BFWS is a complete best-first search that expands states by increasing novelty,
+breaking ties by a heuristic (the goal count by default). Novelty is measured
+separately among the states with the same heuristic value, so that a state that
+gets closer to the goal is novel again.
+"""
+
+import heapq
+import itertools
+import math
+from collections import deque
+
+from heuristics import GoalCountHeuristic
+from search import SearchEngine, extract_plan
+
+
+class NoveltyTable:
+    """
+    The fact tuples seen so far, up to size 2.
+
+    Single facts are kept in a bitset. Pairs are kept in a bytearray with one byte
+    per ordered pair of fact ids, or in a hash set of pair ids when the task has
+    too many facts for the array.
+
+    Attributes:
+        width (int): The largest tuple size tracked (1 or 2).
+    """
+
+    MAX_PAIR_ARRAY = 1 << 24
+
+    def __init__(self, num_facts, width):
+        """
+        Initialize an empty table.
+
+        Args:
+            num_facts (int): The number of facts of the task.
+            width (int): The largest tuple size tracked, 1 or 2.
+        """
+        if width not in (1, 2):
+            raise ValueError(f"width must be 1 or 2, got {width}")
+        self.width = width
+        self._num_facts = num_facts
+        self._facts = 0
+        if width < 2:
+            self._pairs = None
+        elif num_facts * num_facts <= self.MAX_PAIR_ARRAY:
+            self._pairs = bytearray(num_facts * num_facts)
+        else:
+            self._pairs = set()
+
+    def evaluate(self, state, facts, new_facts=None):
+        """
+        Compute the novelty of a state and record its tuples.
+
+        Args:
+            state (int): The state bitset.
+            facts (list): The ids of the facts of the state.
+            new_facts (list, optional): When every tuple of the state without these facts
+                is known to be recorded already (e.g. the facts added by the operator
+                that produced it), only tuples containing one of them are checked.
+                Defaults to None (all facts).
+
+        Returns:
+            int: The novelty, 1 or 2, or width + 1 if the state has no new tuple.
+        """
+        novelty = self.width + 1
+        if state & ~self._facts:
+            self._facts |= state
+            novelty = 1
+        if self._pairs is None:
+            return novelty
+        candidates = facts if new_facts is None else new_facts
+        pairs = self._pairs
+        num_facts = self._num_facts
+        is_array = isinstance(pairs, bytearray)
+        for first in candidates:
+            for second in facts:
+                if first == second:
+                    continue
+                if first < second:
+                    pair = first * num_facts + second
+                else:
+                    pair = second * num_facts + first
+                if is_array:
+                    if not pairs[pair]:
+                        pairs[pair] = 1
+                        novelty = min(novelty, 2)
+                elif pair not in pairs:
+                    pairs.add(pair)
+                    novelty = min(novelty, 2)
+        return novelty
+
+
+class IteratedWidthSearch(SearchEngine):
+    """
+    IW(1), IW(2), ...: breadth-first searches that prune states that are not novel.
+
+    Attributes:
+        max_width (int): The largest width tried.
+        width (int): The width at which a plan was found, or the last width tried.
+    """
+
+    complete = False
+
+    def __init__(self, task, max_width=2, pruning=None, limits=None, logger=None):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task.
+            max_width (int, optional): The largest width tried, 1 or 2. Defaults to 2.
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(task, pruning=pruning, limits=limits, logger=logger)
+        self.max_width = max_width
+        self.width = 0
+        self.statistics["novelty_pruned"] = 0
+
+    def search(self):
+        """
+        Run IW(k) for k = 1 up to max_width.
+
+        Returns:
+            list: The operators of a plan, or None if no width up to max_width finds one.
+        """
+        function_name = "search"
+        for width in range(1, self.max_width + 1):
+            self.width = width
+            plan = self._iterated_width(width)
+            self.logger.info(
+                f"{self.__class__.__name__}.{function_name}: IW({width}) "
+                + ("found a plan" if plan is not None else "failed")
+            )
+            if plan is not None:
+                return plan
+        return None
+
+    def _iterated_width(self, width):
+        """
+        Run IW(width).
+
+        Args:
+            width (int): The largest novelty of the states kept.
+
+        Returns:
+            list: The operators of a plan, or None if the pruned search space has no goal.
+        """
+        task = self.task
+        initial = task.initial_state
+        if task.is_goal(initial):
+            return []
+        table = NoveltyTable(len(task.facts), width)
+        table.evaluate(initial, task.state_facts(initial))
+        parents = {initial: None}
+        queue = deque([initial])
+        while queue:
+            state = queue.popleft()
+            self.statistics["expansions"] += 1
+            for op, child in self.successors(state):
+                if child in parents:
+                    self.statistics["duplicates"] += 1
+                    continue
+                novelty = table.evaluate(
+                    child, task.state_facts(child), list(op.add_facts)
+                )
+                if novelty > width:
+                    self.statistics["novelty_pruned"] += 1
+                    continue
+                parents[child] = (state, op)
+                if task.is_goal(child):
+                    return extract_plan(parents, child)
+                queue.append(child)
+        return None
+
+    def _log_statistics(self):
+        """
+        Log the search statistics, including the width reached.
+        """
+        self.statistics["width"] = self.width
+        super()._log_statistics()
+
+
+class BestFirstWidthSearch(SearchEngine):
+    """
+    Best-first width search: expand states by novelty, then by heuristic value.
+
+    Attributes:
+        width (int): The largest tuple size used to measure novelty (1 or 2).
+    """
+
+    def __init__(
+        self, task, heuristic=None, width=2, pruning=None, limits=None, logger=None
+    ):
+        """
+        Initialize the search.
+
+        Args:
+            task (Task): The grounded task.
+            heuristic (object, optional): A heuristic from heuristics.py. Defaults to
+                the goal count.
+            width (int, optional): The largest tuple size used to measure novelty. Defaults to 2.
+            pruning (StubbornSetPruning, optional): A successor pruning. Defaults to None.
+            limits (ResourceLimits, optional): Limits checked at every expansion. Defaults to None.
+            logger (Logger, optional): A logger for debugging and informational messages. Defaults to None.
+        """
+        super().__init__(
+            task,
+            heuristic=heuristic or GoalCountHeuristic(task),
+            pruning=pruning,
+            limits=limits,
+            logger=logger,
+        )
+        self.width = width
+        for novelty in range(1, width + 2):
+            self.statistics[f"novelty_{novelty}"] = 0
+
+    def search(self):
+        """
+        Run the best-first search.
+
+        Returns:
+            list: The operators of a plan, or None if no solution exists.
+        """
+        task = self.task
+        tables = {}
+        counter = itertools.count()
+
+        def novelty(state, h):
+            table = tables.get(h)
+            if table is None:
+                table = tables[h] = NoveltyTable(len(task.facts), self.width)
+            return table.evaluate(state, task.state_facts(state))
+
+        initial = task.initial_state
+        h = self.evaluate(initial)
+        parents = {initial: None}
+        open_list = [(novelty(initial, h), h, next(counter), initial)]
+        while open_list:
+            level, _, _, state = heapq.heappop(open_list)
+            if task.is_goal(state):
+                return extract_plan(parents, state)
+            self.statistics["expansions"] += 1
+            self.statistics[f"novelty_{level}"] += 1
+            for op, child in self.successors(state):
+                if child in parents:
+                    self.statistics["duplicates"] += 1
+                    continue
+                parents[child] = (state, op)
+                h = self.evaluate(child, state, op)
+                if h == math.inf:
+                    continue
+                heapq.heappush(open_list, (novelty(child, h), h, next(counter), child))
+        return None
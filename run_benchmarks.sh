@@ -50,15 +50,39 @@ echo "----------------" >> benchmarks.log
 
 echo "Running DFS Planner (Small Problem)"
 echo "Planner: DFS Planner (Small Problem)" >> benchmarks.log
-{ time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-small.pddl; } 2>> benchmarks.log
+{ time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-small.pddl --no-plan-cache; } 2>> benchmarks.log
+python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-small.pddl --plan hamiltonian-example.pddl.plan >> benchmarks.log
 echo "----------------" >> benchmarks.log
 
 echo "Running DFS Planner (Medium Problem)"
 echo "Planner: DFS Planner (Medium Problem)" >> benchmarks.log
-{ time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-medium.pddl; } 2>> benchmarks.log
+{ time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-medium.pddl --no-plan-cache; } 2>> benchmarks.log
+python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-medium.pddl --plan hamiltonian-example.pddl.plan >> benchmarks.log
 echo "----------------" >> benchmarks.log
 
-# echo "Running DFS Planner (Large Problem)"
-# echo "Planner: DFS Planner (Large Problem)" >> benchmarks.log
-# { time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-large.pddl; } 2>> benchmarks.log
-# echo "----------------" >> benchmarks.log
\ No newline at end of file
+echo "Running DFS Planner (Large Problem)"
+echo "Planner: DFS Planner (Large Problem)" >> benchmarks.log
+{ time python planner/dfs_planner.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-large.pddl --ordering warnsdorff --no-plan-cache; } 2>> benchmarks.log
+python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-large.pddl --plan hamiltonian-example.pddl.plan >> benchmarks.log
+echo "----------------" >> benchmarks.log
+
+echo "Running Native Solver (Small Problem)"
+echo "Planner: Native Solver (Small Problem)" >> benchmarks.log
+{ time python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-small.pddl; } >> benchmarks.log 2>&1
+echo "----------------" >> benchmarks.log
+
+echo "Running Native Solver (Medium Problem)"
+echo "Planner: Native Solver (Medium Problem)" >> benchmarks.log
+{ time python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-medium.pddl; } >> benchmarks.log 2>&1
+echo "----------------" >> benchmarks.log
+
+echo "Running Native Solver (Large Problem)"
+echo "Planner: Native Solver (Large Problem)" >> benchmarks.log
+{ time python hamiltonian_cycle/hamiltonian_solver.py hamiltonian_cycle/problem-large.pddl; } >> benchmarks.log 2>&1
+echo "----------------" >> benchmarks.log
+
+echo "Validating Plans"
+echo "Plan Validation" >> benchmarks.log
+python planner/plan_validator.py hamiltonian_cycle hanoi_tower blocksword turing_machine >> benchmarks.log
+python planner/plan_validator.py -d hamiltonian_cycle/domain.pddl -p hamiltonian_cycle/problem-large.pddl hamiltonian-example.pddl.plan >> benchmarks.log
+echo "----------------" >> benchmarks.log
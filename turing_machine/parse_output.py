@@ -1,8 +1,23 @@
 import os
 import re
-import subprocess
+import sys
 import tempfile
 
+# The planner runner, output parser, and plan cache are shared through planner/
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "planner")
+)
+from plan_cache import PlanCache
+from plan_stream import PlanStep, PlanStreamParser, ProgressEvent
+from runner import FINISHED, PlannerJob, planner_command, run_planner_job
+
+# Facts of the problem read to check cached plans
+TRANSITION = re.compile(r"\(TRANSITION (\S+) (\S+) (\S+) (\S+) (\S+)\)")
+SYMBOL_AT = re.compile(r"\(SYMBOLAT (\S+) (\S+)\)")
+CURRENT_STATE = re.compile(r"\(CURRENTSTATE (\S+)\)")
+HEAD_AT = re.compile(r"\(HEADAT (\S+)\)")
+HALTING_STATE = re.compile(r"\(HALTINGSTATE (\S+)\)")
+
 
 def get_user_input():
     """Gets the user input for the initial tape configuration."""
@@ -349,94 +364,115 @@ def generate_pddl_problem(tape_values):
     return problem
 
 
-def run_ff_planner(domain_file, problem_file):
-    """Runs the FF planner with the given domain and problem files."""
-    try:
-        cmd = ["ff", domain_file, problem_file]
-        result = subprocess.run(cmd, text=True, capture_output=True, check=True)
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error running FF planner: {e}")
-        print(f"Error output: {e.stderr}")
+def run_ff_planner(
+    domain_file, problem_file, timeout=None, memory_limit=None, on_line=None
+):
+    """Runs the FF planner with the given domain and problem files, within optional time (s) and memory (MB) limits, passing each output line to on_line as it is produced."""
+    run = run_planner_job(
+        PlannerJob(
+            planner_command("ff", domain_file, problem_file),
+            timeout=timeout,
+            memory_limit=memory_limit,
+            on_line=on_line,
+        )
+    )
+    if run.status != FINISHED:
+        print(f"Error running FF planner: {run}")
+        print(f"Error output: {run.stderr}")
+        return None
+    return run.stdout
+
+
+def plan_step_fields(step):
+    """Converts a STEP action of the plan into a dictionary of its fields, or None for another action."""
+    if step.action != "STEP" or len(step.arguments) != 7:
         return None
+    (
+        cur_state,
+        read_sym,
+        next_state,
+        write_sym,
+        cur_cell,
+        next_cell,
+        direction,
+    ) = step.arguments
+    return {
+        "step": step.index,
+        "cur_state": cur_state,
+        "read_sym": read_sym,
+        "next_state": next_state,
+        "write_sym": write_sym,
+        "cur_cell": cur_cell,
+        "next_cell": next_cell,
+        "direction": direction,
+    }
 
 
 def parse_plan_steps(planner_output):
     """Parses the FF planner output to extract plan steps."""
-    plan_steps = []
-
     # The FF planner output contains lines like:
     # 0: STEP Q0 ONE Q101 X C1 C2 R
-    step_pattern = re.compile(r"(\d+): STEP (\S+) (\S+) (\S+) (\S+) (\S+) (\S+) (\S+)")
-
-    # First, find the plan in the output
-    plan_section = False
-    for line in planner_output.splitlines():
-        if line.strip() == "":
-            continue
-
-        if "step" in line.lower() and ":" in line and not plan_section:
-            plan_section = True
-            continue
-
-        if plan_section:
-            match = step_pattern.search(line)
-            if match:
-                (
-                    step_num,
-                    cur_state,
-                    read_sym,
-                    next_state,
-                    write_sym,
-                    cur_cell,
-                    next_cell,
-                    direction,
-                ) = match.groups()
-                plan_steps.append(
-                    {
-                        "step": int(step_num),
-                        "cur_state": cur_state,
-                        "read_sym": read_sym,
-                        "next_state": next_state,
-                        "write_sym": write_sym,
-                        "cur_cell": cur_cell,
-                        "next_cell": next_cell,
-                        "direction": direction,
-                    }
-                )
-            elif "time" in line.lower() or len(line.strip()) == 0:
-                break
-
+    plan_steps = []
+    for event in PlanStreamParser("ff").parse(planner_output.splitlines()):
+        fields = plan_step_fields(event) if isinstance(event, PlanStep) else None
+        if fields:
+            plan_steps.append(fields)
     return plan_steps
 
 
+def validate_plan_steps(plan_steps, problem_content):
+    """Checks that the plan steps run the machine of the problem from its initial configuration to a halting state."""
+    problem_content = problem_content.upper()
+    transitions = set(TRANSITION.findall(problem_content))
+    tape = blank_tape()
+    tape.update(SYMBOL_AT.findall(problem_content))
+    state = CURRENT_STATE.search(problem_content).group(1)
+    head = HEAD_AT.search(problem_content).group(1)
+    moves = {"R": 1, "L": -1, "N": 0}
+    for step in plan_steps:
+        if (
+            step["cur_state"] != state
+            or step["cur_cell"] != head
+            or step["read_sym"] != tape.get(head)
+            or (
+                state,
+                step["read_sym"],
+                step["next_state"],
+                step["write_sym"],
+                step["direction"],
+            )
+            not in transitions
+            or step["next_cell"]
+            != f"C{int(head[1:]) + moves.get(step['direction'], 0)}"
+            or step["next_cell"] not in tape
+        ):
+            return False
+        tape[head] = step["write_sym"]
+        state, head = step["next_state"], step["next_cell"]
+    return state in HALTING_STATE.findall(problem_content)
+
+
+def blank_tape():
+    """Creates a tape with all blank cells."""
+    return {f"C{i}": "B" for i in range(1, 26)}
+
+
+def apply_step(tape, step):
+    """Applies one plan step to the tape."""
+    # Convert PDDL symbols to our representation
+    write_sym = step["write_sym"]
+    if write_sym == "ONE":
+        write_sym = "1"
+
+    # Update the tape at the current cell
+    tape[step["cur_cell"]] = write_sym
+
+
 def simulate_turing_machine(plan_steps):
     """Simulates the Turing machine execution based on the plan steps."""
-    # Initialize tape with all blank cells
-    tape = {f"C{i}": "B" for i in range(1, 26)}
-    head = "C1"  # Start at the first cell
-
-    # Process each step
+    tape = blank_tape()
     for step in plan_steps:
-        cur_cell = step["cur_cell"]
-        write_sym = step["write_sym"]
-        next_cell = step["next_cell"]
-
-        # Convert PDDL symbols to our representation
-        if write_sym == "ONE":
-            write_sym = "1"
-        elif write_sym == "B":
-            write_sym = "B"
-        elif write_sym == "X":
-            write_sym = "X"
-        elif write_sym == "S":
-            write_sym = "S"
-
-        # Update the tape at the current cell
-        tape[cur_cell] = write_sym
-        # Move the head
-        head = next_cell
-
+        apply_step(tape, step)
     return tape
 
 
@@ -470,34 +506,60 @@ def main():
             os.path.dirname(os.path.abspath(__file__)), "domain.pddl"
         )
 
-        # Run the FF planner
-        print("Running FF planner...")
-        planner_output = run_ff_planner(domain_path, tmp_problem_path)
-
-        if planner_output:
-            # Parse the plan steps
-            plan_steps = parse_plan_steps(planner_output)
-
-            if plan_steps:
-                print(f"Found plan with {len(plan_steps)} steps")
-
-                # Create formatted plan output for display
-                plan_text = ""
-                for step in plan_steps:
-                    plan_text += (
-                        f"STEP {step['step']:4d}: STEP {step['cur_state']} {step['read_sym']} "
-                        f"{step['next_state']} {step['write_sym']} {step['cur_cell']} {step['next_cell']} "
-                        f"{step['direction']}\n"
-                    )
-
-                # Simulate the Turing machine execution
-                final_tape = simulate_turing_machine(plan_steps)
-
-                # Print the final tape content
-                print("\nFinal tape output:")
-                print(format_tape_output(final_tape))
-            else:
-                print("No plan steps found in the planner output.")
+        # Reuse the plan of an identical problem from the plan cache
+        with open(domain_path, "r") as f:
+            domain_content = f.read()
+        plan_cache = PlanCache()
+        cache_key = PlanCache.key(domain_content, problem_content, {"planner": "ff"})
+        plan_steps = plan_cache.get(
+            cache_key,
+            validate=lambda steps: validate_plan_steps(steps, problem_content),
+        )
+
+        if plan_steps is not None:
+            print("Plan found in the plan cache")
+            planner_output = None
+            final_tape = simulate_turing_machine(plan_steps)
+        else:
+            # Run the FF planner, simulating each plan step as soon as FF prints it
+            print("Running FF planner...")
+            parser = PlanStreamParser("ff")
+            plan_steps = []
+            final_tape = blank_tape()
+
+            def on_line(line):
+                for event in parser.feed(line):
+                    if isinstance(event, ProgressEvent):
+                        print(f"FF goal distance: {event.value}", flush=True)
+                        continue
+                    fields = plan_step_fields(event)
+                    if fields:
+                        apply_step(final_tape, fields)
+                        plan_steps.append(fields)
+
+            planner_output = run_ff_planner(
+                domain_path, tmp_problem_path, on_line=on_line
+            )
+            if plan_steps and validate_plan_steps(plan_steps, problem_content):
+                plan_cache.put(cache_key, plan_steps)
+
+        if plan_steps:
+            print(f"Found plan with {len(plan_steps)} steps")
+
+            # Create formatted plan output for display
+            plan_text = ""
+            for step in plan_steps:
+                plan_text += (
+                    f"STEP {step['step']:4d}: STEP {step['cur_state']} {step['read_sym']} "
+                    f"{step['next_state']} {step['write_sym']} {step['cur_cell']} {step['next_cell']} "
+                    f"{step['direction']}\n"
+                )
+
+            # Print the final tape content
+            print("\nFinal tape output:")
+            print(format_tape_output(final_tape))
+        elif planner_output:
+            print("No plan steps found in the planner output.")
         else:
             print("Failed to get output from the FF planner.")
 